@@ -14,6 +14,9 @@ from discord_collector_direct import DiscordDirectCollector
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# backfill 한 번 호출에 쓸 시간 (Vercel 함수 실행 제한보다 짧게)
+BACKFILL_MAX_SECONDS = float(os.getenv('BACKFILL_MAX_SECONDS', 50))
+
 def handler(request, context):
     """
     Vercel serverless function handler
@@ -44,6 +47,10 @@ def handler(request, context):
             query_params = getattr(request, 'args', {})
             channel_id = query_params.get('channel_id', default_channel_id)
             hours = int(query_params.get('hours', 1))
+            incremental = str(query_params.get('incremental', 'false')).lower() in ('1', 'true', 'yes')
+            guild_id = query_params.get('guild_id')
+            channel_ids = [c for c in query_params.get('channel_ids', '').split(',') if c] or None
+            backfill = str(query_params.get('backfill', 'false')).lower() in ('1', 'true', 'yes')
             
         elif method == 'POST':
             # POST 요청 처리 (JSON 바디)
@@ -51,6 +58,10 @@ def handler(request, context):
                 body = json.loads(request.get_data().decode('utf-8'))
                 channel_id = body.get('channel_id', default_channel_id)
                 hours = body.get('hours', 1)
+                incremental = bool(body.get('incremental', False))
+                guild_id = body.get('guild_id')
+                channel_ids = body.get('channel_ids')
+                backfill = bool(body.get('backfill', False))
             except (json.JSONDecodeError, AttributeError):
                 return {
                     'statusCode': 400,
@@ -66,14 +77,14 @@ def handler(request, context):
             }
         
         # 유효성 검사
-        if not channel_id:
+        if not channel_id and not guild_id and not channel_ids:
             return {
                 'statusCode': 400,
                 'headers': {'Content-Type': 'application/json'},
-                'body': json.dumps({'error': 'channel_id is required'})
+                'body': json.dumps({'error': 'channel_id, channel_ids or guild_id is required'})
             }
         
-        if hours < 1 or hours > 24:
+        if not backfill and (hours < 1 or hours > 24):
             return {
                 'statusCode': 400,
                 'headers': {'Content-Type': 'application/json'},
@@ -87,8 +98,36 @@ def handler(request, context):
             supabase_key=supabase_key
         )
         
+        # 채널 전체 기록 backfill: 함수 실행 시간 제한 안에서 진행하고, 다음 호출이 이어서 진행
+        if backfill:
+            result = collector.backfill(channel_id=channel_id, max_seconds=BACKFILL_MAX_SECONDS)
+            return {
+                'statusCode': 200,
+                'headers': {'Content-Type': 'application/json'},
+                'body': json.dumps({
+                    'status': result['status'],
+                    'message': f"Backfill {result['shards_done']}/{result['shards_total']} ranges done "
+                               f"({result['messages_fetched']} messages this run)",
+                    'data': result
+                })
+            }
+        
+        # 서버 전체/여러 채널이면 동시 수집
+        if guild_id or channel_ids:
+            result = collector.collect_guild(guild_id=guild_id, channel_ids=channel_ids, hours=hours,
+                                             incremental=incremental)
+            return {
+                'statusCode': 200,
+                'headers': {'Content-Type': 'application/json'},
+                'body': json.dumps({
+                    'status': result['status'],
+                    'message': f"Collected {result['messages_saved']} messages from {result['channel_count']} channels",
+                    'data': result
+                })
+            }
+        
         # 메시지 수집 실행
-        result = collector.collect_and_save(channel_id=channel_id, hours=hours)
+        result = collector.collect_and_save(channel_id=channel_id, hours=hours, incremental=incremental)
         
         # 성공 응답
         return {
@@ -7,8 +7,8 @@ FastAPI를 사용한 Discord 메시지 수집 API 서버
 import os
 import logging
 from datetime import datetime
-from typing import Optional
-from fastapi import FastAPI, HTTPException
+from typing import List, Optional
+from fastapi import BackgroundTasks, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from discord_api_direct import DiscordAPICollector
@@ -37,6 +37,29 @@ app.add_middleware(
 class CollectRequest(BaseModel):
     channel_id: str
     hours: int = 1
+    incremental: bool = False  # 채널 체크포인트 이후만 수집
+    supabase_url: Optional[str] = None
+    supabase_key: Optional[str] = None
+    discord_token: Optional[str] = None
+
+class GuildCollectRequest(BaseModel):
+    guild_id: Optional[str] = None
+    channel_ids: Optional[List[str]] = None
+    hours: int = 1
+    incremental: bool = False
+    concurrency: Optional[int] = None  # 동시에 수집할 채널 수
+    supabase_url: Optional[str] = None
+    supabase_key: Optional[str] = None
+    discord_token: Optional[str] = None
+
+class BackfillRequest(BaseModel):
+    channel_id: str
+    since: Optional[datetime] = None  # 이 시각 이후만 (기본: 채널 생성 시점부터)
+    restart: bool = False  # 저장된 진행 상태를 버리고 처음부터
+    max_seconds: Optional[float] = None  # 실행 시간 제한 (넘으면 진행 상태 저장 후 종료)
+    concurrency: Optional[int] = None  # 동시에 가져올 범위 수
+    shards: Optional[int] = None  # 나눌 범위 수 (새 계획일 때만)
+    background: bool = True  # true면 바로 응답하고 백그라운드에서 실행
     supabase_url: Optional[str] = None
     supabase_key: Optional[str] = None
     discord_token: Optional[str] = None
@@ -68,7 +91,10 @@ async def root():
             "GET /": "서버 정보",
             "GET /health": "헬스 체크",
             "POST /collect": "메시지 수집 (사용자 설정)",
-            "GET /collect/quick": "간편 수집 (기본 설정)"
+            "GET /collect/quick": "간편 수집 (기본 설정)",
+            "POST /collect/guild": "서버 전체/여러 채널 동시 수집",
+            "POST /collect/backfill": "채널 전체 기록 backfill (중단 후 이어서 실행 가능)",
+            "GET /collect/backfill/{channel_id}": "backfill 진행 상태"
         },
         "example_usage": {
             "quick_collect": "GET /collect/quick?hours=6",
@@ -93,13 +119,14 @@ async def health_check():
     )
 
 @app.get("/collect/quick", response_model=CollectResponse)
-async def quick_collect(hours: int = 1, channel_id: Optional[str] = None):
+async def quick_collect(hours: int = 1, channel_id: Optional[str] = None, incremental: bool = False):
     """
     간편 메시지 수집 (환경변수 사용)
     
     Query Parameters:
     - hours: 수집할 시간 범위 (기본값: 1)
     - channel_id: Discord 채널 ID (기본값: 환경변수)
+    - incremental: true면 마지막 수집 이후 메시지만 수집 (체크포인트 없으면 hours 범위)
     """
     # 환경변수 확인
     if not all([DEFAULT_DISCORD_TOKEN, DEFAULT_SUPABASE_URL, DEFAULT_SUPABASE_KEY]):
@@ -130,7 +157,7 @@ async def quick_collect(hours: int = 1, channel_id: Optional[str] = None):
             supabase_key=DEFAULT_SUPABASE_KEY
         )
         
-        result = collector.collect_and_save(channel_id=target_channel_id, hours=hours)
+        result = collector.collect_and_save(channel_id=target_channel_id, hours=hours, incremental=incremental)
         
         return CollectResponse(
             status="success",
@@ -153,6 +180,7 @@ async def collect_messages(request: CollectRequest):
     Request Body:
     - channel_id: Discord 채널 ID (필수)
     - hours: 수집할 시간 범위 (기본값: 1)
+    - incremental: true면 마지막 수집 이후 메시지만 수집 (기본값: false)
     - discord_token: Discord bot 토큰 (선택, 없으면 환경변수 사용)
     - supabase_url: Supabase URL (선택, 없으면 환경변수 사용)
     - supabase_key: Supabase API 키 (선택, 없으면 환경변수 사용)
@@ -189,7 +217,8 @@ async def collect_messages(request: CollectRequest):
             supabase_key=supabase_key
         )
         
-        result = collector.collect_and_save(channel_id=request.channel_id, hours=request.hours)
+        result = collector.collect_and_save(channel_id=request.channel_id, hours=request.hours,
+                                            incremental=request.incremental)
         
         return CollectResponse(
             status="success",
@@ -204,6 +233,139 @@ async def collect_messages(request: CollectRequest):
             detail=f"메시지 수집 중 오류가 발생했습니다: {str(e)}"
         )
 
+@app.post("/collect/guild", response_model=CollectResponse)
+async def collect_guild(request: GuildCollectRequest):
+    """
+    서버 전체 또는 여러 채널 동시 수집
+    
+    Request Body:
+    - guild_id: Discord 서버 ID (지정 시 서버의 텍스트 채널 전체)
+    - channel_ids: 채널 ID 목록 (guild_id 와 함께 주면 그 중 일부만)
+    - hours: 수집할 시간 범위 (기본값: 1)
+    - incremental: true면 채널별 마지막 수집 이후 메시지만 수집 (기본값: false)
+    - concurrency: 동시에 수집할 채널 수 (기본값: GUILD_CHANNEL_CONCURRENCY)
+    - discord_token / supabase_url / supabase_key: 선택, 없으면 환경변수 사용
+    """
+    discord_token = request.discord_token or DEFAULT_DISCORD_TOKEN
+    supabase_url = request.supabase_url or DEFAULT_SUPABASE_URL
+    supabase_key = request.supabase_key or DEFAULT_SUPABASE_KEY
+    
+    if not all([discord_token, supabase_url, supabase_key]):
+        raise HTTPException(
+            status_code=400,
+            detail="discord_token, supabase_url, supabase_key 가 필요합니다."
+        )
+    
+    if not request.guild_id and not request.channel_ids:
+        raise HTTPException(
+            status_code=400,
+            detail="guild_id 또는 channel_ids 가 필요합니다."
+        )
+    
+    if request.hours < 1 or request.hours > 24:
+        raise HTTPException(
+            status_code=400,
+            detail="hours는 1~24 사이여야 합니다."
+        )
+    
+    try:
+        collector = DiscordAPICollector(
+            discord_token=discord_token,
+            supabase_url=supabase_url,
+            supabase_key=supabase_key
+        )
+        
+        result = await collector.collect_guild_async(guild_id=request.guild_id, channel_ids=request.channel_ids,
+                                                     hours=request.hours, incremental=request.incremental,
+                                                     concurrency=request.concurrency)
+        
+        return CollectResponse(
+            status=result['status'],
+            message=f"✅ 채널 {result['channel_count']}개에서 {result['messages_saved']}개 메시지를 수집했습니다! "
+                    f"({result['messages_per_second']:.0f} msg/s)",
+            data=result
+        )
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Guild collect failed: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"메시지 수집 중 오류가 발생했습니다: {str(e)}"
+        )
+
+@app.post("/collect/backfill", response_model=CollectResponse)
+async def collect_backfill(request: BackfillRequest, background_tasks: BackgroundTasks):
+    """
+    채널 전체 기록 backfill
+    
+    채널 생성 시점부터 지금까지를 snowflake 범위로 나눠 동시에 가져오고, 범위마다 진행 상태를 저장합니다.
+    같은 channel_id 로 다시 호출하면 멈춘 지점부터 이어서 진행합니다.
+    """
+    discord_token = request.discord_token or DEFAULT_DISCORD_TOKEN
+    supabase_url = request.supabase_url or DEFAULT_SUPABASE_URL
+    supabase_key = request.supabase_key or DEFAULT_SUPABASE_KEY
+    
+    if not all([discord_token, supabase_url, supabase_key]):
+        raise HTTPException(
+            status_code=400,
+            detail="discord_token, supabase_url, supabase_key 가 필요합니다."
+        )
+    
+    collector = DiscordAPICollector(
+        discord_token=discord_token,
+        supabase_url=supabase_url,
+        supabase_key=supabase_key
+    )
+    options = dict(since=request.since, restart=request.restart, max_seconds=request.max_seconds,
+                   concurrency=request.concurrency, shards=request.shards)
+    
+    if request.background:
+        background_tasks.add_task(collector.backfill_async, request.channel_id, **options)
+        return CollectResponse(
+            status="started",
+            message=f"🚀 채널 {request.channel_id} backfill 을 시작했습니다. "
+                    f"GET /collect/backfill/{request.channel_id} 로 진행 상태를 확인하세요.",
+            data=collector.backfill_status(request.channel_id)
+        )
+    
+    try:
+        result = await collector.backfill_async(request.channel_id, **options)
+        return CollectResponse(
+            status=result['status'],
+            message=f"✅ backfill {result['shards_done']}/{result['shards_total']} 범위 완료, "
+                    f"이번 실행 {result['messages_fetched']}개 메시지",
+            data=result
+        )
+    except Exception as e:
+        logger.error(f"Backfill failed: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"backfill 중 오류가 발생했습니다: {str(e)}"
+        )
+
+@app.get("/collect/backfill/{channel_id}", response_model=CollectResponse)
+async def backfill_status(channel_id: str):
+    """backfill 진행 상태 (환경변수 설정 사용)"""
+    if not all([DEFAULT_DISCORD_TOKEN, DEFAULT_SUPABASE_URL, DEFAULT_SUPABASE_KEY]):
+        raise HTTPException(
+            status_code=500,
+            detail="서버 환경변수가 설정되지 않았습니다."
+        )
+    
+    collector = DiscordAPICollector(
+        discord_token=DEFAULT_DISCORD_TOKEN,
+        supabase_url=DEFAULT_SUPABASE_URL,
+        supabase_key=DEFAULT_SUPABASE_KEY
+    )
+    status = collector.backfill_status(channel_id)
+    return CollectResponse(
+        status=status['status'],
+        message=f"backfill {status['shards_done']}/{status['shards_total']} 범위 완료",
+        data=status
+    )
+
 @app.get("/docs-info")
 async def docs_info():
     """API 사용법 안내"""
@@ -232,6 +394,16 @@ async def docs_info():
                     "supabase_key": "your-supabase-key"
                 },
                 "description": "사용자 설정으로 메시지 수집"
+            },
+            "guild_collect": {
+                "method": "POST",
+                "url": "/collect/guild",
+                "body": {
+                    "guild_id": "1159481575235403857",
+                    "hours": 6,
+                    "incremental": True
+                },
+                "description": "서버의 모든 텍스트 채널을 동시에 수집"
             }
         }
     }
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+채널 전체 기록 backfill
+채널 생성 시점부터 지금까지를 snowflake 범위(shard)로 나눠 여러 범위를 동시에 가져오는 모듈
+
+- 각 shard 는 after=/before= 로 범위가 고정된 forward paginator 로 수집합니다.
+- 모은 row 는 배치 예산만큼 차면 바로 UPSERT 하고, 저장이 끝난 지점까지 shard 커서를
+  상태 저장소에 기록합니다. 중간에 죽어도 다시 실행하면 끝난 shard 는 건너뛰고
+  진행 중이던 shard 는 마지막 저장 커서부터 이어서 가져옵니다.
+- 메시지는 메모리에 쌓지 않고 배치 단위로만 들고 있습니다.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from checkpoints import CHECKPOINT_BACKEND, locked_path, write_json_atomic
+from discord_paginator import MessagePaginator
+from discord_rest import AsyncDiscordClient
+from discord_snowflake import datetime_to_snowflake
+from metadata_cache import MetadataCache, shared_metadata_cache
+from supabase_writer import SupabaseBatchWriter, estimate_row_bytes
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_SHARDS = int(os.getenv('BACKFILL_SHARDS', 16))
+BACKFILL_CONCURRENCY = int(os.getenv('BACKFILL_CONCURRENCY', 4))
+BACKFILL_STATE_PATH = os.getenv('BACKFILL_STATE_PATH', 'backfill_state.json')
+BACKFILL_STATE_TABLE = os.getenv('BACKFILL_STATE_TABLE', 'discord_backfill_state')
+
+FormatRows = Callable[[List[Dict[str, Any]], Dict[str, Any], Dict[str, Any]], List[Dict[str, Any]]]
+
+
+def plan_shards(start_id: int, end_id: int, count: int) -> List[Dict[str, Any]]:
+    """
+    (start_id, end_id) snowflake 범위를 시간상 같은 길이의 shard 로 나눕니다.
+
+    Returns:
+        [{'after': 하한(exclusive), 'before': 상한(exclusive), 'cursor': 저장 완료 지점, 'done': False}, ...]
+    """
+    count = max(1, count)
+    # snowflake 의 상위 비트가 시각이므로 ID 범위를 균등 분할하면 시간도 균등 분할됨
+    step = max(1, (end_id - start_id) // count)
+    bounds = [start_id + step * i for i in range(count)] + [end_id]
+    return [
+        {'after': str(lo), 'before': str(hi), 'cursor': str(lo), 'done': False, 'messages': 0}
+        for lo, hi in zip(bounds, bounds[1:]) if hi > lo
+    ]
+
+
+class LocalBackfillStore:
+    """JSON 파일 기반 backfill 진행 상태 저장소"""
+
+    def __init__(self, path: str = BACKFILL_STATE_PATH):
+        self.path = path
+
+    def _load_all(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"backfill 상태 파일을 읽을 수 없습니다 ({self.path}): {e}")
+            return {}
+
+    def load(self, channel_id: str) -> Optional[Dict[str, Any]]:
+        # 파일은 통째로 교체되므로 읽기는 잠그지 않음
+        return self._load_all().get(str(channel_id))
+
+    def save(self, channel_id: str, state: Dict[str, Any]) -> None:
+        # 다른 채널을 backfill 하는 저장소 인스턴스와 같은 파일을 쓰므로 경로 단위로 잠금
+        with locked_path(self.path):
+            data = self._load_all()
+            data[str(channel_id)] = state
+            write_json_atomic(self.path, data)
+
+    def clear(self, channel_id: str) -> None:
+        with locked_path(self.path):
+            data = self._load_all()
+            if data.pop(str(channel_id), None) is not None:
+                write_json_atomic(self.path, data)
+
+
+class SupabaseBackfillStore:
+    """Supabase 테이블 기반 backfill 진행 상태 저장소 (docs/create_table.sql 참고)"""
+
+    def __init__(self, client: Any, table: str = BACKFILL_STATE_TABLE):
+        self.client = client
+        self.table = table
+
+    def load(self, channel_id: str) -> Optional[Dict[str, Any]]:
+        result = self.client.table(self.table).select('state').eq('channel_id', int(channel_id)).execute()
+        return result.data[0]['state'] if result.data else None
+
+    def save(self, channel_id: str, state: Dict[str, Any]) -> None:
+        self.client.table(self.table).upsert({
+            'channel_id': int(channel_id),
+            'state': state,
+            'updated_at': datetime.now(timezone.utc).isoformat()
+        }, on_conflict='channel_id').execute()
+
+    def clear(self, channel_id: str) -> None:
+        self.client.table(self.table).delete().eq('channel_id', int(channel_id)).execute()
+
+
+def summarize_state(state: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """저장된 진행 상태를 shard 완료 수/저장 메시지 수로 요약"""
+    if not state:
+        return {'status': 'not_started', 'shards_total': 0, 'shards_done': 0, 'messages_total': 0}
+    shards = state['shards']
+    done = sum(1 for s in shards if s['done'])
+    return {
+        'status': 'complete' if done == len(shards) else 'partial',
+        'range_after': state['after'],
+        'range_before': state['before'],
+        'created_at': state.get('created_at'),
+        'shards_total': len(shards),
+        'shards_done': done,
+        'messages_total': sum(s['messages'] for s in shards),
+    }
+
+
+def default_backfill_store(client: Any = None):
+    """CHECKPOINT_BACKEND 설정을 따라 backfill 상태 저장소 생성"""
+    if CHECKPOINT_BACKEND == 'supabase' and client is not None:
+        return SupabaseBackfillStore(client)
+    return LocalBackfillStore()
+
+
+class BackfillEngine:
+    """
+    채널 전체 기록을 shard 단위로 동시에 가져와 저장하는 엔진
+
+    사용 예:
+        async with AsyncDiscordClient(token) as client:
+            engine = BackfillEngine(client, writer, format_rows, store)
+            result = await engine.run(channel_id)
+    """
+
+    def __init__(self, client: AsyncDiscordClient, writer: SupabaseBatchWriter, format_rows: FormatRows,
+                 store: Any, concurrency: Optional[int] = None, shards: Optional[int] = None,
+                 metadata: Optional[MetadataCache] = None):
+        """
+        Args:
+            client: 비동기 Discord REST 클라이언트
+            writer: UPSERT writer
+            format_rows: (messages, channel_info, guild_info) → Supabase row 변환 함수
+            store: 진행 상태 저장소 (load/save/clear)
+            concurrency: 동시에 가져올 shard 수 (기본: BACKFILL_CONCURRENCY)
+            shards: 새 계획을 만들 때 나눌 shard 수 (기본: BACKFILL_SHARDS)
+            metadata: 서버 정보 캐시 (기본: 프로세스 공용)
+        """
+        self.client = client
+        self.writer = writer
+        self.format_rows = format_rows
+        self.store = store
+        self.concurrency = max(1, concurrency or BACKFILL_CONCURRENCY)
+        self.shard_count = shards or BACKFILL_SHARDS
+        self.metadata = metadata or shared_metadata_cache()
+        self._save_lock = asyncio.Lock()
+
+    async def run(self, channel_id: str, since: Optional[datetime] = None, restart: bool = False,
+                  max_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """
+        backfill 을 실행(또는 이어서 실행)합니다.
+
+        Args:
+            channel_id: Discord channel ID
+            since: 이 시각 이후만 (기본: 채널 생성 시점부터)
+            restart: 저장된 진행 상태를 버리고 새로 계획
+            max_seconds: 이 시간이 지나면 새 페이지 요청을 멈추고 진행 상태만 저장하고 반환
+
+        Returns:
+            shard 진행 현황, 이번 실행에서 가져온 메시지 수, 처리량
+        """
+        start = time.perf_counter()
+        deadline = start + max_seconds if max_seconds else None
+
+        # 채널 정보는 범위 상한(last_message_id)에 쓰므로 캐시하지 않고 새로 가져옴
+        channel = await self.client.get_channel(channel_id)
+        guild_id = channel.get('guild_id')
+        guild = await self.metadata.aget(f"guild:{guild_id}", lambda: self.client.get_guild(guild_id)) if guild_id else {}
+
+        state = None if restart else await asyncio.to_thread(self.store.load, channel_id)
+        if state is None:
+            state = self._new_state(channel, since)
+            await asyncio.to_thread(self.store.save, channel_id, state)
+            logger.info(f"🔖 backfill 계획 생성: 채널 {channel.get('name', channel_id)}, shard {len(state['shards'])}개")
+        else:
+            remaining = sum(1 for s in state['shards'] if not s['done'])
+            logger.info(f"🔖 backfill 이어서 실행: 채널 {channel.get('name', channel_id)}, "
+                        f"남은 shard {remaining}/{len(state['shards'])}개")
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run_shard(index: int) -> int:
+            async with semaphore:
+                return await self._run_shard(channel_id, channel, guild, state, index, deadline)
+
+        pending = [i for i, shard in enumerate(state['shards']) if not shard['done']]
+        counts = await asyncio.gather(*(run_shard(i) for i in pending), return_exceptions=True)
+        errors = [c for c in counts if isinstance(c, Exception)]
+        fetched = sum(c for c in counts if not isinstance(c, Exception))
+
+        elapsed = time.perf_counter() - start
+        done = sum(1 for s in state['shards'] if s['done'])
+        complete = done == len(state['shards'])
+        result = {
+            'status': 'error' if errors else ('complete' if complete else 'partial'),
+            'channel_id': channel_id,
+            'channel_name': channel.get('name', ''),
+            'server_name': guild.get('name', ''),
+            'range_after': state['after'],
+            'range_before': state['before'],
+            'shards_total': len(state['shards']),
+            'shards_done': done,
+            'messages_fetched': fetched,
+            'messages_total': sum(s['messages'] for s in state['shards']),
+            'elapsed_seconds': elapsed,
+            'messages_per_second': fetched / elapsed if elapsed else 0.0,
+            'errors': [str(e) for e in errors],
+        }
+        logger.info(f"{'✅' if complete else '⏰'} backfill {result['status']}: shard {done}/{len(state['shards'])}, "
+                    f"이번 실행 {fetched}개 메시지, {elapsed:.2f}초 ({result['messages_per_second']:.0f} msg/s)")
+        return result
+
+    def _new_state(self, channel: Dict[str, Any], since: Optional[datetime]) -> Dict[str, Any]:
+        # 채널 ID 자체가 채널 생성 시각의 snowflake
+        start_id = datetime_to_snowflake(since) if since else int(channel['id'])
+        end_id = datetime_to_snowflake(datetime.now(timezone.utc))
+        if channel.get('last_message_id'):
+            end_id = min(end_id, int(channel['last_message_id']) + 1)
+        return {
+            'after': str(start_id),
+            'before': str(end_id),
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'shards': plan_shards(start_id, end_id, self.shard_count),
+        }
+
+    async def _run_shard(self, channel_id: str, channel: Dict[str, Any], guild: Dict[str, Any],
+                         state: Dict[str, Any], index: int, deadline: Optional[float]) -> int:
+        shard = state['shards'][index]
+        paginator = MessagePaginator(after_id=int(shard['cursor']), before_id=int(shard['before']))
+        fetched = 0
+        pending: List[Dict[str, Any]] = []
+        pending_bytes = 0
+        cursor = int(shard['cursor'])
+
+        while not paginator.done:
+            if deadline and time.perf_counter() >= deadline:
+                break
+            page = paginator.feed(await self.client.get_messages(channel_id, paginator.params()))
+            if page:
+                rows = self.format_rows(page, channel, guild)
+                pending.extend(rows)
+                pending_bytes += sum(estimate_row_bytes(row) for row in rows)
+                cursor = max(cursor, max(row['id'] for row in rows))
+                fetched += len(rows)
+            if pending_bytes >= self.writer.sizer.budget:
+                await self._flush(channel_id, state, shard, pending, cursor)
+                pending, pending_bytes = [], 0
+
+        await self._flush(channel_id, state, shard, pending, cursor, done=paginator.done)
+        return fetched
+
+    async def _flush(self, channel_id: str, state: Dict[str, Any], shard: Dict[str, Any],
+                     rows: List[Dict[str, Any]], cursor: int, done: bool = False) -> None:
+        """rows 저장이 끝나면 shard 커서를 cursor 로 옮기고 진행 상태 저장"""
+        futures = []
+        for batch in self.writer.sizer.batches(rows):
+            futures.append(await asyncio.to_thread(self.writer.submit, batch))
+        await asyncio.gather(*(asyncio.wrap_future(f) for f in futures))
+
+        async with self._save_lock:
+            shard['cursor'] = str(cursor)
+            shard['messages'] += len(rows)
+            shard['done'] = done or shard['done']
+            await asyncio.to_thread(self.store.save, channel_id, state)
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+채널별 수집 체크포인트 (high-watermark)
+채널마다 마지막으로 저장한 메시지 snowflake 를 기록해서, 다음 수집은 그 이후 메시지만
+가져오도록 하는 모듈
+
+저장소:
+- local: JSON 파일 (CHECKPOINT_PATH, 기본값 ./collect_checkpoints.json)
+- supabase: discord_collect_checkpoints 테이블 (docs/create_table.sql 참고)
+
+수집기마다 저장소 인스턴스를 새로 만들므로, 같은 파일을 고치는 구간은 인스턴스가 아니라
+파일 경로 단위로 잠급니다 (프로세스 안은 스레드 lock, 프로세스 사이는 flock).
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_BACKEND = os.getenv('CHECKPOINT_BACKEND', 'local')
+CHECKPOINT_PATH = os.getenv('CHECKPOINT_PATH', 'collect_checkpoints.json')
+CHECKPOINT_TABLE = os.getenv('CHECKPOINT_TABLE', 'discord_collect_checkpoints')
+# 체크포인트를 조건부로 앞당기는 Postgres 함수 (docs/create_table.sql 참고)
+CHECKPOINT_ADVANCE_RPC = os.getenv('CHECKPOINT_ADVANCE_RPC', 'advance_collect_checkpoint')
+
+# 파일 경로 → 그 파일을 고치는 스레드 lock (프로세스 공용)
+_path_locks: Dict[str, threading.Lock] = {}
+_path_locks_guard = threading.Lock()
+
+
+def write_json_atomic(path: str, data: Any) -> None:
+    """쓰다가 죽어도 파일이 깨지지 않도록 임시 파일에 쓰고 교체"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.checkpoints_', dir=directory)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def locked_path(path: str) -> Iterator[None]:
+    """
+    path 파일을 읽고-고치고-쓰는 구간을 같은 경로끼리 직렬화합니다.
+    같은 프로세스의 모든 저장소 인스턴스는 경로별 lock 하나를 공유하고,
+    다른 프로세스와는 옆에 둔 '<path>.lock' 파일의 flock 으로 막습니다 (fcntl 이 없으면 프로세스 안에서만).
+    """
+    key = os.path.abspath(path)
+    with _path_locks_guard:
+        lock = _path_locks.setdefault(key, threading.Lock())
+    with lock:
+        if fcntl is None:
+            yield
+            return
+        with open(key + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class LocalCheckpointStore:
+    """JSON 파일 기반 체크포인트 저장소"""
+
+    def __init__(self, path: str = CHECKPOINT_PATH):
+        """
+        Args:
+            path: 체크포인트 JSON 파일 경로
+        """
+        self.path = path
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"체크포인트 파일을 읽을 수 없습니다 ({self.path}): {e}")
+            return {}
+
+    def get(self, channel_id: str) -> Optional[int]:
+        """채널의 마지막 저장 메시지 ID (없으면 None)"""
+        # 파일은 통째로 교체되므로 읽기는 잠그지 않아도 깨진 내용을 보지 않음
+        entry = self._load().get(str(channel_id))
+        return int(entry['last_message_id']) if entry else None
+
+    def advance(self, channel_id: str, message_id: int) -> int:
+        """
+        체크포인트를 message_id 로 앞당깁니다. 기존 값보다 작으면 그대로 둡니다.
+
+        Returns:
+            갱신 후 체크포인트
+        """
+        with locked_path(self.path):
+            data = self._load()
+            entry = data.get(str(channel_id))
+            current = int(entry['last_message_id']) if entry else 0
+            if message_id <= current:
+                return current
+            data[str(channel_id)] = {
+                'last_message_id': str(message_id),
+                'updated_at': datetime.now(timezone.utc).isoformat()
+            }
+            write_json_atomic(self.path, data)
+            return message_id
+
+
+class SupabaseCheckpointStore:
+    """Supabase 테이블 기반 체크포인트 저장소 (서버리스처럼 로컬 디스크가 유지되지 않는 환경용)"""
+
+    def __init__(self, client: Any, table: str = CHECKPOINT_TABLE):
+        """
+        Args:
+            client: Supabase client
+            table: 체크포인트 테이블
+        """
+        self.client = client
+        self.table = table
+
+    def get(self, channel_id: str) -> Optional[int]:
+        result = self.client.table(self.table).select('last_message_id').eq('channel_id', int(channel_id)).execute()
+        return int(result.data[0]['last_message_id']) if result.data else None
+
+    def advance(self, channel_id: str, message_id: int) -> int:
+        """
+        체크포인트를 message_id 로 앞당깁니다 (GREATEST 로 한 번에 쓰므로 동시 수집끼리 값을 되돌리지 않음).
+
+        Returns:
+            갱신 후 체크포인트
+        """
+        result = self.client.rpc(CHECKPOINT_ADVANCE_RPC, {
+            'p_channel_id': int(channel_id),
+            'p_message_id': int(message_id)
+        }).execute()
+        return int(result.data)
+
+
+def default_checkpoint_store(client: Any = None):
+    """
+    CHECKPOINT_BACKEND 환경변수에 따라 체크포인트 저장소 생성
+
+    Args:
+        client: supabase backend 에서 사용할 Supabase client
+    """
+    if CHECKPOINT_BACKEND == 'supabase' and client is not None:
+        return SupabaseCheckpointStore(client)
+    return LocalCheckpointStore()
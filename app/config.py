@@ -37,6 +37,15 @@ API_PORT = int(os.getenv('API_PORT', 8000))
 # 메시지 수집 설정
 COLLECTION_DAYS = int(os.getenv('COLLECTION_DAYS', 5))
 COLLECTION_HOURS = int(os.getenv('COLLECTION_HOURS', 1))
+COLLECTION_PIPELINED = os.getenv('COLLECTION_PIPELINED', 'false').lower() in ('1', 'true', 'yes')
+# export 파일 대신 FIFO 로 CLI 출력을 받아 바로 파싱 (디스크 쓰기 없음, 파이프라인 수집)
+COLLECTION_STREAMED = os.getenv('COLLECTION_STREAMED', 'false').lower() in ('1', 'true', 'yes')
+# export 를 나눌 단위 (메시지 수 또는 '10mb' 같은 크기, 비어 있으면 나누지 않음) - 나뉜 파일은 여러 프로세스로 파싱
+COLLECTION_PARTITION = os.getenv('COLLECTION_PARTITION', '')
+# 채널 체크포인트 이후만 수집 (증분 수집)
+COLLECTION_INCREMENTAL = os.getenv('COLLECTION_INCREMENTAL', 'false').lower() in ('1', 'true', 'yes')
+# 여러 채널을 CLI 한 번으로 일괄 수집 (쉼표로 구분, 비어 있으면 DEFAULT_CHANNEL_ID 하나만 수집)
+COLLECTION_CHANNEL_IDS = [c.strip() for c in os.getenv('COLLECTION_CHANNEL_IDS', '').split(',') if c.strip()]
 
 # 설정 확인 함수
 def validate_config():
@@ -73,7 +82,12 @@ def print_config():
     print(f"  ├─ API 호스트: {API_HOST}")
     print(f"  ├─ API 포트: {API_PORT}")
     print(f"  ├─ 수집 기간: {COLLECTION_DAYS}일")
-    print(f"  └─ 수집 시간: {COLLECTION_HOURS}시간")
+    print(f"  ├─ 수집 시간: {COLLECTION_HOURS}시간")
+    print(f"  ├─ 파이프라인 수집: {'✅' if COLLECTION_PIPELINED else '❌'}")
+    print(f"  ├─ FIFO 스트리밍 수집: {'✅' if COLLECTION_STREAMED else '❌'}")
+    print(f"  ├─ 분할 수집 단위: {COLLECTION_PARTITION or '없음'}")
+    print(f"  ├─ 증분 수집: {'✅' if COLLECTION_INCREMENTAL else '❌'}")
+    print(f"  └─ 일괄 수집 채널: {', '.join(COLLECTION_CHANNEL_IDS) if COLLECTION_CHANNEL_IDS else '없음'}")
 
 if __name__ == "__main__":
     validate_config()
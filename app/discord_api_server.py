@@ -9,18 +9,30 @@ import sys
 import asyncio
 import tempfile
 import subprocess
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 import uvicorn
 from discord_to_supabase import DiscordToSupabaseCollector
+from job_queue import JOB_STORE_PATH, JobQueue, JobStore, QueueFullError
+
+# 수집 작업 큐 (동시 실행 수 / 대기 수 제한, 작업 상태는 JOB_STORE_PATH 에 저장)
+job_queue = JobQueue(JobStore(JOB_STORE_PATH))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # 종료 시 새 작업을 막고 실행 중인 작업이 끝나길 기다림
+    await asyncio.to_thread(job_queue.shutdown)
 
 # FastAPI 앱 초기화
 app = FastAPI(
     title="Discord Collector API",
     description="Discord 메시지 수집 및 Supabase 저장 API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # 요청/응답 모델 정의
@@ -28,6 +40,18 @@ class CollectRequest(BaseModel):
     channel_id: str
     hours: int = 1
     server_id: Optional[str] = None
+    pipelined: bool = False  # 내보내기/파싱/저장 단계를 겹쳐서 실행
+    incremental: bool = False  # 채널 체크포인트 이후만 수집
+    streamed: bool = False  # export 파일 대신 FIFO 로 CLI 출력을 받아 바로 파싱
+    partition: Optional[str] = None  # export 를 나눌 단위 (예: '10000', '10mb') - 나뉜 파일을 병렬 파싱
+
+class BatchCollectRequest(BaseModel):
+    channel_ids: Optional[List[str]] = None  # 없으면 guild_id 서버 전체
+    guild_id: Optional[str] = None
+    hours: int = 1
+    incremental: bool = False
+    parallel: Optional[int] = None  # CLI --parallel (기본: EXPORT_PARALLEL)
+    include_threads: bool = False
 
 class CollectResponse(BaseModel):
     status: str
@@ -50,8 +74,7 @@ class HealthResponse(BaseModel):
 # 환경변수에서 설정 로드
 from config import SUPABASE_URL, SUPABASE_KEY, DISCORD_TOKEN, DEFAULT_CHANNEL_ID
 
-# 작업 상태 저장
-tasks_status = {}
+# 마지막 수집 정보
 last_collection_info = None
 
 @app.get("/", response_model=StatusResponse)
@@ -94,26 +117,13 @@ async def health_check():
     )
 
 @app.post("/collect", response_model=CollectResponse)
-async def collect_messages(request: CollectRequest, background_tasks: BackgroundTasks):
+async def collect_messages(request: CollectRequest):
     """Discord 메시지 수집 (비동기)"""
-    task_id = f"task_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-    
-    # 태스크 상태 초기화
-    tasks_status[task_id] = {
-        "status": "started",
+    # 워커 풀에서 실행 (동시 실행 수는 JOB_WORKERS 로 제한)
+    task_id, _ = submit_job("task", run_collection_task, request, {
         "channel_id": request.channel_id,
-        "hours": request.hours,
-        "start_time": datetime.now(),
-        "messages_count": 0
-    }
-    
-    # 백그라운드에서 수집 작업 실행
-    background_tasks.add_task(
-        run_collection_task, 
-        task_id, 
-        request.channel_id, 
-        request.hours
-    )
+        "hours": request.hours
+    })
     
     return CollectResponse(
         status="accepted",
@@ -124,56 +134,55 @@ async def collect_messages(request: CollectRequest, background_tasks: Background
 @app.post("/collect/sync", response_model=CollectResponse)
 async def collect_messages_sync(request: CollectRequest):
     """Discord 메시지 수집 (동기)"""
-    start_time = datetime.now()
+    task_id, future = submit_job("sync", run_collection_task, request, {
+        "channel_id": request.channel_id,
+        "hours": request.hours
+    })
     
     try:
-        # 수집기 생성
-        collector = DiscordToSupabaseCollector(
-            supabase_url=SUPABASE_URL,
-            supabase_key=SUPABASE_KEY,
-            discord_token=DISCORD_TOKEN
-        )
-        
-        # 메시지 수집
-        result = collector.collect_and_save(
-            channel_id=request.channel_id, 
-            hours=request.hours
-        )
-        
-        end_time = datetime.now()
-        execution_time = str(end_time - start_time)
-        
-        # 글로벌 상태 업데이트
-        global last_collection_info
-        last_collection_info = {
-            "channel_id": request.channel_id,
-            "hours": request.hours,
-            "timestamp": start_time.isoformat(),
-            "execution_time": execution_time,
-            "status": "completed"
-        }
-        
-        return CollectResponse(
-            status="completed",
-            message=f"메시지 수집이 완료되었습니다.",
-            messages_count=getattr(result, 'messages_count', None),
-            execution_time=execution_time
-        )
-        
+        # 이벤트 루프를 막지 않고 워커의 작업이 끝나길 기다림
+        job = await asyncio.wrap_future(future)
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"메시지 수집 중 오류 발생: {str(e)}"
         )
+    
+    return CollectResponse(
+        status="completed",
+        message=f"메시지 수집이 완료되었습니다.",
+        task_id=task_id,
+        messages_count=job.get("messages_count"),
+        execution_time=job.get("execution_time")
+    )
+
+@app.post("/collect/batch", response_model=CollectResponse)
+async def collect_batch_messages(request: BatchCollectRequest):
+    """여러 채널 / 서버 전체 메시지를 CLI 한 번으로 일괄 수집 (비동기)"""
+    if not request.channel_ids and not request.guild_id:
+        raise HTTPException(status_code=400, detail="channel_ids 또는 guild_id 가 필요합니다.")
+    
+    task_id, _ = submit_job("batch", run_batch_collection_task, request, {
+        "channel_ids": request.channel_ids,
+        "guild_id": request.guild_id,
+        "hours": request.hours
+    })
+    
+    return CollectResponse(
+        status="accepted",
+        message=f"일괄 수집 작업이 시작되었습니다.",
+        task_id=task_id
+    )
 
 @app.get("/collect/momentum", response_model=CollectResponse)
-async def collect_momentum_messages(hours: int = 1):
+async def collect_momentum_messages(hours: int = 1, incremental: bool = False):
     """Momentum Messengers 서버 메시지 수집 (고정 설정)"""
     CHANNEL_ID = DEFAULT_CHANNEL_ID  # main-stock-chat
     
     request = CollectRequest(
         channel_id=CHANNEL_ID,
-        hours=hours
+        hours=hours,
+        incremental=incremental
     )
     
     return await collect_messages_sync(request)
@@ -181,56 +190,83 @@ async def collect_momentum_messages(hours: int = 1):
 @app.get("/tasks/{task_id}")
 async def get_task_status(task_id: str):
     """작업 상태 조회"""
-    if task_id not in tasks_status:
+    task = job_queue.store.get(task_id)
+    if task is None:
         raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
     
-    return tasks_status[task_id]
+    return task
 
 @app.get("/tasks")
-async def list_tasks():
-    """모든 작업 목록"""
-    return {"tasks": tasks_status}
+async def list_tasks(status: Optional[str] = None, limit: int = 100):
+    """최근 작업 목록 (status 로 필터)"""
+    return {
+        "tasks": {task.pop("task_id"): task for task in job_queue.store.list(status=status, limit=limit)},
+        "queue": job_queue.stats()
+    }
 
-async def run_collection_task(task_id: str, channel_id: str, hours: int):
-    """백그라운드 수집 작업"""
+def submit_job(kind: str, run, request: BaseModel, params: Dict[str, Any]):
+    """작업 큐에 수집 작업 등록 (대기열이 가득 차면 429)"""
     try:
-        tasks_status[task_id]["status"] = "running"
-        
-        # 수집기 생성
-        collector = DiscordToSupabaseCollector(
-            supabase_url=SUPABASE_URL,
-            supabase_key=SUPABASE_KEY,
-            discord_token=DISCORD_TOKEN
-        )
-        
-        # 메시지 수집
-        result = collector.collect_and_save(channel_id=channel_id, hours=hours)
-        
-        # 작업 완료
-        end_time = datetime.now()
-        tasks_status[task_id].update({
-            "status": "completed",
-            "end_time": end_time,
-            "execution_time": str(end_time - tasks_status[task_id]["start_time"]),
-            "messages_count": getattr(result, 'messages_count', 0)
-        })
-        
-        # 글로벌 상태 업데이트
-        global last_collection_info
-        last_collection_info = {
-            "channel_id": channel_id,
-            "hours": hours,
-            "timestamp": tasks_status[task_id]["start_time"].isoformat(),
-            "execution_time": tasks_status[task_id]["execution_time"],
-            "status": "completed"
-        }
-        
-    except Exception as e:
-        tasks_status[task_id].update({
-            "status": "failed",
-            "error": str(e),
-            "end_time": datetime.now()
-        })
+        return job_queue.submit(kind, lambda: run(request), params)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=f"수집 작업 대기열이 가득 찼습니다: {str(e)}")
+
+def run_collection_task(request: CollectRequest) -> Dict[str, Any]:
+    """수집 작업 (워커 스레드에서 실행)"""
+    start_time = datetime.now()
+    
+    # 수집기 생성
+    collector = DiscordToSupabaseCollector(
+        supabase_url=SUPABASE_URL,
+        supabase_key=SUPABASE_KEY,
+        discord_token=DISCORD_TOKEN
+    )
+    
+    # 메시지 수집
+    result = collector.collect_and_save(
+        channel_id=request.channel_id,
+        hours=request.hours,
+        pipelined=request.pipelined,
+        incremental=request.incremental,
+        streamed=request.streamed,
+        partition=request.partition
+    )
+    
+    # 글로벌 상태 업데이트
+    global last_collection_info
+    last_collection_info = {
+        "channel_id": request.channel_id,
+        "hours": request.hours,
+        "timestamp": start_time.isoformat(),
+        "execution_time": str(datetime.now() - start_time),
+        "status": "completed"
+    }
+    
+    return {"messages_count": result.get("messages_count", 0) if isinstance(result, dict) else 0}
+
+def run_batch_collection_task(request: BatchCollectRequest) -> Dict[str, Any]:
+    """일괄 수집 작업 (워커 스레드에서 실행)"""
+    collector = DiscordToSupabaseCollector(
+        supabase_url=SUPABASE_URL,
+        supabase_key=SUPABASE_KEY,
+        discord_token=DISCORD_TOKEN
+    )
+    
+    options = {"parallel": request.parallel} if request.parallel else {}
+    result = collector.collect_channels_and_save(
+        channel_ids=request.channel_ids,
+        guild_id=request.guild_id,
+        hours=request.hours,
+        incremental=request.incremental,
+        include_threads=request.include_threads,
+        **options
+    )
+    
+    return {
+        "status": "completed" if result["status"] == "success" else "partial",
+        "messages_count": result["messages_count"],
+        "channels": result["channels"]
+    }
 
 if __name__ == "__main__":
     print("🚀 Discord Collector API Server")
@@ -240,6 +276,7 @@ if __name__ == "__main__":
     print("  ├─ GET  /health    : 헬스 체크")
     print("  ├─ POST /collect   : 메시지 수집 (비동기)")
     print("  ├─ POST /collect/sync : 메시지 수집 (동기)")
+    print("  ├─ POST /collect/batch : 여러 채널 일괄 수집 (비동기)")
     print("  ├─ GET  /collect/momentum : Momentum 서버 수집")
     print("  ├─ GET  /tasks/{id}: 작업 상태 조회")
     print("  └─ GET  /tasks     : 모든 작업 목록")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Discord 채널 메시지 paginator
+GET /channels/{id}/messages 를 after(앞으로) 또는 before(뒤로) 방향으로 페이지 이동하는 모듈
+
+시간 범위는 시작할 때 한 번만 snowflake 로 바꾸고, 이후 페이지 경계와 범위 판정은
+모두 메시지 ID 정수 비교로 합니다 (메시지마다 timestamp 를 파싱하지 않음).
+요청을 보내는 방법(requests, httpx, async 등)과는 분리되어 있어 어떤 transport 에서도 쓸 수 있습니다.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from discord_snowflake import datetime_to_snowflake
+
+# Discord API 한 페이지 최대 메시지 수
+MAX_PAGE_LIMIT = 100
+
+FORWARD = 'after'
+BACKWARD = 'before'
+
+
+class MessagePaginator:
+    """
+    (after_id, before_id) 사이 메시지를 페이지 단위로 가져오기 위한 상태 머신
+
+    - FORWARD: after= 커서를 페이지의 가장 큰 ID 로 옮기며 오래된 쪽 → 최신 쪽으로 이동
+    - BACKWARD: before= 커서를 페이지의 가장 작은 ID 로 옮기며 최신 쪽 → 오래된 쪽으로 이동
+
+    사용 예:
+        paginator = MessagePaginator.for_window(hours=6)
+        for page in paginator.pages(fetch_page):
+            ...
+    """
+
+    def __init__(self, after_id: Optional[int] = None, before_id: Optional[int] = None,
+                 direction: str = FORWARD, limit: int = MAX_PAGE_LIMIT):
+        """
+        Args:
+            after_id: 이 ID 보다 큰 메시지만 (exclusive, None 이면 채널 처음부터)
+            before_id: 이 ID 보다 작은 메시지만 (exclusive, None 이면 최신까지)
+            direction: FORWARD('after') 또는 BACKWARD('before')
+            limit: 페이지당 메시지 수 (최대 100)
+        """
+        if direction not in (FORWARD, BACKWARD):
+            raise ValueError(f"direction must be '{FORWARD}' or '{BACKWARD}'")
+        self.after_id = int(after_id) if after_id else 0
+        self.before_id = int(before_id) if before_id else None
+        self.direction = direction
+        self.limit = max(1, min(limit, MAX_PAGE_LIMIT))
+        self._cursor = self.after_id if direction == FORWARD else self.before_id
+        self.done = self.before_id is not None and self.before_id <= self.after_id + 1
+        self.pages_fetched = 0
+        self.messages_yielded = 0
+
+    @classmethod
+    def for_window(cls, hours: Optional[float] = None, after_id: Optional[int] = None,
+                   before_id: Optional[int] = None, direction: str = FORWARD,
+                   limit: int = MAX_PAGE_LIMIT, now: Optional[datetime] = None) -> 'MessagePaginator':
+        """
+        최근 hours 시간 범위(또는 after_id 이후) paginator 생성
+
+        after_id 가 있으면 hours 보다 우선합니다. 시각 → snowflake 변환은 여기서 한 번만 합니다.
+        """
+        if not after_id and hours:
+            since = (now or datetime.now(timezone.utc)) - timedelta(hours=hours)
+            after_id = datetime_to_snowflake(since)
+        return cls(after_id=after_id, before_id=before_id, direction=direction, limit=limit)
+
+    def params(self) -> Dict[str, Any]:
+        """다음 페이지 요청 query parameters"""
+        params: Dict[str, Any] = {'limit': self.limit}
+        if self.direction == FORWARD:
+            params['after'] = str(self._cursor)
+        elif self._cursor is not None:
+            params['before'] = str(self._cursor)
+        return params
+
+    def feed(self, page: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        받은 페이지를 반영하고 범위 안의 메시지만 반환합니다.
+
+        Args:
+            page: API 응답 (메시지 리스트, 정렬 순서는 상관없음)
+
+        Returns:
+            (after_id, before_id) 범위 안의 메시지
+        """
+        self.pages_fetched += 1
+        if not page:
+            self.done = True
+            return []
+
+        ids = [int(msg['id']) for msg in page]
+        lower = self.after_id
+        upper = self.before_id
+        if self.direction == FORWARD:
+            self._cursor = max(ids)
+            if upper is not None and self._cursor >= upper - 1:
+                self.done = True
+            in_range = page if upper is None else [msg for msg, i in zip(page, ids) if i < upper]
+        else:
+            self._cursor = min(ids)
+            if self._cursor <= lower + 1:
+                self.done = True
+            in_range = page if self._cursor > lower else [msg for msg, i in zip(page, ids) if i > lower]
+
+        if len(page) < self.limit:
+            self.done = True
+        self.messages_yielded += len(in_range)
+        return in_range
+
+    def pages(self, fetch_page: Callable[[Dict[str, Any]], List[Dict[str, Any]]]) -> Iterator[List[Dict[str, Any]]]:
+        """
+        fetch_page(params) 를 반복 호출하면서 범위 안의 메시지 페이지를 yield
+
+        Args:
+            fetch_page: query parameters 를 받아 메시지 리스트를 반환하는 함수
+        """
+        while not self.done:
+            messages = self.feed(fetch_page(self.params()))
+            if messages:
+                yield messages
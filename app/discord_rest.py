@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Discord REST 클라이언트
+커넥션 풀(keep-alive)과 route 별 rate-limit bucket 을 가진 httpx 기반 동기/비동기 클라이언트
+
+- 응답의 X-RateLimit-* 헤더로 bucket 상태(남은 요청 수, 리셋 시각)를 학습하고,
+  남은 요청이 없으면 리셋될 때까지 기다린 뒤 보냅니다.
+- 429 를 받으면 retry_after 만큼 기다렸다가 스스로 재시도합니다 (global limit 포함).
+- DISCORD_API_BASE 로 base URL 을 바꿔 로컬 mock 서버에 붙일 수 있습니다.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from discord_paginator import MessagePaginator
+
+logger = logging.getLogger(__name__)
+
+DISCORD_API_BASE = os.getenv('DISCORD_API_BASE', 'https://discord.com/api/v10')
+DISCORD_MAX_CONNECTIONS = int(os.getenv('DISCORD_MAX_CONNECTIONS', 10))
+DISCORD_MAX_RETRIES = int(os.getenv('DISCORD_MAX_RETRIES', 5))
+DISCORD_TIMEOUT = float(os.getenv('DISCORD_TIMEOUT', 30))
+# 프로세스 전체 초당 요청 한도 (Discord bot global limit 50/s, 0 이면 제한 없음)
+DISCORD_GLOBAL_RATE = float(os.getenv('DISCORD_GLOBAL_RATE', 50))
+
+USER_AGENT = 'DiscordBot (https://github.com/tjdwls101010/DiscordChatExporter.Cli.osx-arm64, 1.0)'
+
+# Discord 는 이 리소스 ID 별로 bucket 을 따로 둡니다 (major parameter)
+MAJOR_PARAMETERS = ('channels', 'guilds', 'webhooks')
+
+
+def route_key(method: str, path: str) -> Tuple[str, str]:
+    """
+    요청 경로를 rate-limit route 로 바꿉니다.
+
+    major parameter(channel/guild/webhook ID)는 그대로 두고 나머지 ID 는 {id} 로 묶습니다.
+
+    Returns:
+        (route, major parameter 값)
+    """
+    parts = path.strip('/').split('/')
+    major = ''
+    route = []
+    for i, part in enumerate(parts):
+        if part.isdigit():
+            if i and parts[i - 1] in MAJOR_PARAMETERS and not major:
+                major = part
+            else:
+                part = '{id}'
+        route.append(part)
+    return f"{method.upper()} /{'/'.join(route)}", major
+
+
+class RateLimitBuckets:
+    """
+    route → bucket 상태 (스레드/코루틴 공용)
+
+    reserve() 가 요청 한 자리를 미리 차감하기 때문에 같은 bucket 에 동시에 여러 요청이
+    몰려도 remaining 을 넘겨 보내지 않습니다. route bucket 과 별도로 프로세스 전체 초당 요청
+    수(global_rate)도 token bucket 으로 제한해서, 여러 채널을 동시에 수집해도 한 예산을 나눠 씁니다.
+    """
+
+    def __init__(self, global_rate: float = DISCORD_GLOBAL_RATE, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.global_rate = global_rate
+        self._global_tokens = global_rate
+        self._global_refilled_at = clock()
+        self._route_buckets: Dict[str, str] = {}
+        self._state: Dict[str, Dict[str, float]] = {}
+        self.global_reset_at = 0.0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.rate_limited = 0
+
+    def _key(self, route: str, major: str) -> str:
+        bucket = self._route_buckets.get(route)
+        return f"{bucket}:{major}" if bucket else route
+
+    def reserve(self, route: str, major: str) -> float:
+        """
+        요청 한 번을 예약합니다.
+
+        Returns:
+            기다려야 하는 시간(초). 0 이면 바로 보내면 됩니다 (자리는 이미 차감됨).
+        """
+        with self._lock:
+            now = self._clock()
+            if self.global_reset_at > now:
+                return self.global_reset_at - now
+            if self.global_rate:
+                elapsed = now - self._global_refilled_at
+                self._global_tokens = min(self.global_rate, self._global_tokens + elapsed * self.global_rate)
+                self._global_refilled_at = now
+                if self._global_tokens < 1:
+                    return (1 - self._global_tokens) / self.global_rate
+            state = self._state.get(self._key(route, major))
+            if state is not None:
+                if state['reset_at'] <= now:
+                    # 윈도우가 지났으면 한도를 복구 (정확한 값은 다음 응답 헤더로 다시 맞춤)
+                    state['remaining'] = state['limit']
+                    state['reset_at'] = now + state['window']
+                if state['remaining'] <= 0:
+                    return state['reset_at'] - now
+                state['remaining'] -= 1
+            if self.global_rate:
+                self._global_tokens -= 1
+            return 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.waits += 1
+            self.wait_seconds += seconds
+
+    def update(self, route: str, major: str, headers: Any) -> None:
+        """응답 헤더(X-RateLimit-*)로 bucket 상태 갱신"""
+        bucket = headers.get('x-ratelimit-bucket')
+        remaining = headers.get('x-ratelimit-remaining')
+        reset_after = headers.get('x-ratelimit-reset-after')
+        with self._lock:
+            if bucket:
+                self._route_buckets[route] = bucket
+            if remaining is None or reset_after is None:
+                return
+            now = self._clock()
+            window = float(reset_after)
+            reset_at = now + window
+            remaining = int(remaining)
+            key = self._key(route, major)
+            state = self._state.get(key)
+            if state and abs(state['reset_at'] - reset_at) < 1.0:
+                # 같은 윈도우면 먼저 예약된 요청 몫을 빼고 남은 값과 비교해서 작은 쪽 사용
+                remaining = min(remaining, state['remaining'])
+            self._state[key] = {
+                'remaining': remaining,
+                'limit': int(headers.get('x-ratelimit-limit') or max(remaining, 1)),
+                'reset_at': reset_at,
+                'window': window,
+            }
+
+    def on_rate_limited(self, route: str, major: str, retry_after: float, is_global: bool) -> None:
+        """429 응답 반영: retry_after 동안 해당 bucket(또는 전체)을 막습니다."""
+        with self._lock:
+            self.rate_limited += 1
+            until = self._clock() + retry_after
+            if is_global:
+                self.global_reset_at = max(self.global_reset_at, until)
+                return
+            key = self._key(route, major)
+            state = self._state.setdefault(key, {'limit': 1, 'window': retry_after})
+            state['remaining'] = 0
+            state['reset_at'] = until
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'rate_limited': self.rate_limited,
+            'waits': self.waits,
+            'wait_seconds': self.wait_seconds,
+        }
+
+
+_shared_buckets = RateLimitBuckets()
+
+
+def shared_buckets() -> RateLimitBuckets:
+    """프로세스 공용 rate-limit 상태 (같은 토큰을 쓰는 모든 클라이언트가 공유)"""
+    return _shared_buckets
+
+
+def _retry_after(response: httpx.Response) -> Tuple[float, bool]:
+    """429 응답에서 (retry_after 초, global 여부) 추출"""
+    try:
+        body = response.json()
+    except ValueError:
+        body = {}
+    retry_after = body.get('retry_after') or response.headers.get('retry-after') or 1.0
+    is_global = bool(body.get('global')) or response.headers.get('x-ratelimit-global') == 'true' \
+        or response.headers.get('x-ratelimit-scope') == 'global'
+    return float(retry_after), is_global
+
+
+class _DiscordClientBase:
+    """동기/비동기 클라이언트 공통 설정과 응답 처리"""
+
+    def __init__(self, token: str, base_url: Optional[str] = None, max_retries: Optional[int] = None,
+                 buckets: Optional[RateLimitBuckets] = None, retry_backoff: float = 0.5):
+        self.base_url = (base_url or DISCORD_API_BASE).rstrip('/')
+        self.max_retries = DISCORD_MAX_RETRIES if max_retries is None else max_retries
+        self.buckets = buckets or shared_buckets()
+        self.retry_backoff = retry_backoff
+        self.headers = {
+            'Authorization': token,
+            'Content-Type': 'application/json',
+            'User-Agent': USER_AGENT,
+        }
+        self.requests_sent = 0
+
+    def _limits(self, max_connections: Optional[int]) -> httpx.Limits:
+        connections = max_connections or DISCORD_MAX_CONNECTIONS
+        return httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+
+    def _next_delay(self, route: str, major: str, response: httpx.Response, attempt: int) -> Optional[float]:
+        """
+        응답을 처리하고 재시도 전에 기다릴 시간을 반환합니다.
+
+        Returns:
+            None 이면 재시도하지 않음 (성공 또는 raise_for_status 로 예외 발생)
+        """
+        self.buckets.update(route, major, response.headers)
+        can_retry = attempt < self.max_retries
+        if response.status_code == 429:
+            retry_after, is_global = _retry_after(response)
+            self.buckets.on_rate_limited(route, major, retry_after, is_global)
+            logger.warning(f"⏰ Discord rate limit ({'global' if is_global else route}): "
+                           f"{retry_after:.2f}초 후 재시도 ({attempt + 1}/{self.max_retries})")
+            if can_retry:
+                # 실제 대기는 다음 reserve() 에서 bucket 리셋 시각까지
+                return 0.0
+        elif response.status_code >= 500 and can_retry:
+            delay = self.retry_backoff * (2 ** attempt)
+            logger.warning(f"⚠️ Discord {response.status_code} ({route}): {delay:.1f}초 후 재시도")
+            return delay
+        response.raise_for_status()
+        return None
+
+
+class DiscordClient(_DiscordClientBase):
+    """동기 Discord REST 클라이언트 (httpx.Client 커넥션 풀 사용)"""
+
+    def __init__(self, token: str, base_url: Optional[str] = None, max_connections: Optional[int] = None,
+                 max_retries: Optional[int] = None, timeout: float = DISCORD_TIMEOUT,
+                 buckets: Optional[RateLimitBuckets] = None, transport: Optional[httpx.BaseTransport] = None):
+        """
+        Args:
+            token: Discord 토큰 (Bot 토큰이면 'Bot ' 접두어 포함)
+            base_url: API base URL (기본: DISCORD_API_BASE)
+            max_connections: 커넥션 풀 크기
+            max_retries: 429/5xx/네트워크 오류 재시도 횟수
+            timeout: 요청 timeout (초)
+            buckets: rate-limit 상태 (기본: 프로세스 공용)
+            transport: 테스트용 httpx transport
+        """
+        super().__init__(token, base_url, max_retries, buckets)
+        self._client = httpx.Client(base_url=self.base_url, headers=self.headers, timeout=timeout,
+                                    limits=self._limits(max_connections), transport=transport)
+
+    def request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        route, major = route_key(method, path)
+        for attempt in range(self.max_retries + 1):
+            delay = self.buckets.reserve(route, major)
+            while delay > 0:
+                self.buckets.record_wait(delay)
+                time.sleep(delay)
+                delay = self.buckets.reserve(route, major)
+            try:
+                self.requests_sent += 1
+                response = self._client.request(method, path, params=params)
+            except httpx.TransportError as e:
+                if attempt >= self.max_retries:
+                    raise
+                logger.warning(f"⚠️ Discord 요청 실패 ({route}): {e}")
+                time.sleep(self.retry_backoff * (2 ** attempt))
+                continue
+            delay = self._next_delay(route, major, response, attempt)
+            if delay is None:
+                return response.json()
+            time.sleep(delay)
+        raise RuntimeError(f"unreachable: {route}")
+
+    def get_messages(self, channel_id: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return self.request('GET', f"/channels/{channel_id}/messages", params=params)
+
+    def get_channel(self, channel_id: str) -> Dict[str, Any]:
+        return self.request('GET', f"/channels/{channel_id}")
+
+    def get_guild(self, guild_id: str) -> Dict[str, Any]:
+        return self.request('GET', f"/guilds/{guild_id}")
+
+    def close(self) -> None:
+        self._client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class AsyncDiscordClient(_DiscordClientBase):
+    """비동기 Discord REST 클라이언트 (httpx.AsyncClient 커넥션 풀 사용)"""
+
+    def __init__(self, token: str, base_url: Optional[str] = None, max_connections: Optional[int] = None,
+                 max_retries: Optional[int] = None, timeout: float = DISCORD_TIMEOUT,
+                 buckets: Optional[RateLimitBuckets] = None, transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        Args: DiscordClient 와 같음
+        """
+        super().__init__(token, base_url, max_retries, buckets)
+        self._client = httpx.AsyncClient(base_url=self.base_url, headers=self.headers, timeout=timeout,
+                                         limits=self._limits(max_connections), transport=transport)
+
+    async def request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        route, major = route_key(method, path)
+        for attempt in range(self.max_retries + 1):
+            delay = self.buckets.reserve(route, major)
+            while delay > 0:
+                self.buckets.record_wait(delay)
+                await asyncio.sleep(delay)
+                delay = self.buckets.reserve(route, major)
+            try:
+                self.requests_sent += 1
+                response = await self._client.request(method, path, params=params)
+            except httpx.TransportError as e:
+                if attempt >= self.max_retries:
+                    raise
+                logger.warning(f"⚠️ Discord 요청 실패 ({route}): {e}")
+                await asyncio.sleep(self.retry_backoff * (2 ** attempt))
+                continue
+            delay = self._next_delay(route, major, response, attempt)
+            if delay is None:
+                return response.json()
+            await asyncio.sleep(delay)
+        raise RuntimeError(f"unreachable: {route}")
+
+    async def get_messages(self, channel_id: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return await self.request('GET', f"/channels/{channel_id}/messages", params=params)
+
+    async def get_channel(self, channel_id: str) -> Dict[str, Any]:
+        return await self.request('GET', f"/channels/{channel_id}")
+
+    async def get_guild(self, guild_id: str) -> Dict[str, Any]:
+        return await self.request('GET', f"/guilds/{guild_id}")
+
+    async def get_guild_channels(self, guild_id: str) -> List[Dict[str, Any]]:
+        return await self.request('GET', f"/guilds/{guild_id}/channels")
+
+    async def fetch_messages(self, channel_id: str, hours: Optional[float] = 1,
+                             after_id: Optional[int] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        최근 hours 시간(또는 after_id 이후) 메시지를 after= 로 끝까지 가져오기
+        """
+        paginator = MessagePaginator.for_window(hours=hours, after_id=after_id, limit=limit)
+        messages: List[Dict[str, Any]] = []
+        while not paginator.done:
+            messages.extend(paginator.feed(await self.get_messages(channel_id, paginator.params())))
+        return messages
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+
+_shared_clients: Dict[str, DiscordClient] = {}
+_shared_clients_lock = threading.Lock()
+
+
+def shared_client(token: str) -> DiscordClient:
+    """
+    토큰별 프로세스 공용 동기 클라이언트
+
+    수집기는 요청마다 새로 만들어지므로, 커넥션 풀을 요청 사이에도 재사용하려면 공용 인스턴스를 씁니다.
+    (httpx.AsyncClient 는 이벤트 루프에 묶여 있어 공유하지 않고, rate-limit 상태만 공유합니다)
+    """
+    with _shared_clients_lock:
+        client = _shared_clients.get(token)
+        if client is None:
+            client = _shared_clients[token] = DiscordClient(token)
+        return client
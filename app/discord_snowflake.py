@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Discord snowflake 유틸리티
+메시지 ID(snowflake) 와 시각을 서로 변환하는 모듈
+
+snowflake 상위 42비트는 Discord epoch(2015-01-01T00:00:00Z) 이후 밀리초이므로,
+시간 범위 비교를 timestamp 문자열 파싱 없이 정수 비교로 할 수 있습니다.
+"""
+
+from datetime import datetime, timezone
+
+# Discord epoch (2015-01-01T00:00:00Z), milliseconds
+DISCORD_EPOCH_MS = 1420070400000
+
+
+def datetime_to_snowflake(dt: datetime) -> int:
+    """
+    해당 시각에 만들어질 수 있는 가장 작은 snowflake
+
+    naive datetime 은 로컬 시간으로 간주합니다 (datetime.timestamp() 와 동일).
+    """
+    return max(0, int(dt.timestamp() * 1000) - DISCORD_EPOCH_MS) << 22
+
+
+def snowflake_to_datetime(snowflake: int) -> datetime:
+    """snowflake 가 만들어진 시각 (UTC)"""
+    return datetime.fromtimestamp(((int(snowflake) >> 22) + DISCORD_EPOCH_MS) / 1000, tz=timezone.utc)
@@ -5,15 +5,25 @@ Discord Chat to Supabase Collector
 """
 
 import json
+import multiprocessing
 import subprocess
 import os
 import tempfile
+import threading
 import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 import logging
 from supabase import create_client, Client
 from pathlib import Path
+from export_stream import (ExportPipe, ExportStream, FollowFile, build_channel_columns, build_message_row,
+                           partition_file_path, read_export_rows)
+from pipeline import InstrumentedQueue, StageTimer
+from staging_store import drain_staging, open_writer
+from checkpoints import default_checkpoint_store
+from discord_snowflake import datetime_to_snowflake, snowflake_to_datetime
 
 # 로깅 설정
 logging.basicConfig(
@@ -22,8 +32,17 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 파이프라인 파서 → 업로드 종료 신호
+_PIPELINE_DONE = object()
+
+# 일괄 내보내기 시 CLI 안에서 동시에 내보낼 채널 수 (--parallel)
+EXPORT_PARALLEL = int(os.getenv('EXPORT_PARALLEL', 4))
+
+# 분할 export 파싱에 쓸 프로세스 수 (0 이면 CPU 코어 수)
+INGEST_WORKERS = int(os.getenv('INGEST_WORKERS', 0)) or os.cpu_count() or 1
+
 class DiscordToSupabaseCollector:
-    def __init__(self, supabase_url: str, supabase_key: str, discord_token: str):
+    def __init__(self, supabase_url: str, supabase_key: str, discord_token: str, checkpoint_store=None):
         """
         Initialize the collector
         
@@ -31,30 +50,28 @@ class DiscordToSupabaseCollector:
             supabase_url: Supabase project URL
             supabase_key: Supabase API key  
             discord_token: Discord user or bot token
+            checkpoint_store: 증분 수집 체크포인트 저장소 (기본: CHECKPOINT_BACKEND 설정)
         """
         self.supabase: Client = create_client(supabase_url, supabase_key)
         self.discord_token = discord_token
         self.discord_exporter_path = "./bin/DiscordChatExporter.Cli"
+        self.checkpoints = checkpoint_store or default_checkpoint_store(self.supabase)
         
-    def export_messages(self, channel_id: str, hours: int = 1) -> str:
+    def _build_export_command(self, channel_id: str, hours: int, after_id: Optional[int] = None,
+                              output_file: Optional[str] = None,
+                              partition: Optional[str] = None) -> Tuple[List[str], str]:
         """
-        Export messages from Discord channel using DiscordChatExporter
+        DiscordChatExporter CLI 명령어와 출력 파일 경로 생성
         
-        Args:
-            channel_id: Discord channel ID
-            hours: Number of hours to go back
-            
-        Returns:
-            Path to the exported JSON file
+        after_id 가 있으면 시간 대신 해당 메시지 ID 이후부터 내보냅니다 (--after 는 snowflake 도 받음).
+        output_file 을 지정하면 그 경로(예: FIFO)로 내보냅니다.
+        partition 을 지정하면 (메시지 수 또는 '10mb' 같은 크기) export 를 여러 파일로 나눕니다.
         """
-        start_time = time.time()
-        logger.info(f"⏰ [STEP 1] Discord 메시지 내보내기 시작: {channel_id} (최근 {hours}시간)")
-        
         # 날짜 계산 (시간 단위로 변경)
-        after_date = (datetime.now() - timedelta(hours=hours)).isoformat()
+        after_date = str(after_id) if after_id else (datetime.now() - timedelta(hours=hours)).isoformat()
         
         # 임시 출력 파일
-        output_file = f"messages_{channel_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        output_file = output_file or f"messages_{channel_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         
         # DiscordChatExporter CLI 명령어
         cmd = [
@@ -67,6 +84,26 @@ class DiscordToSupabaseCollector:
             "--output", output_file,
             "--media", "false"  # 미디어 다운로드 안함 (속도 향상)
         ]
+        if partition:
+            cmd += ["--partition", str(partition)]
+        return cmd, output_file
+    
+    def export_messages(self, channel_id: str, hours: int = 1, after_id: Optional[int] = None) -> str:
+        """
+        Export messages from Discord channel using DiscordChatExporter
+        
+        Args:
+            channel_id: Discord channel ID
+            hours: Number of hours to go back
+            after_id: 이 메시지 ID 이후만 내보내기 (지정 시 hours 무시)
+            
+        Returns:
+            Path to the exported JSON file
+        """
+        start_time = time.time()
+        logger.info(f"⏰ [STEP 1] Discord 메시지 내보내기 시작: {channel_id} (최근 {hours}시간)")
+        
+        cmd, output_file = self._build_export_command(channel_id, hours, after_id)
         
         logger.info(f"명령어: {' '.join(cmd)}")
         
@@ -83,7 +120,100 @@ class DiscordToSupabaseCollector:
             logger.error(f"STDOUT: {e.stdout}")
             logger.error(f"STDERR: {e.stderr}")
             raise
-    
+
+    def _build_batch_export_command(self, channel_ids: Optional[List[str]] = None, guild_id: Optional[str] = None,
+                                    after: Optional[str] = None, parallel: int = EXPORT_PARALLEL,
+                                    include_threads: bool = False) -> Tuple[List[str], str]:
+        """
+        여러 채널을 CLI 한 번으로 내보내는 명령어와 출력 디렉터리 생성
+
+        channel_ids 가 있으면 `export -c id1 id2 ...`, 없으면 `exportguild -g guild_id` 를 사용합니다.
+        출력 경로는 `%c` (채널 ID) 템플릿이라 채널마다 `<출력 디렉터리>/<채널 ID>.json` 이 생깁니다.
+        """
+        if not channel_ids and not guild_id:
+            raise ValueError("channel_ids 또는 guild_id 가 필요합니다")
+
+        output_dir = f"messages_batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        os.makedirs(output_dir, exist_ok=True)
+
+        if channel_ids:
+            cmd = [self.discord_exporter_path, "export", "--channel", *channel_ids]
+        else:
+            cmd = [self.discord_exporter_path, "exportguild", "--guild", guild_id,
+                   "--include-vc", "false"]
+            if include_threads:
+                cmd += ["--include-threads", "all"]
+        cmd += [
+            "--token", self.discord_token,
+            "--format", "Json",
+            "--output", os.path.join(output_dir, "%c.json"),
+            "--parallel", str(max(1, parallel)),
+            "--media", "false"
+        ]
+        if after:
+            cmd += ["--after", after]
+        return cmd, output_dir
+
+    def export_channels(self, channel_ids: Optional[List[str]] = None, guild_id: Optional[str] = None,
+                        after: Optional[str] = None, parallel: int = EXPORT_PARALLEL,
+                        include_threads: bool = False) -> Dict[str, str]:
+        """
+        여러 채널을 DiscordChatExporter 한 번 실행으로 내보내기
+
+        채널마다 CLI 를 따로 띄우면 .NET 런타임 시작, 토큰 확인, 서버 정보 조회가 채널 수만큼
+        반복되므로, 한 프로세스에 채널을 모두 넘기고 --parallel 개씩 동시에 내보냅니다.
+        일부 채널만 실패하면 CLI 는 0 이 아닌 코드로 끝나지만, 성공한 채널 파일은 그대로 반환합니다.
+
+        Args:
+            channel_ids: 내보낼 채널 ID 목록 (없으면 guild_id 서버 전체)
+            guild_id: 서버 ID
+            after: 이 시각(ISO) 또는 메시지 ID 이후만 내보내기
+            parallel: CLI 안에서 동시에 내보낼 채널 수
+            include_threads: 서버 전체 내보내기 시 스레드 포함 여부
+
+        Returns:
+            {채널 ID: export 파일 경로}
+        """
+        start_time = time.time()
+        target = f"채널 {len(channel_ids)}개" if channel_ids else f"서버 {guild_id}"
+        logger.info(f"⏰ [STEP 1] Discord 메시지 일괄 내보내기 시작: {target} (동시 {parallel})")
+
+        cmd, output_dir = self._build_batch_export_command(channel_ids, guild_id, after, parallel, include_threads)
+        logger.info(f"명령어: {' '.join(cmd)}")
+
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        elapsed_time = time.time() - start_time
+
+        files = {path.stem: str(path) for path in sorted(Path(output_dir).glob('*.json'))}
+        if result.returncode != 0:
+            logger.error(f"❌ [STEP 1] DiscordChatExporter 실행 실패 (소요시간: {elapsed_time:.2f}초): "
+                         f"exit {result.returncode}, 내보낸 파일 {len(files)}개")
+            logger.error(f"STDOUT: {result.stdout}")
+            logger.error(f"STDERR: {result.stderr}")
+            if not files:
+                raise subprocess.CalledProcessError(result.returncode, cmd, output=result.stdout, stderr=result.stderr)
+        else:
+            logger.info(f"✅ [STEP 1] 일괄 내보내기 완료: {output_dir} 파일 {len(files)}개 (소요시간: {elapsed_time:.2f}초)")
+        return files
+
+    def iter_discord_json(self, json_file: str) -> Iterator[Dict[str, Any]]:
+        """
+        Parse Discord JSON export file incrementally
+
+        guild/channel 정보는 한 번만 읽고, messages 배열은 원소 하나씩 읽어서
+        row 로 변환해 yield 합니다. 파일 크기와 상관없이 메모리 사용량이 일정합니다.
+
+        Args:
+            json_file: Path to JSON file
+
+        Yields:
+            Parsed message dictionaries
+        """
+        with ExportStream(json_file) as stream:
+            columns = build_channel_columns(stream.channel, stream.guild)
+            for msg in stream:
+                yield build_message_row(msg, columns)
+
     def parse_discord_json(self, json_file: str) -> List[Dict[str, Any]]:
         """
         Parse Discord JSON export file
@@ -98,35 +228,7 @@ class DiscordToSupabaseCollector:
         logger.info(f"⏰ [STEP 2] JSON 파일 파싱 시작: {json_file}")
         
         try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            messages = []
-            channel_info = data.get('channel', {})
-            guild_info = data.get('guild', {})
-            
-            for msg in data.get('messages', []):
-                parsed_msg = {
-                    'id': int(msg['id']),
-                    'channel_id': int(channel_info.get('id', 0)),
-                    'channel_name': channel_info.get('name', ''),
-                    'server_id': int(guild_info.get('id', 0)) if guild_info.get('id') else None,
-                    'server_name': guild_info.get('name', ''),
-                    'author_id': int(msg['author']['id']),
-                    'author_name': msg['author']['name'],
-                    'author_discriminator': msg['author'].get('discriminator', ''),
-                    'author_avatar': msg['author'].get('avatarUrl', ''),
-                    'content': msg.get('content', ''),
-                    'timestamp': msg['timestamp'],
-                    'message_type': msg.get('type', 'Default'),
-                    'is_pinned': msg.get('isPinned', False),
-                    'reference_message_id': int(msg['reference']['messageId']) if msg.get('reference', {}).get('messageId') else None,
-                    'attachments': json.dumps(msg.get('attachments', [])),
-                    'embeds': json.dumps(msg.get('embeds', [])),
-                    'reactions': json.dumps(msg.get('reactions', [])),
-                    'mentions': json.dumps(msg.get('mentions', []))
-                }
-                messages.append(parsed_msg)
+            messages = list(self.iter_discord_json(json_file))
             
             end_time = time.time()
             elapsed_time = end_time - start_time
@@ -154,21 +256,10 @@ class DiscordToSupabaseCollector:
         logger.info(f"⏰ [STEP 3] Supabase에 {len(messages)}개 메시지 저장 시작")
         
         try:
-            # 배치로 나누어 저장 (한 번에 너무 많이 보내지 않기 위해)
-            batch_size = 100
-            for i in range(0, len(messages), batch_size):
-                batch_start_time = time.time()
-                batch = messages[i:i + batch_size]
-                
-                # UPSERT 사용 (중복 메시지 처리)
-                result = self.supabase.table('discord_messages').upsert(
-                    batch,
-                    on_conflict='id'
-                ).execute()
-                
-                batch_end_time = time.time()
-                batch_elapsed = batch_end_time - batch_start_time
-                logger.info(f"  📦 배치 {i//batch_size + 1} 저장 완료: {len(batch)}개 메시지 (배치 소요시간: {batch_elapsed:.2f}초)")
+            # payload 크기 기준 adaptive 배치로 나누어 저장 (한 번에 너무 많이 보내지 않기 위해), 여러 배치를 동시에 전송
+            with open_writer(self.supabase) as writer:
+                writer.write_all(messages)
+            writer.log_summary()
             
             end_time = time.time()
             elapsed_time = end_time - start_time
@@ -180,20 +271,50 @@ class DiscordToSupabaseCollector:
             logger.error(f"❌ [STEP 3] Supabase 저장 실패 (소요시간: {elapsed_time:.2f}초): {e}")
             raise
     
-    def collect_and_save(self, channel_id: str, hours: int = 1) -> None:
+    def _resume_point(self, channel_id: str) -> Optional[int]:
+        """
+        증분 수집 시작점 (채널 체크포인트). 없으면 None 이고 hours 범위로 수집합니다.
+        """
+        after_id = self.checkpoints.get(channel_id)
+        if after_id:
+            logger.info(f"🔖 체크포인트 이후부터 수집: 메시지 {after_id} ({snowflake_to_datetime(after_id).isoformat()})")
+        else:
+            logger.info(f"🔖 체크포인트 없음: 최근 시간 범위로 수집")
+        return after_id
+    
+    def _save_checkpoint(self, channel_id: str, last_message_id: Optional[int]) -> None:
+        if last_message_id:
+            self.checkpoints.advance(channel_id, last_message_id)
+            logger.info(f"🔖 체크포인트 갱신: 채널 {channel_id} → 메시지 {last_message_id}")
+    
+    def collect_and_save(self, channel_id: str, hours: int = 1, pipelined: bool = False,
+                         incremental: bool = False, streamed: bool = False,
+                         partition: Optional[str] = None) -> None:
         """
         Complete workflow: export, parse, and save messages
         
         Args:
             channel_id: Discord channel ID
             hours: Number of hours to go back
+            pipelined: True면 내보내기/파싱/저장 단계를 겹쳐서 실행
+            incremental: True면 채널 체크포인트(마지막 저장 메시지) 이후만 수집하고,
+                         저장이 끝나면 체크포인트를 갱신 (체크포인트가 없으면 hours 범위)
+            streamed: True면 export 파일 대신 FIFO 로 CLI 출력을 받아 바로 파싱 (pipelined 포함)
+            partition: 지정하면 export 를 이 단위로 나눠서 완성된 파일부터 여러 프로세스로 파싱
         """
+        if partition:
+            return self.collect_and_save_partitioned(channel_id, hours, partition, incremental=incremental)
+        if pipelined or streamed:
+            return self.collect_and_save_pipelined(channel_id, hours, incremental=incremental, streamed=streamed)
+        
         total_start_time = time.time()
         logger.info(f"🚀 전체 작업 시작: 채널 {channel_id} (최근 {hours}시간)")
         
         try:
+            after_id = self._resume_point(channel_id) if incremental else None
+            
             # 1. Discord에서 메시지 내보내기
-            json_file = self.export_messages(channel_id, hours)
+            json_file = self.export_messages(channel_id, hours, after_id)
             
             # 2. JSON 파일 파싱
             messages = self.parse_discord_json(json_file)
@@ -201,6 +322,9 @@ class DiscordToSupabaseCollector:
             # 3. Supabase에 저장
             self.save_to_supabase(messages)
             
+            if incremental and messages:
+                self._save_checkpoint(channel_id, max(msg['id'] for msg in messages))
+            
             # 4. 임시 파일 정리 
             cleanup_start_time = time.time()
             logger.info(f"⏰ [STEP 4] 임시 파일 정리 시작")
@@ -222,6 +346,354 @@ class DiscordToSupabaseCollector:
             logger.error(f"❌ 작업 실패 (경과시간: {total_elapsed:.2f}초): {e}")
             raise
 
+    def collect_and_save_pipelined(self, channel_id: str, hours: int = 1, queue_size: int = 4,
+                                   incremental: bool = False, streamed: bool = False) -> None:
+        """
+        Pipelined workflow: export, parse and save stages run concurrently
+        
+        CLI 가 export 파일을 쓰는 동안 파서 스레드가 파일을 따라 읽으면서 배치를 만들고,
+        bounded queue 를 통해 업로드(현재 스레드)로 넘깁니다. 전체 소요시간이
+        단계별 시간의 합이 아니라 가장 느린 단계에 가까워집니다.
+        
+        streamed 이면 CLI 출력 경로를 FIFO 로 지정해서 export 가 디스크에 쓰이지 않고
+        파서로 바로 들어갑니다 (파일 쓰기/다시 읽기와 파일 tail polling 이 없어짐).
+        
+        Args:
+            channel_id: Discord channel ID
+            hours: Number of hours to go back
+            queue_size: 파서와 업로드 사이 큐에 쌓아둘 최대 배치 수
+            incremental: True면 채널 체크포인트 이후만 수집하고 끝나면 체크포인트 갱신
+            streamed: True면 export 파일 대신 FIFO 로 CLI 출력을 받음
+        """
+        total_start_time = time.time()
+        logger.info(f"🚀 파이프라인 작업 시작: 채널 {channel_id} (최근 {hours}시간)")
+        
+        timer = StageTimer()
+        batches = InstrumentedQueue(queue_size)
+        stop = threading.Event()
+        export_done = threading.Event()
+        parse_errors: List[Exception] = []
+        export_result: Dict[str, Any] = {}
+        counts = {'parsed': 0, 'saved': 0, 'max_id': 0}
+        # 배치 크기는 writer 의 bytes 예산(AIMD)을 따름
+        writer = open_writer(self.supabase)
+        
+        after_id = self._resume_point(channel_id) if incremental else None
+        if streamed:
+            reader = ExportPipe()
+            cmd, output_file = self._build_export_command(channel_id, hours, after_id, output_file=reader.path)
+        else:
+            cmd, output_file = self._build_export_command(channel_id, hours, after_id)
+            # 같은 초에 만든 이전 export 가 남아 있으면 파서가 그 파일을 읽으므로 먼저 지움
+            if os.path.exists(output_file):
+                os.remove(output_file)
+            reader = FollowFile(output_file, lambda: not export_done.is_set())
+        logger.info(f"⏰ [STEP 1] Discord 메시지 내보내기 시작 (파이프라인{', FIFO' if streamed else ''}): {output_file}")
+        timer.start('export')
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        
+        def run_export():
+            stdout, stderr = process.communicate()
+            timer.end('export')
+            export_result.update(returncode=process.returncode, stdout=stdout, stderr=stderr)
+            export_done.set()
+            if streamed:
+                reader.writer_exited()
+            logger.info(f"✅ [STEP 1] 내보내기 완료 (소요시간: {timer.elapsed('export'):.2f}초)")
+        
+        def run_parse():
+            timer.start('parse')
+            logger.info(f"⏰ [STEP 2] JSON 스트리밍 파싱 시작: {output_file}")
+            try:
+                with ExportStream(reader) as stream:
+                    columns = build_channel_columns(stream.channel, stream.guild)
+                    rows = (build_message_row(msg, columns) for msg in stream)
+                    for batch in writer.sizer.batches(rows):
+                        if not batches.put_checked(batch, stop):
+                            return
+                        counts['parsed'] += len(batch)
+                        counts['max_id'] = max(counts['max_id'], max(row['id'] for row in batch))
+            except Exception as e:
+                parse_errors.append(e)
+            finally:
+                reader.close()
+                timer.end('parse')
+                batches.put_checked(_PIPELINE_DONE, stop)
+            logger.info(f"✅ [STEP 2] 파싱 완료: {counts['parsed']}개 메시지 (소요시간: {timer.elapsed('parse'):.2f}초)")
+        
+        export_thread = threading.Thread(target=run_export, name=f"export-{channel_id}", daemon=True)
+        parse_thread = threading.Thread(target=run_parse, name=f"parse-{channel_id}", daemon=True)
+        export_thread.start()
+        parse_thread.start()
+        
+        timer.start('upload')
+        logger.info(f"⏰ [STEP 3] Supabase 저장 시작 (파이프라인)")
+        try:
+            while True:
+                batch = batches.get_timed()
+                if batch is _PIPELINE_DONE:
+                    break
+                writer.submit(batch)
+            writer.wait()
+            counts['saved'] = writer.rows_sent
+        except Exception as e:
+            stop.set()
+            process.kill()
+            logger.error(f"❌ [STEP 3] Supabase 저장 실패 (소요시간: {timer.elapsed('upload'):.2f}초): {e}")
+            raise
+        finally:
+            writer.close()
+            timer.end('upload')
+            parse_thread.join()
+            export_thread.join()
+        
+        total_elapsed = time.time() - total_start_time
+        if export_result.get('returncode'):
+            logger.error(f"❌ [STEP 1] DiscordChatExporter 실행 실패 (소요시간: {timer.elapsed('export'):.2f}초)")
+            logger.error(f"STDOUT: {export_result.get('stdout')}")
+            logger.error(f"STDERR: {export_result.get('stderr')}")
+            raise subprocess.CalledProcessError(
+                export_result['returncode'], cmd,
+                output=export_result.get('stdout'), stderr=export_result.get('stderr')
+            )
+        if parse_errors:
+            logger.error(f"❌ [STEP 2] JSON 파싱 실패 (경과시간: {total_elapsed:.2f}초): {parse_errors[0]}")
+            raise parse_errors[0]
+        
+        logger.info(f"✅ [STEP 3] 모든 메시지 저장 완료: {counts['saved']}개 (소요시간: {timer.elapsed('upload'):.2f}초)")
+        writer.log_summary()
+        if incremental:
+            self._save_checkpoint(channel_id, counts['max_id'])
+        if not streamed:
+            logger.info(f"✅ [STEP 4] 임시 파일 보존: {output_file}")
+        logger.info(f"🎉 파이프라인 작업 완료! (총 소요시간: {total_elapsed:.2f}초)")
+        
+        summary = timer.summary()
+        logger.info("=" * 50)
+        logger.info("📊 파이프라인 시간 요약:")
+        logger.info(f"  내보내기: {summary['export_seconds']:.2f}초 / 파싱: {summary['parse_seconds']:.2f}초 / 저장: {summary['upload_seconds']:.2f}초")
+        logger.info(f"  단계 합계: {summary['sum_of_stages_seconds']:.2f}초 → 실제 경과: {summary['wall_seconds']:.2f}초 (겹친 시간: {summary['overlap_seconds']:.2f}초)")
+        logger.info(f"  파서 → CLI 출력 대기{' (FIFO)' if streamed else ''}: {reader.wait_seconds:.2f}초")
+        logger.info(f"  파서 → 큐 가득참 대기: {batches.put_wait:.2f}초 ({batches.put_stalls}회, 최대 {batches.max_depth}/{queue_size} 배치)")
+        logger.info(f"  저장 → 큐 비어있음 대기: {batches.get_wait:.2f}초 ({batches.get_stalls}회)")
+        logger.info("=" * 50)
+
+    def collect_and_save_partitioned(self, channel_id: str, hours: int = 1, partition: str = '10000',
+                                     incremental: bool = False, workers: int = INGEST_WORKERS,
+                                     poll_interval: float = 0.2) -> Dict[str, Any]:
+        """
+        Partitioned workflow: --partition 으로 나뉜 export 파일을 완성되는 대로 병렬 파싱해서 저장
+        
+        CLI 는 파티션을 순서대로 쓰므로 N+1 번째 파일이 생기면(또는 CLI 가 끝나면) N 번째 파일은
+        완성된 것입니다. 완성된 파일은 프로세스 풀에서 파싱/row 변환하고, 결과는 파일 순서대로
+        하나의 UPSERT writer 로 넘깁니다. 긴 backfill 에서 단일 스레드 파싱이 병목이 되지 않습니다.
+        
+        Args:
+            channel_id: Discord channel ID
+            hours: Number of hours to go back
+            partition: 파티션 단위 (메시지 수 또는 '10mb' 같은 파일 크기)
+            incremental: True면 채널 체크포인트 이후만 수집하고 끝나면 체크포인트 갱신
+            workers: 파싱 프로세스 수
+            poll_interval: 새 파티션 파일 확인 간격 (초)
+        
+        Returns:
+            파티션 수, 메시지 수, 단계별 소요시간, UPSERT 통계
+        """
+        total_start_time = time.time()
+        logger.info(f"🚀 분할 수집 시작: 채널 {channel_id} (최근 {hours}시간, 파티션 {partition}, 파싱 프로세스 {workers}개)")
+        
+        after_id = self._resume_point(channel_id) if incremental else None
+        cmd, output_file = self._build_export_command(channel_id, hours, after_id, partition=partition)
+        logger.info(f"⏰ [STEP 1] Discord 메시지 내보내기 시작 (분할): {output_file}")
+        # 같은 초에 만든 이전 export 가 남아 있으면 완성된 파티션으로 오인하므로 먼저 지움
+        index = 0
+        while os.path.exists(partition_file_path(output_file, index)):
+            os.remove(partition_file_path(output_file, index))
+            index += 1
+        
+        export_done = threading.Event()
+        export_result: Dict[str, Any] = {}
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        
+        def run_export():
+            stdout, stderr = process.communicate()
+            export_result.update(returncode=process.returncode, stdout=stdout, stderr=stderr,
+                                 seconds=time.time() - total_start_time)
+            export_done.set()
+        
+        export_thread = threading.Thread(target=run_export, name=f"export-{channel_id}", daemon=True)
+        export_thread.start()
+        
+        counts = {'partitions': 0, 'parsed': 0, 'max_id': 0}
+        pending: deque = deque()
+        writer = open_writer(self.supabase)
+        # 수집기가 스레드(writer, uvicorn)를 가진 프로세스에서 실행되므로 fork 대신 spawn
+        pool = ProcessPoolExecutor(max_workers=max(1, workers), mp_context=multiprocessing.get_context('spawn'))
+        
+        def submit_rows(rows: List[Dict[str, Any]]) -> None:
+            counts['partitions'] += 1
+            counts['parsed'] += len(rows)
+            if rows:
+                counts['max_id'] = max(counts['max_id'], max(row['id'] for row in rows))
+            for batch in writer.sizer.batches(rows):
+                writer.submit(batch)
+        
+        try:
+            next_index = 0
+            while True:
+                # 종료 여부를 먼저 확인해야 종료 직전에 완성된 파티션을 놓치지 않습니다
+                exited = export_done.is_set()
+                while True:
+                    path = partition_file_path(output_file, next_index)
+                    complete = os.path.exists(partition_file_path(output_file, next_index + 1)) or exited
+                    if not (complete and os.path.exists(path)):
+                        break
+                    logger.info(f"📦 파티션 {next_index + 1} 완성 → 파싱: {path}")
+                    pending.append(pool.submit(read_export_rows, path))
+                    next_index += 1
+                # 파싱이 끝난 파티션은 파일 순서대로 저장 단계로
+                while pending and (pending[0].done() or exited):
+                    submit_rows(pending.popleft().result())
+                if exited and not pending:
+                    break
+                time.sleep(poll_interval)
+            writer.wait()
+        except Exception as e:
+            process.kill()
+            logger.error(f"❌ 분할 수집 실패 (경과시간: {time.time() - total_start_time:.2f}초): {e}")
+            raise
+        finally:
+            pool.shutdown(cancel_futures=True)
+            writer.close()
+            export_thread.join()
+        
+        if export_result.get('returncode'):
+            logger.error(f"❌ [STEP 1] DiscordChatExporter 실행 실패 (소요시간: {export_result['seconds']:.2f}초)")
+            logger.error(f"STDOUT: {export_result.get('stdout')}")
+            logger.error(f"STDERR: {export_result.get('stderr')}")
+            raise subprocess.CalledProcessError(
+                export_result['returncode'], cmd,
+                output=export_result.get('stdout'), stderr=export_result.get('stderr')
+            )
+        
+        writer.log_summary()
+        if incremental:
+            self._save_checkpoint(channel_id, counts['max_id'])
+        total_elapsed = time.time() - total_start_time
+        logger.info(f"✅ [STEP 4] 임시 파일 보존: {output_file} 외 {max(0, counts['partitions'] - 1)}개")
+        logger.info(f"🎉 분할 수집 완료! 파티션 {counts['partitions']}개, 메시지 {counts['parsed']}개 "
+                    f"(내보내기 {export_result['seconds']:.2f}초 / 총 {total_elapsed:.2f}초)")
+        return {
+            'channel_id': channel_id,
+            'partitions': counts['partitions'],
+            'messages_count': counts['parsed'],
+            'workers': workers,
+            'export_seconds': export_result['seconds'],
+            'elapsed_seconds': total_elapsed,
+            'upsert': writer.summary(),
+        }
+
+    def collect_channels_and_save(self, channel_ids: Optional[List[str]] = None, guild_id: Optional[str] = None,
+                                  hours: int = 1, incremental: bool = False, parallel: int = EXPORT_PARALLEL,
+                                  include_threads: bool = False) -> Dict[str, Any]:
+        """
+        Batch workflow: 여러 채널을 CLI 한 번으로 내보내고 채널 파일별로 저장
+
+        CLI 의 --after 는 하나뿐이므로 증분 수집 시 채널 체크포인트 중 가장 오래된 것부터 내보내고,
+        각 채널 파일에서 자기 체크포인트 이하 메시지는 건너뜁니다. 서버 전체(guild_id) 증분 수집은
+        채널 목록을 미리 알 수 없으므로 hours 범위로 내보낸 뒤 같은 방식으로 걸러냅니다.
+        체크포인트는 모든 저장이 끝난 뒤 성공한 채널만 갱신합니다.
+
+        Args:
+            channel_ids: 수집할 채널 ID 목록 (없으면 guild_id 서버 전체)
+            guild_id: 서버 ID
+            hours: Number of hours to go back
+            incremental: True면 채널별 체크포인트 이후만 저장하고 끝나면 체크포인트 갱신
+            parallel: CLI 안에서 동시에 내보낼 채널 수
+            include_threads: 서버 전체 수집 시 스레드 포함 여부
+
+        Returns:
+            채널별 결과(메시지 수, 오류), 내보내기/저장 소요시간, UPSERT 통계
+        """
+        total_start_time = time.time()
+        channel_ids = [str(c) for c in channel_ids] if channel_ids else None
+        target = f"채널 {len(channel_ids)}개" if channel_ids else f"서버 {guild_id}"
+        logger.info(f"🚀 일괄 작업 시작: {target} (최근 {hours}시간, 증분 {incremental})")
+
+        window_start = datetime.now() - timedelta(hours=hours)
+        # 채널별 저장 하한 (이 ID 이하 메시지는 이미 저장됨)
+        floors: Dict[str, int] = {}
+        after = window_start.isoformat()
+        if incremental and channel_ids:
+            window_id = datetime_to_snowflake(window_start)
+            floors = {cid: self._resume_point(cid) or window_id for cid in channel_ids}
+            after = str(min(floors.values()))
+
+        files = self.export_channels(channel_ids, guild_id, after, parallel, include_threads)
+        export_seconds = time.time() - total_start_time
+
+        parse_start_time = time.time()
+        logger.info(f"⏰ [STEP 2-3] 채널 파일 {len(files)}개 파싱 및 Supabase 저장 시작")
+        results: List[Dict[str, Any]] = []
+        writer = open_writer(self.supabase)
+        try:
+            for channel_id in (channel_ids or list(files)):
+                path = files.get(channel_id)
+                result = {'channel_id': channel_id, 'file': path, 'messages_saved': 0,
+                          'last_message_id': None, 'error': None}
+                results.append(result)
+                if path is None:
+                    result['error'] = "export 파일 없음"
+                    logger.error(f"❌ 채널 {channel_id}: export 파일이 없습니다")
+                    continue
+                if incremental and channel_id not in floors:
+                    floors[channel_id] = self.checkpoints.get(channel_id) or 0
+                floor = floors.get(channel_id, 0)
+                try:
+                    rows = (row for row in self.iter_discord_json(path) if row['id'] > floor)
+                    for batch in writer.sizer.batches(rows):
+                        writer.submit(batch)
+                        result['messages_saved'] += len(batch)
+                        result['last_message_id'] = max(result['last_message_id'] or 0,
+                                                        max(row['id'] for row in batch))
+                except (OSError, ValueError) as e:
+                    # 잘린 파일 등 채널 하나의 파싱 실패는 다른 채널 저장을 막지 않음
+                    result['error'] = str(e)
+                    logger.error(f"❌ 채널 {channel_id} 파싱 실패: {e}")
+            writer.wait()
+        except Exception as e:
+            logger.error(f"❌ [STEP 3] Supabase 저장 실패 (소요시간: {time.time() - parse_start_time:.2f}초): {e}")
+            raise
+        finally:
+            writer.close()
+        writer.log_summary()
+
+        if incremental:
+            for result in results:
+                if not result['error']:
+                    self._save_checkpoint(result['channel_id'], result['last_message_id'])
+
+        total_elapsed = time.time() - total_start_time
+        failed = [r for r in results if r['error']]
+        total = sum(r['messages_saved'] for r in results)
+        logger.info(f"🎉 일괄 작업 완료! 채널 {len(results)}개 (실패 {len(failed)}), 메시지 {total}개 "
+                    f"(내보내기 {export_seconds:.2f}초 / 저장 {time.time() - parse_start_time:.2f}초 / "
+                    f"총 {total_elapsed:.2f}초)")
+        return {
+            'status': 'success' if not failed else 'partial',
+            'guild_id': guild_id,
+            'hours': hours,
+            'incremental': incremental,
+            'parallel': parallel,
+            'channel_count': len(results),
+            'channels_failed': len(failed),
+            'messages_count': total,
+            'export_seconds': export_seconds,
+            'elapsed_seconds': total_elapsed,
+            'upsert': writer.summary(),
+            'channels': results,
+        }
+
 
 def main():
     """
@@ -230,7 +702,7 @@ def main():
     """
     
     # 환경변수에서 설정 로드
-    from config import SUPABASE_URL, SUPABASE_KEY, DISCORD_TOKEN, DEFAULT_CHANNEL_ID, COLLECTION_DAYS, COLLECTION_HOURS, validate_config
+    from config import SUPABASE_URL, SUPABASE_KEY, DISCORD_TOKEN, DEFAULT_CHANNEL_ID, COLLECTION_DAYS, COLLECTION_HOURS, COLLECTION_PIPELINED, COLLECTION_INCREMENTAL, COLLECTION_STREAMED, COLLECTION_PARTITION, COLLECTION_CHANNEL_IDS, validate_config
     
     # 설정 검증
     try:
@@ -248,8 +720,20 @@ def main():
         discord_token=DISCORD_TOKEN
     )
     
+    # 여러 채널이 설정되어 있으면 CLI 한 번으로 일괄 수집
+    if COLLECTION_CHANNEL_IDS:
+        collector.collect_channels_and_save(channel_ids=COLLECTION_CHANNEL_IDS, hours=COLLECTION_HOURS,
+                                            incremental=COLLECTION_INCREMENTAL)
+        drain_staging(collector.supabase)
+        return
+    
     # 메시지 수집 및 저장 (환경변수에서 설정된 기간)
-    collector.collect_and_save(channel_id=CHANNEL_ID, hours=COLLECTION_HOURS)
+    collector.collect_and_save(channel_id=CHANNEL_ID, hours=COLLECTION_HOURS, pipelined=COLLECTION_PIPELINED,
+                               incremental=COLLECTION_INCREMENTAL, streamed=COLLECTION_STREAMED,
+                               partition=COLLECTION_PARTITION or None)
+    
+    # staging 을 쓰는 경우 종료 전에 남은 row 를 Supabase 로 보냄
+    drain_staging(collector.supabase)
 
 
 if __name__ == "__main__":
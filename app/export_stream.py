@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+DiscordChatExporter JSON 스트리밍 파서
+내보내기 파일 전체를 메모리에 올리지 않고 messages 배열을 한 개씩 읽어들이는 모듈
+"""
+
+import codecs
+import json
+import os
+import select
+import shutil
+import tempfile
+import threading
+import time
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, TextIO, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# 한 번에 읽어들일 문자 수
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+# FIFO 스트리밍 시 파이프 버퍼 크기 (Linux 기본 pipe-max-size 가 1MB)
+EXPORT_PIPE_SIZE = int(os.getenv('EXPORT_PIPE_SIZE', 1 << 20))
+
+_WHITESPACE = ' \t\n\r'
+
+
+class ExportStream:
+    """
+    DiscordChatExporter JSON export incremental reader
+
+    `guild`, `channel` 등 messages 앞에 오는 키는 순회 시작 전에 한 번만 읽어서
+    `header` 에 보관하고, messages 배열의 원소는 하나씩 yield 합니다.
+    messages 뒤에 오는 키(`messageCount`)는 순회가 끝난 뒤 `header` 에 추가됩니다.
+    """
+
+    def __init__(self, source: Union[str, TextIO], chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Args:
+            source: JSON 파일 경로 또는 텍스트 모드 파일 객체
+            chunk_size: 한 번에 읽을 문자 수
+        """
+        if isinstance(source, str):
+            self._fp = open(source, 'r', encoding='utf-8')
+            self._owns_fp = True
+        else:
+            self._fp = source
+            self._owns_fp = False
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+        self._in_messages = False
+        self._consumed = False
+        self.header: Dict[str, Any] = {}
+        self.messages_read = 0
+
+        self._read_header()
+
+    @property
+    def guild(self) -> Dict[str, Any]:
+        return self.header.get('guild') or {}
+
+    @property
+    def channel(self) -> Dict[str, Any]:
+        return self.header.get('channel') or {}
+
+    def close(self) -> None:
+        if self._owns_fp:
+            self._fp.close()
+
+    def __enter__(self) -> 'ExportStream':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        if self._consumed:
+            raise RuntimeError("ExportStream can only be iterated once")
+        self._consumed = True
+        if not self._in_messages:
+            return
+
+        if self._peek() == ']':
+            self._pos += 1
+        else:
+            while True:
+                yield self._decode_value()
+                self.messages_read += 1
+                sep = self._next_char()
+                if sep == ']':
+                    break
+                if sep != ',':
+                    self._fail("',' or ']' expected in messages array")
+
+        self._in_messages = False
+        self._read_members(after_messages=True)
+
+    # ------------------------------------------------------------------
+    # 내부 구현
+    # ------------------------------------------------------------------
+
+    def _fill(self) -> bool:
+        """버퍼에 chunk 하나를 더 읽어옵니다. 더 읽을 게 없으면 False"""
+        if self._eof:
+            return False
+        chunk = self._fp.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        # 이미 소비한 앞부분은 버려서 버퍼가 계속 커지지 않게 합니다
+        if self._pos:
+            self._buf = self._buf[self._pos:] + chunk
+            self._pos = 0
+        else:
+            self._buf += chunk
+        return True
+
+    def _peek(self) -> str:
+        """공백을 건너뛴 다음 문자를 소비하지 않고 반환합니다 (EOF면 '')"""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ''
+
+    def _next_char(self) -> str:
+        ch = self._peek()
+        if ch:
+            self._pos += 1
+        return ch
+
+    def _decode_value(self) -> Any:
+        """버퍼 위치에서 JSON 값 하나를 디코딩합니다. 값이 잘려 있으면 더 읽어서 재시도"""
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # 숫자/리터럴은 chunk 경계에서 잘려도 디코딩에 성공하므로 구분자를 확인합니다
+            if end == len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def _read_members(self, after_messages: bool = False) -> None:
+        """최상위 객체의 key/value 를 messages 배열 직전(또는 끝)까지 읽습니다"""
+        expect_comma = after_messages
+        while True:
+            ch = self._peek()
+            if ch == '}':
+                self._pos += 1
+                return
+            if expect_comma:
+                if ch != ',':
+                    self._fail("',' or '}' expected")
+                self._pos += 1
+                self._peek()
+            key = self._decode_value()
+            if not isinstance(key, str):
+                self._fail("object key expected")
+            if self._next_char() != ':':
+                self._fail("':' expected")
+            if key == 'messages' and self._peek() == '[':
+                self._pos += 1
+                self._in_messages = True
+                return
+            self.header[key] = self._decode_value()
+            expect_comma = True
+
+    def _read_header(self) -> None:
+        if self._next_char() != '{':
+            self._fail("export must be a JSON object")
+        self._read_members()
+
+    def _fail(self, reason: str) -> None:
+        context = self._buf[self._pos:self._pos + 40]
+        raise ValueError(f"Invalid DiscordChatExporter JSON: {reason} (near {context!r})")
+
+
+class FollowFile:
+    """
+    아직 쓰여지고 있는 파일을 tail 하면서 읽는 텍스트 reader
+
+    DiscordChatExporter 는 export 파일을 진행하면서 조금씩 기록하므로, 프로세스가
+    끝나기 전에도 앞부분을 읽을 수 있습니다. EOF 에 도달해도 writer 가 살아 있으면
+    기다렸다가 다시 읽고, writer 가 종료된 뒤 남은 내용을 다 읽으면 ''를 반환합니다.
+    """
+
+    def __init__(self, path: str, is_writing: Callable[[], bool], poll_interval: float = 0.05):
+        """
+        Args:
+            path: 읽을 파일 경로 (아직 생성되지 않았어도 됨)
+            is_writing: writer 가 아직 쓰는 중인지 반환하는 함수
+            poll_interval: EOF 에서 다시 읽기까지 대기 시간 (초)
+        """
+        self._path = path
+        self._is_writing = is_writing
+        self._poll_interval = poll_interval
+        self._fp: Optional[BinaryIO] = None
+        # 텍스트 모드로 읽으면 writer 가 아직 다 쓰지 않은 멀티바이트 문자에서 UnicodeDecodeError 가
+        # 나므로, bytes 로 읽고 잘린 문자는 다음 read 까지 남겨 둡니다
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self.wait_seconds = 0.0
+
+    def _open(self) -> bool:
+        if self._fp is None and os.path.exists(self._path):
+            self._fp = open(self._path, 'rb')
+        return self._fp is not None
+
+    def read(self, size: int = -1) -> str:
+        while True:
+            # 읽기 전에 writer 상태를 확인해야 종료 직전에 기록된 내용을 놓치지 않습니다
+            writing = self._is_writing()
+            if self._open():
+                text = self._decoder.decode(self._fp.read(size))
+                if text:
+                    return text
+            if not writing:
+                return self._decoder.decode(b'', final=True)
+            time.sleep(self._poll_interval)
+            self.wait_seconds += self._poll_interval
+
+    def close(self) -> None:
+        if self._fp is not None:
+            self._fp.close()
+
+
+class ExportPipe:
+    """
+    FIFO(named pipe) 로 export 를 받는 텍스트 reader
+
+    CLI 의 --output 에 `path` 를 넘기면 CLI 가 쓰는 내용이 디스크에 저장되지 않고 바로
+    이 reader 로 들어옵니다. 파이프 버퍼가 가득 차면 CLI 쓰기가 막히므로 파서가 느릴 때
+    CLI 도 자연스럽게 속도를 맞춥니다 (backpressure).
+
+    writer 가 FIFO 를 닫아도 다시 열 수 있으므로, `writer_exited()` 가 호출된 뒤에
+    남은 내용을 다 읽어야 ''(EOF) 를 반환합니다.
+    """
+
+    def __init__(self, directory: Optional[str] = None, poll_interval: float = 0.05,
+                 pipe_size: int = EXPORT_PIPE_SIZE):
+        """
+        Args:
+            directory: FIFO 를 만들 디렉터리 (기본: 새 임시 디렉터리)
+            poll_interval: writer 가 아직 FIFO 를 열지 않았을 때 다시 확인하기까지 대기 시간 (초)
+            pipe_size: 파이프 버퍼 크기 (Linux 만 적용, 기본 64KB 는 CLI 가 너무 자주 막힘)
+        """
+        self._dir = tempfile.mkdtemp(prefix='export_pipe_', dir=directory)
+        self.path = os.path.join(self._dir, 'export.json')
+        os.mkfifo(self.path)
+        # 읽는 쪽을 먼저 열어 두면 writer 의 open 이 막히지 않고,
+        # writer 가 FIFO 를 열지 못하고 끝나도 reader 가 open 에서 멈추지 않음
+        self._fd = os.open(self.path, os.O_RDONLY | os.O_NONBLOCK)
+        self.pipe_size = _grow_pipe(self._fd, pipe_size)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._poll_interval = poll_interval
+        self._writer_done = threading.Event()
+        self.wait_seconds = 0.0
+
+    def read(self, size: int = -1) -> str:
+        size = max(size, self.pipe_size)
+        while True:
+            # 읽기 전에 writer 상태를 확인해야 종료 직전에 기록된 내용을 놓치지 않습니다
+            done = self._writer_done.is_set()
+            start = time.perf_counter()
+            ready, _, _ = select.select([self._fd], [], [], self._poll_interval)
+            try:
+                data = os.read(self._fd, size) if ready else None
+            except BlockingIOError:
+                data = None
+            if data:
+                text = self._decoder.decode(data)
+                self.wait_seconds += time.perf_counter() - start
+                if text:
+                    return text
+                continue
+            if done:
+                # writer 가 FIFO 를 열지 않고 끝났으면 select 가 계속 timeout 이므로 여기서도 EOF
+                return self._decoder.decode(b'', final=True)
+            if data == b'':
+                # writer 가 닫고 종료하는 중 (또는 다시 열기 전)
+                time.sleep(self._poll_interval)
+            self.wait_seconds += time.perf_counter() - start
+
+    def writer_exited(self) -> None:
+        """writer 프로세스가 끝났음을 알립니다 (이후 파이프가 비면 EOF)"""
+        self._writer_done.set()
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+
+def _grow_pipe(fd: int, size: int) -> int:
+    """파이프 버퍼를 size 까지 키우고 실제 크기를 반환합니다 (지원하지 않으면 기본 크기)"""
+    set_size = getattr(fcntl, 'F_SETPIPE_SZ', None) if fcntl else None
+    if set_size is None:
+        return DEFAULT_CHUNK_SIZE
+    try:
+        return fcntl.fcntl(fd, set_size, size)
+    except OSError:
+        # pipe-max-size 보다 크면 실패하므로 기본 크기 사용
+        return fcntl.fcntl(fd, fcntl.F_GETPIPE_SZ)
+
+
+def partition_file_path(base_path: str, index: int) -> str:
+    """
+    --partition 으로 나뉜 export 의 index 번째(0부터) 파일 경로
+
+    DiscordChatExporter 는 첫 파일은 그대로, 이후 파일은 `이름 [part N].json` 으로 씁니다.
+    """
+    if index <= 0:
+        return base_path
+    stem, ext = os.path.splitext(base_path)
+    return f"{stem} [part {index + 1}]{ext}"
+
+
+def read_export_rows(json_file: str) -> List[Dict[str, Any]]:
+    """
+    export 파일 하나를 파싱해서 Supabase row 리스트로 변환 (프로세스 풀 작업 함수)
+    """
+    with ExportStream(json_file) as stream:
+        columns = build_channel_columns(stream.channel, stream.guild)
+        return [build_message_row(msg, columns) for msg in stream]
+
+
+def iter_export_messages(source: Union[str, TextIO], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Export 파일에서 메시지를 하나씩 yield 하는 간편 함수
+
+    Args:
+        source: JSON 파일 경로 또는 텍스트 모드 파일 객체
+        chunk_size: 한 번에 읽을 문자 수
+    """
+    with ExportStream(source, chunk_size) as stream:
+        yield from stream
+
+
+def build_message_row(msg: Dict[str, Any], channel_columns: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    DiscordChatExporter 메시지 하나를 discord_messages 테이블 row 로 변환
+
+    Args:
+        msg: export 의 messages 원소
+        channel_columns: `build_channel_columns` 결과 (채널마다 한 번만 계산)
+
+    Returns:
+        Supabase upsert 용 row dictionary
+    """
+    author = msg['author']
+    reference = msg.get('reference') or {}
+    return {
+        'id': int(msg['id']),
+        'channel_id': channel_columns['channel_id'],
+        'channel_name': channel_columns['channel_name'],
+        'server_id': channel_columns['server_id'],
+        'server_name': channel_columns['server_name'],
+        'author_id': int(author['id']),
+        'author_name': author['name'],
+        'author_discriminator': author.get('discriminator', ''),
+        'author_avatar': author.get('avatarUrl', ''),
+        'content': msg.get('content', ''),
+        'timestamp': msg['timestamp'],
+        'message_type': msg.get('type', 'Default'),
+        'is_pinned': msg.get('isPinned', False),
+        'reference_message_id': int(reference['messageId']) if reference.get('messageId') else None,
+        'attachments': json.dumps(msg.get('attachments', [])),
+        'embeds': json.dumps(msg.get('embeds', [])),
+        'reactions': json.dumps(msg.get('reactions', [])),
+        'mentions': json.dumps(msg.get('mentions', []))
+    }
+
+
+def build_channel_columns(channel_info: Dict[str, Any], guild_info: Dict[str, Any]) -> Dict[str, Any]:
+    """채널/서버 정보에서 나오는, 모든 row 에 공통인 컬럼"""
+    return {
+        'channel_id': int(channel_info.get('id', 0)),
+        'channel_name': channel_info.get('name', ''),
+        'server_id': int(guild_info.get('id', 0)) if guild_info.get('id') else None,
+        'server_name': guild_info.get('name', ''),
+    }
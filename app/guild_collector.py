@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+서버(길드) 전체 동시 수집
+서버 ID 또는 채널 목록을 받아 여러 채널을 동시에 REST API 로 수집하고 Supabase 에 저장하는 모듈
+
+- 서버 정보와 채널 목록은 한 번만 가져옵니다.
+- 채널 수집은 최대 concurrency 개가 동시에 진행되고, 모든 요청은 프로세스 공용
+  rate-limit 상태(route bucket + global 초당 한도)를 나눠 씁니다.
+- 페이지를 받는 대로 UPSERT writer 에 넘기므로 다음 페이지 요청과 저장이 겹쳐서 진행됩니다.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from discord_paginator import MessagePaginator
+from discord_rest import AsyncDiscordClient
+from metadata_cache import MetadataCache, shared_metadata_cache
+from supabase_writer import SupabaseBatchWriter, estimate_row_bytes
+
+logger = logging.getLogger(__name__)
+
+# 동시에 수집할 채널 수
+GUILD_CHANNEL_CONCURRENCY = int(os.getenv('GUILD_CHANNEL_CONCURRENCY', 8))
+
+# 메시지를 수집할 채널 타입 (GUILD_TEXT, GUILD_ANNOUNCEMENT)
+TEXT_CHANNEL_TYPES = (0, 5)
+
+FormatRows = Callable[[List[Dict[str, Any]], Dict[str, Any], Dict[str, Any]], List[Dict[str, Any]]]
+
+
+class GuildCollector:
+    """
+    여러 채널 동시 수집기
+
+    사용 예:
+        async with AsyncDiscordClient(token) as client:
+            collector = GuildCollector(client, writer, format_rows)
+            result = await collector.collect(guild_id='123', hours=6)
+    """
+
+    def __init__(self, client: AsyncDiscordClient, writer: SupabaseBatchWriter, format_rows: FormatRows,
+                 checkpoints: Any = None, concurrency: Optional[int] = None,
+                 metadata: Optional[MetadataCache] = None):
+        """
+        Args:
+            client: 비동기 Discord REST 클라이언트
+            writer: UPSERT writer (모든 채널이 공유)
+            format_rows: (messages, channel_info, guild_info) → Supabase row 변환 함수
+            checkpoints: 증분 수집 체크포인트 저장소 (incremental 수집 시 필요)
+            concurrency: 동시에 수집할 채널 수 (기본: GUILD_CHANNEL_CONCURRENCY)
+            metadata: 채널/서버 정보 캐시 (기본: 프로세스 공용)
+        """
+        self.client = client
+        self.writer = writer
+        self.format_rows = format_rows
+        self.checkpoints = checkpoints
+        self.concurrency = max(1, concurrency or GUILD_CHANNEL_CONCURRENCY)
+        self.metadata = metadata or shared_metadata_cache()
+
+    async def _get_guild(self, guild_id: str) -> Dict[str, Any]:
+        return await self.metadata.aget(f"guild:{guild_id}", lambda: self.client.get_guild(guild_id))
+
+    async def _get_channel(self, channel_id: str) -> Dict[str, Any]:
+        return await self.metadata.aget(f"channel:{channel_id}", lambda: self.client.get_channel(channel_id))
+
+    async def resolve_channels(self, guild_id: Optional[str] = None,
+                               channel_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        서버 정보와 수집할 채널 목록을 한 번에 가져옵니다.
+
+        guild_id 가 있으면 서버의 텍스트 채널 전체 (channel_ids 가 있으면 그 중 일부),
+        없으면 channel_ids 각각의 채널 정보와 첫 채널이 속한 서버 정보를 가져옵니다.
+
+        Returns:
+            {'guild': 서버 정보, 'channels': 채널 정보 리스트}
+        """
+        if not guild_id and not channel_ids:
+            raise ValueError("guild_id 또는 channel_ids 가 필요합니다")
+
+        wanted = {str(c) for c in channel_ids} if channel_ids else None
+        if guild_id:
+            # 채널 목록은 채널 추가/삭제를 바로 반영하도록 캐시하지 않음
+            guild, channels = await asyncio.gather(self._get_guild(guild_id),
+                                                   self.client.get_guild_channels(guild_id))
+            channels = [c for c in channels if c.get('type') in TEXT_CHANNEL_TYPES]
+            if wanted is not None:
+                channels = [c for c in channels if c['id'] in wanted]
+        else:
+            channels = list(await asyncio.gather(*(self._get_channel(c) for c in channel_ids)))
+            guild_ids = {c.get('guild_id') for c in channels if c.get('guild_id')}
+            if len(guild_ids) > 1:
+                logger.warning(f"⚠️ 채널들이 서로 다른 서버에 속해 있습니다: {sorted(guild_ids)}")
+            guild = await self._get_guild(guild_ids.pop()) if guild_ids else {}
+
+        channels.sort(key=lambda c: (c.get('position', 0), c['id']))
+        return {'guild': guild, 'channels': channels}
+
+    async def collect(self, guild_id: Optional[str] = None, channel_ids: Optional[List[str]] = None,
+                      hours: float = 1, incremental: bool = False) -> Dict[str, Any]:
+        """
+        채널들을 동시에 수집해서 저장합니다.
+
+        채널 하나가 실패해도 나머지는 계속 수집하고, 실패한 채널은 결과에 error 로 남깁니다.
+        체크포인트는 모든 저장이 끝난 뒤 성공한 채널만 갱신합니다.
+
+        Returns:
+            서버 정보, 채널별 결과(메시지 수, 페이지 수, 소요시간), 전체 처리량, rate-limit/UPSERT 통계
+        """
+        start = time.perf_counter()
+        resolved = await self.resolve_channels(guild_id, channel_ids)
+        guild = resolved['guild']
+        channels = resolved['channels']
+        logger.info(f"🚀 서버 동시 수집 시작: {guild.get('name', guild_id or '')} "
+                    f"채널 {len(channels)}개 (동시 {self.concurrency}, 최근 {hours}시간, 증분 {incremental})")
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(channel: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._collect_channel(channel, guild, hours, incremental)
+
+        results = await asyncio.gather(*(run(c) for c in channels))
+
+        # 모든 배치 저장이 끝난 뒤에만 체크포인트 갱신
+        await asyncio.to_thread(self.writer.wait)
+        if incremental and self.checkpoints is not None:
+            for result in results:
+                if result['status'] == 'success' and result['last_message_id']:
+                    await asyncio.to_thread(self.checkpoints.advance, result['channel_id'],
+                                            int(result['last_message_id']))
+
+        elapsed = time.perf_counter() - start
+        total = sum(r['messages_fetched'] for r in results)
+        failed = [r for r in results if r['status'] != 'success']
+        summary = {
+            'status': 'success' if not failed else 'partial',
+            'guild_id': str(guild.get('id') or guild_id or ''),
+            'server_name': guild.get('name', ''),
+            'hours': hours,
+            'incremental': incremental,
+            'concurrency': self.concurrency,
+            'channel_count': len(channels),
+            'channels_failed': len(failed),
+            'messages_fetched': total,
+            'messages_saved': self.writer.rows_sent,
+            'elapsed_seconds': elapsed,
+            'messages_per_second': total / elapsed if elapsed else 0.0,
+            'requests_sent': self.client.requests_sent,
+            'rate_limit': self.client.buckets.summary(),
+            'upsert': self.writer.summary(),
+            'channels': results,
+        }
+        logger.info(f"✅ 서버 동시 수집 완료: 채널 {len(channels)}개 (실패 {len(failed)}), 메시지 {total}개, "
+                    f"{elapsed:.2f}초, {summary['messages_per_second']:.0f} msg/s, 요청 {self.client.requests_sent}회")
+        return summary
+
+    async def _collect_channel(self, channel: Dict[str, Any], guild: Dict[str, Any],
+                               hours: float, incremental: bool) -> Dict[str, Any]:
+        channel_id = channel['id']
+        start = time.perf_counter()
+        after_id = None
+        if incremental and self.checkpoints is not None:
+            after_id = await asyncio.to_thread(self.checkpoints.get, channel_id)
+
+        paginator = MessagePaginator.for_window(hours=hours, after_id=after_id)
+        fetched = 0
+        last_message_id = after_id
+        pending: List[Dict[str, Any]] = []
+        pending_bytes = 0
+        error = None
+        try:
+            while not paginator.done:
+                page = paginator.feed(await self.client.get_messages(channel_id, paginator.params()))
+                if not page:
+                    continue
+                rows = self.format_rows(page, channel, guild)
+                fetched += len(rows)
+                last_message_id = max(last_message_id or 0, max(row['id'] for row in rows))
+                pending.extend(rows)
+                pending_bytes += sum(estimate_row_bytes(row) for row in rows)
+                # 배치 예산만큼 모이면 writer 에 넘김 (전송은 writer 스레드에서, 여기서는 다음 페이지 요청)
+                if pending_bytes >= self.writer.sizer.budget:
+                    await self._submit(pending)
+                    pending, pending_bytes = [], 0
+            if pending:
+                await self._submit(pending)
+        except Exception as e:
+            error = str(e)
+            logger.error(f"❌ 채널 {channel.get('name', channel_id)} 수집 실패: {e}")
+
+        return {
+            'status': 'error' if error else 'success',
+            'channel_id': channel_id,
+            'channel_name': channel.get('name', ''),
+            'messages_fetched': fetched,
+            'pages': paginator.pages_fetched,
+            'seconds': time.perf_counter() - start,
+            'resumed_after': str(after_id) if after_id else None,
+            'last_message_id': str(last_message_id) if last_message_id else None,
+            'error': error,
+        }
+
+    async def _submit(self, rows: List[Dict[str, Any]]) -> None:
+        for batch in self.writer.sizer.batches(rows):
+            # writer.submit 은 전송 중인 배치가 가득 차면 막히므로 이벤트 루프 밖에서 호출
+            await asyncio.to_thread(self.writer.submit, batch)
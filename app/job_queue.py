@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+수집 작업 큐 + 워커 풀
+API 서버가 받은 수집 요청을 고유 ID 의 작업으로 기록하고, 정해진 수의 워커 스레드가
+이벤트 루프 밖에서 실행하도록 하는 모듈
+
+- 작업 ID 는 시각 + 난수라서 같은 초에 들어온 요청끼리도 겹치지 않습니다.
+- 동시에 실행하는 작업 수(JOB_WORKERS)와 대기 작업 수(JOB_QUEUE_MAX)를 제한해서,
+  요청이 몰려도 CLI 프로세스와 메모리가 무한정 늘지 않습니다. 대기열이 가득 차면 QueueFullError.
+- 작업 상태는 SQLite(JOB_STORE_PATH)에 저장해서 서버를 재시작해도 조회할 수 있고,
+  재시작 전에 끝나지 못한 작업은 'interrupted' 로 표시합니다.
+- 끝난 작업 기록은 JOB_RETENTION_HOURS 가 지나거나 JOB_MAX_RECORDS 개를 넘으면 오래된 것부터 지웁니다.
+
+워커는 스레드입니다. 수집 작업의 무거운 부분(CLI 실행, 분할 파싱)은 이미 별도 프로세스에서 돌고
+나머지는 대부분 I/O 대기라서 프로세스 풀을 쓸 이유가 없습니다.
+"""
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 동시에 실행할 수집 작업 수
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+# 실행을 기다리는 작업 수 상한 (넘으면 새 요청 거절)
+JOB_QUEUE_MAX = int(os.getenv('JOB_QUEUE_MAX', 100))
+# 작업 상태 SQLite 파일 경로 (':memory:' 면 재시작 시 사라짐)
+JOB_STORE_PATH = os.getenv('JOB_STORE_PATH', 'collect_jobs.sqlite')
+# 끝난 작업 기록 보관 시간 (시간, 0 이면 시간으로는 지우지 않음)
+JOB_RETENTION_HOURS = float(os.getenv('JOB_RETENTION_HOURS', 24))
+# 끝난 작업 기록 최대 개수 (0 이면 개수로는 지우지 않음)
+JOB_MAX_RECORDS = int(os.getenv('JOB_MAX_RECORDS', 1000))
+
+ACTIVE_STATUSES = ('queued', 'running')
+FINISHED_STATUSES = ('completed', 'partial', 'failed', 'interrupted')
+
+# 작업이 끝날 때마다 정리하면 낭비이므로 최소 간격을 둠 (초)
+_EVICT_INTERVAL = 60
+
+
+class QueueFullError(Exception):
+    """대기 중인 작업이 JOB_QUEUE_MAX 에 도달함"""
+
+
+def new_job_id(kind: str) -> str:
+    """읽기 쉬운 시각 접두어 + 충돌하지 않는 난수 (예: task_20250101_120000_3f9a0c1d2b4e)"""
+    return f"{kind}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:12]}"
+
+
+class JobStore:
+    """SQLite 기반 작업 상태 저장소 (스레드 공용)"""
+
+    def __init__(self, path: str = JOB_STORE_PATH):
+        """
+        Args:
+            path: SQLite 파일 경로 (':memory:' 가능)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL,"
+            " created_at REAL NOT NULL, finished_at REAL, data TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_finished_at ON jobs (finished_at)")
+        self._conn.commit()
+        self._interrupt_leftovers()
+
+    def _interrupt_leftovers(self) -> None:
+        """이전 프로세스에서 끝나지 못한 작업은 다시 실행되지 않으므로 'interrupted' 로 표시"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, data FROM jobs WHERE status IN ({','.join('?' * len(ACTIVE_STATUSES))})",
+                ACTIVE_STATUSES).fetchall()
+            now = time.time()
+            for job_id, data in rows:
+                record = json.loads(data)
+                record.update({'status': 'interrupted', 'error': '서버 재시작으로 중단됨',
+                               'end_time': datetime.now().isoformat()})
+                self._conn.execute("UPDATE jobs SET status = ?, finished_at = ?, data = ? WHERE id = ?",
+                                   ('interrupted', now, json.dumps(record, ensure_ascii=False, default=str), job_id))
+            self._conn.commit()
+        if rows:
+            logger.warning(f"⚠️ 재시작 전에 끝나지 않은 작업 {len(rows)}개를 interrupted 로 표시")
+
+    def create(self, job_id: str, kind: str, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, status, created_at, data) VALUES (?, ?, ?, ?, ?)",
+                (job_id, kind, record['status'], time.time(), json.dumps(record, ensure_ascii=False, default=str)))
+            self._conn.commit()
+
+    def update(self, job_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        """작업 기록에 fields 를 합치고 갱신된 기록을 반환합니다 (없으면 None)."""
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            record = json.loads(row[0])
+            record.update(fields)
+            status = record['status']
+            finished_at = time.time() if status in FINISHED_STATUSES else None
+            self._conn.execute("UPDATE jobs SET status = ?, finished_at = ?, data = ? WHERE id = ?",
+                               (status, finished_at, json.dumps(record, ensure_ascii=False, default=str), job_id))
+            self._conn.commit()
+        return record
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def list(self, status: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """최근 작업부터 최대 limit 개"""
+        with self._lock:
+            if status:
+                rows = self._conn.execute(
+                    "SELECT id, data FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?",
+                    (status, limit)).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT id, data FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [{'task_id': job_id, **json.loads(data)} for job_id, data in rows]
+
+    def evict(self, retention_seconds: float, max_records: int) -> int:
+        """
+        끝난 작업 중 retention_seconds 보다 오래됐거나 최근 max_records 개 밖인 기록을 지웁니다.
+        실행 중이거나 대기 중인 작업은 지우지 않습니다.
+
+        Returns:
+            지운 기록 수
+        """
+        deleted = 0
+        with self._lock:
+            if retention_seconds > 0:
+                deleted += self._conn.execute(
+                    "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+                    (time.time() - retention_seconds,)).rowcount
+            if max_records > 0:
+                deleted += self._conn.execute(
+                    "DELETE FROM jobs WHERE finished_at IS NOT NULL AND id NOT IN ("
+                    " SELECT id FROM jobs WHERE finished_at IS NOT NULL ORDER BY finished_at DESC LIMIT ?)",
+                    (max_records,)).rowcount
+            self._conn.commit()
+        if deleted:
+            logger.info(f"🧹 작업 기록 정리: 끝난 작업 {deleted}개 삭제")
+        return deleted
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class JobQueue:
+    """
+    제한된 워커 스레드로 작업을 실행하는 큐
+
+    사용 예:
+        jobs = JobQueue(JobStore('collect_jobs.sqlite'), workers=2)
+        task_id, future = jobs.submit('task', run, {'channel_id': '123'})
+        jobs.store.get(task_id)   # 상태 조회
+        await asyncio.wrap_future(future)   # 결과가 필요하면 기다림
+
+    run 은 작업 기록에 합칠 dict 를 반환합니다. 'status' 를 넣으면 'completed' 대신 그 값으로 끝납니다.
+    """
+
+    def __init__(self, store: JobStore, workers: int = JOB_WORKERS, max_queued: int = JOB_QUEUE_MAX,
+                 retention_hours: float = JOB_RETENTION_HOURS, max_records: int = JOB_MAX_RECORDS):
+        """
+        Args:
+            store: 작업 상태 저장소
+            workers: 동시에 실행할 작업 수
+            max_queued: 실행을 기다릴 수 있는 작업 수 (넘으면 submit 이 QueueFullError)
+            retention_hours: 끝난 작업 기록 보관 시간
+            max_records: 끝난 작업 기록 최대 개수
+        """
+        self.store = store
+        self.workers = max(1, workers)
+        self.max_queued = max(1, max_queued)
+        self.retention_seconds = retention_hours * 3600
+        self.max_records = max_records
+        self._queue: "queue.Queue[Optional[Tuple[str, Callable[[], Any], Future]]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._queued = 0
+        self._running = 0
+        self._last_evict = 0.0
+        self._closed = False
+
+    def submit(self, kind: str, run: Callable[[], Optional[Dict[str, Any]]],
+               params: Optional[Dict[str, Any]] = None) -> Tuple[str, Future]:
+        """
+        작업을 대기열에 넣고 (작업 ID, Future) 를 반환합니다.
+
+        Raises:
+            QueueFullError: 대기 중인 작업이 max_queued 개
+            RuntimeError: shutdown 이후 호출
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("작업 큐가 종료되었습니다")
+            if self._queued >= self.max_queued:
+                raise QueueFullError(f"대기 중인 작업이 {self._queued}개로 가득 찼습니다")
+            self._queued += 1
+            self._ensure_workers()
+
+        job_id = new_job_id(kind)
+        self.store.create(job_id, kind, {
+            'status': 'queued',
+            **(params or {}),
+            'queued_time': datetime.now().isoformat(),
+            'messages_count': 0,
+        })
+        future: Future = Future()
+        self._queue.put((job_id, run, future))
+        self._maybe_evict()
+        return job_id, future
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'running': self._running,
+                'queued': self._queued,
+                'max_queued': self.max_queued,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """새 작업을 막고 워커를 멈춥니다. 대기 중이던 작업은 'interrupted' 로 남습니다."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            threads = list(self._threads)
+        for _ in threads:
+            self._queue.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def _ensure_workers(self) -> None:
+        # 첫 작업이 들어올 때 워커를 띄움 (import 만 하는 경우 스레드를 만들지 않음)
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._worker, name=f'job-worker-{len(self._threads)}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _worker(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            job_id, run, future = item
+            with self._lock:
+                self._queued -= 1
+                closed = self._closed
+                if not closed:
+                    self._running += 1
+            if closed:
+                future.cancel()
+                self.store.update(job_id, status='interrupted', error='서버 종료로 실행되지 않음',
+                                  end_time=datetime.now().isoformat())
+                continue
+            try:
+                self._execute(job_id, run, future)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                self._maybe_evict()
+
+    def _execute(self, job_id: str, run: Callable[[], Any], future: Future) -> None:
+        if not future.set_running_or_notify_cancel():
+            self.store.update(job_id, status='interrupted', end_time=datetime.now().isoformat())
+            return
+        start = datetime.now()
+        self.store.update(job_id, status='running', start_time=start.isoformat())
+        try:
+            result = run() or {}
+        except Exception as e:
+            end = datetime.now()
+            logger.error(f"❌ 작업 실패 {job_id}: {e}")
+            self.store.update(job_id, status='failed', error=str(e), end_time=end.isoformat(),
+                              execution_time=str(end - start))
+            future.set_exception(e)
+            return
+        end = datetime.now()
+        fields = {'status': 'completed', **result, 'end_time': end.isoformat(), 'execution_time': str(end - start)}
+        future.set_result(self.store.update(job_id, **fields))
+
+    def _maybe_evict(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_evict < _EVICT_INTERVAL:
+                return
+            self._last_evict = now
+        try:
+            self.store.evict(self.retention_seconds, self.max_records)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ 작업 기록 정리 실패: {e}")
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+채널/서버 메타데이터 캐시
+거의 바뀌지 않는 채널 정보와 서버 정보를 TTL + LRU 로 캐시하는 모듈
+
+- 메모리(프로세스) 캐시: 최대 max_entries 개, 오래 안 쓴 항목부터 제거
+- 디스크 캐시(선택): METADATA_CACHE_PATH 를 지정하면 JSON 파일에도 저장해서
+  서버리스 cold start 때도 캐시를 이어서 사용 (예: Vercel 의 /tmp)
+- refresh-ahead: TTL 의 refresh_ahead 비율이 지난 항목은 캐시 값을 바로 돌려주고
+  백그라운드에서 새로 가져오므로, 자주 쓰는 항목은 요청 경로에서 기다리지 않습니다.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from checkpoints import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+METADATA_CACHE_TTL = float(os.getenv('METADATA_CACHE_TTL', 3600))
+METADATA_CACHE_MAX_ENTRIES = int(os.getenv('METADATA_CACHE_MAX_ENTRIES', 1024))
+METADATA_CACHE_PATH = os.getenv('METADATA_CACHE_PATH', '')
+METADATA_REFRESH_AHEAD = float(os.getenv('METADATA_REFRESH_AHEAD', 0.8))
+
+
+class MetadataCache:
+    """
+    TTL + LRU 메타데이터 캐시 (스레드/코루틴 공용)
+
+    사용 예:
+        cache = MetadataCache(ttl=3600)
+        channel = cache.get(f"channel:{channel_id}", lambda: client.get_channel(channel_id))
+        guild = await cache.aget(f"guild:{guild_id}", lambda: async_client.get_guild(guild_id))
+    """
+
+    def __init__(self, ttl: float = METADATA_CACHE_TTL, max_entries: int = METADATA_CACHE_MAX_ENTRIES,
+                 disk_path: Optional[str] = None, refresh_ahead: float = METADATA_REFRESH_AHEAD,
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            ttl: 항목 유효 시간 (초)
+            max_entries: 메모리에 둘 최대 항목 수
+            disk_path: 디스크 캐시 JSON 경로 (None 이면 메모리만)
+            refresh_ahead: TTL 의 이 비율이 지나면 백그라운드 갱신 (1 이상이면 끔)
+            clock: 현재 시각 함수 (디스크 캐시와 공유하므로 wall-clock)
+        """
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.disk_path = disk_path
+        self.refresh_ahead = refresh_ahead
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, Tuple[Any, float]]' = OrderedDict()
+        self._disk: Optional[Dict[str, Any]] = None
+        self._refreshing: Set[str] = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.refreshes = 0
+        self.evictions = 0
+
+    # ------------------------------------------------------------------
+    # public API
+    # ------------------------------------------------------------------
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        """
+        캐시 값 반환. 없거나 만료됐으면 loader() 로 가져와서 저장합니다.
+
+        loader 가 실패하면 예외를 그대로 올립니다 (빈 값은 캐시하지 않음).
+        """
+        value, state = self._lookup(key)
+        if state == 'fresh':
+            return value
+        if state == 'refresh':
+            self._refresh_in_thread(key, loader)
+            return value
+        return self._store(key, loader())
+
+    async def aget(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """get 의 비동기 버전 (loader 는 coroutine 을 반환하는 함수)"""
+        value, state = self._lookup(key)
+        if state == 'fresh':
+            return value
+        if state == 'refresh':
+            self._refresh_in_task(key, loader)
+            return value
+        return self._store(key, await loader())
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            if self._disk is not None and self._disk.pop(key, None) is not None:
+                self._save_disk()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'disk_hits': self.disk_hits,
+            'refreshes': self.refreshes,
+            'evictions': self.evictions,
+        }
+
+    # ------------------------------------------------------------------
+    # 내부 구현
+    # ------------------------------------------------------------------
+
+    def _lookup(self, key: str) -> Tuple[Any, str]:
+        """
+        Returns:
+            (값, 상태) - 상태는 'fresh' / 'refresh'(값은 유효, 백그라운드 갱신 필요) / 'miss'
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._load_from_disk(key)
+            if entry is None:
+                self.misses += 1
+                return None, 'miss'
+            value, fetched_at = entry
+            age = self._clock() - fetched_at
+            if age >= self.ttl:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None, 'miss'
+            self._entries.move_to_end(key)
+            self.hits += 1
+            if age >= self.ttl * self.refresh_ahead and key not in self._refreshing:
+                self._refreshing.add(key)
+                return value, 'refresh'
+            return value, 'fresh'
+
+    def _store(self, key: str, value: Any) -> Any:
+        if not value:
+            return value
+        with self._lock:
+            fetched_at = self._clock()
+            self._put(key, (value, fetched_at))
+            if self.disk_path:
+                self._ensure_disk()[key] = {'value': value, 'fetched_at': fetched_at}
+                self._save_disk()
+        return value
+
+    def _put(self, key: str, entry: Tuple[Any, float]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _refresh_in_thread(self, key: str, loader: Callable[[], Any]) -> None:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='metadata-refresh')
+        self._executor.submit(self._refresh, key, loader)
+
+    def _refresh(self, key: str, loader: Callable[[], Any]) -> None:
+        try:
+            self._store(key, loader())
+            self.refreshes += 1
+        except Exception as e:
+            logger.warning(f"⚠️ 메타데이터 백그라운드 갱신 실패 ({key}): {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _refresh_in_task(self, key: str, loader: Callable[[], Awaitable[Any]]) -> None:
+        async def refresh():
+            try:
+                self._store(key, await loader())
+                self.refreshes += 1
+            except Exception as e:
+                logger.warning(f"⚠️ 메타데이터 백그라운드 갱신 실패 ({key}): {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        task = asyncio.get_running_loop().create_task(refresh())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _ensure_disk(self) -> Dict[str, Any]:
+        if self._disk is None:
+            try:
+                with open(self.disk_path, 'r', encoding='utf-8') as f:
+                    self._disk = json.load(f)
+            except FileNotFoundError:
+                self._disk = {}
+            except (OSError, ValueError) as e:
+                logger.warning(f"메타데이터 캐시 파일을 읽을 수 없습니다 ({self.disk_path}): {e}")
+                self._disk = {}
+        return self._disk
+
+    def _load_from_disk(self, key: str) -> Optional[Tuple[Any, float]]:
+        if not self.disk_path:
+            return None
+        item = self._ensure_disk().get(key)
+        if item is None:
+            return None
+        entry = (item['value'], item['fetched_at'])
+        self._put(key, entry)
+        self.disk_hits += 1
+        return entry
+
+    def _save_disk(self) -> None:
+        # 만료된 항목은 정리해서 파일이 계속 커지지 않도록 함
+        now = self._clock()
+        self._disk = {k: v for k, v in self._disk.items() if now - v['fetched_at'] < self.ttl}
+        try:
+            write_json_atomic(self.disk_path, self._disk)
+        except OSError as e:
+            logger.warning(f"메타데이터 캐시 파일을 쓸 수 없습니다 ({self.disk_path}): {e}")
+
+
+_shared_cache: Optional[MetadataCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def shared_metadata_cache() -> MetadataCache:
+    """프로세스 공용 메타데이터 캐시 (METADATA_CACHE_* 환경변수 설정 사용)"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = MetadataCache(disk_path=METADATA_CACHE_PATH or None)
+        return _shared_cache
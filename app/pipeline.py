@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+수집 파이프라인 유틸리티
+단계 사이의 bounded queue 와 단계별 시간 측정(작업/대기/겹침)을 제공하는 모듈
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Dict, Optional
+
+# 이 시간보다 오래 막히면 stall 로 집계합니다 (초)
+STALL_THRESHOLD = 0.005
+
+
+class InstrumentedQueue(queue.Queue):
+    """
+    put/get 에서 막힌 시간을 기록하는 bounded queue
+
+    - put_wait: 생산자가 큐가 가득 차서 기다린 시간 (소비자가 병목)
+    - get_wait: 소비자가 큐가 비어서 기다린 시간 (생산자가 병목)
+    """
+
+    def __init__(self, maxsize: int):
+        super().__init__(maxsize)
+        self.put_wait = 0.0
+        self.get_wait = 0.0
+        self.put_stalls = 0
+        self.get_stalls = 0
+        self.max_depth = 0
+
+    def put_checked(self, item: Any, stop: threading.Event, poll: float = 0.1) -> bool:
+        """
+        stop 이벤트를 확인하면서 put 합니다.
+
+        Returns:
+            put 성공 여부 (stop 이 먼저 설정되면 False)
+        """
+        start = time.perf_counter()
+        try:
+            while not stop.is_set():
+                try:
+                    self.put(item, timeout=poll)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            waited = time.perf_counter() - start
+            self.put_wait += waited
+            if waited > STALL_THRESHOLD:
+                self.put_stalls += 1
+            self.max_depth = max(self.max_depth, self.qsize())
+
+    def get_timed(self) -> Any:
+        start = time.perf_counter()
+        item = self.get()
+        waited = time.perf_counter() - start
+        self.get_wait += waited
+        if waited > STALL_THRESHOLD:
+            self.get_stalls += 1
+        return item
+
+
+class StageTimer:
+    """파이프라인 단계별 시작/종료 시각을 기록하고 겹침(overlap)을 계산"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.perf_counter()
+        self.stages: Dict[str, Dict[str, Optional[float]]] = {}
+
+    def start(self, name: str) -> None:
+        with self._lock:
+            self.stages[name] = {'start': time.perf_counter(), 'end': None}
+
+    def end(self, name: str) -> None:
+        with self._lock:
+            self.stages[name]['end'] = time.perf_counter()
+
+    def elapsed(self, name: str) -> float:
+        stage = self.stages.get(name)
+        if not stage or stage['start'] is None:
+            return 0.0
+        end = stage['end'] if stage['end'] is not None else time.perf_counter()
+        return end - stage['start']
+
+    def wall(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Returns:
+            단계별 소요시간, 전체 wall-clock, 단계 합계, 겹친 시간(합계 - wall)
+        """
+        elapsed = {name: self.elapsed(name) for name in self.stages}
+        wall = self.wall()
+        total = sum(elapsed.values())
+        return {
+            **{f"{name}_seconds": value for name, value in elapsed.items()},
+            'wall_seconds': wall,
+            'sum_of_stages_seconds': total,
+            'overlap_seconds': max(0.0, total - wall),
+        }
+
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+UPSERT 변경 감지 캐시
+마지막으로 저장한 row 의 digest 를 메시지 ID 별로 SQLite 에 보관해서, 내용이 그대로인 row 는
+UPSERT 를 건너뛰게 하는 모듈
+
+- 수집 범위가 겹치면 같은 메시지를 매번 다시 UPSERT 하게 되는데, 대부분은 바뀐 게 없어서
+  PostgREST 전송량, WAL, 인덱스 갱신만 늘어납니다.
+- digest 는 저장할 row 전체(내용, 반응, 임베드, 첨부, 고정 여부 등)로 계산하므로
+  row 의 어떤 컬럼이 바뀌어도 다시 저장됩니다.
+- digest 는 배치가 실제로 저장된 뒤에만 기록하므로, 실패한 배치의 row 는 다음 실행 때 다시 보냅니다.
+- Supabase 쪽에서 row 를 직접 지우거나 고치면 캐시가 그 사실을 모르므로, 그때는 캐시 파일을
+  지우거나 clear() 를 호출해야 합니다.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from discord_snowflake import datetime_to_snowflake
+
+logger = logging.getLogger(__name__)
+
+# SQLite 파일 경로 (비어 있으면 캐시 사용 안 함)
+ROW_DIGEST_CACHE_PATH = os.getenv('ROW_DIGEST_CACHE_PATH', '')
+# 이보다 오래된 메시지의 digest 는 지움 (일, 0 이면 보관)
+ROW_DIGEST_RETENTION_DAYS = float(os.getenv('ROW_DIGEST_RETENTION_DAYS', 30))
+
+# SQLite 한 쿼리의 최대 변수 수(구버전 999)보다 작게
+_QUERY_CHUNK = 500
+
+
+def row_digest(row: Dict[str, Any]) -> int:
+    """row 전체의 64bit digest (SQLite INTEGER 에 맞게 signed)"""
+    payload = json.dumps(row, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return int.from_bytes(hashlib.blake2b(payload.encode('utf-8'), digest_size=8).digest(), 'big', signed=True)
+
+
+class RowDigestCache:
+    """
+    (테이블, 메시지 ID) → 마지막 저장 row digest 캐시 (스레드 공용)
+
+    사용 예:
+        cache = RowDigestCache('row_digests.sqlite')
+        changed = cache.changed('discord_messages', rows)   # 새 row 또는 바뀐 row 만
+        ...  # changed 저장
+        cache.remember('discord_messages', changed)
+    """
+
+    def __init__(self, path: str, retention_days: float = ROW_DIGEST_RETENTION_DAYS, key: str = 'id'):
+        """
+        Args:
+            path: SQLite 파일 경로 (':memory:' 가능)
+            retention_days: 이보다 오래된 메시지(snowflake 기준)의 digest 는 열 때 정리 (0 이면 보관)
+            key: row 의 기본 키 컬럼 (정수)
+        """
+        self.path = path
+        self.key = key
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS row_digests ("
+            " tbl TEXT NOT NULL, id INTEGER NOT NULL, digest INTEGER NOT NULL,"
+            " PRIMARY KEY (tbl, id)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+        self.rows_checked = 0
+        self.rows_skipped = 0
+        self.errors = 0
+
+        if retention_days > 0:
+            self.prune(datetime_to_snowflake(datetime.now() - timedelta(days=retention_days)))
+
+    def changed(self, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        rows 중 캐시에 없거나 digest 가 다른 row 만 반환합니다.
+
+        캐시를 읽지 못하면 (디스크 오류 등) rows 를 그대로 반환해서 저장을 막지 않습니다.
+        """
+        keyed = [(row, row.get(self.key)) for row in rows]
+        ids = [message_id for _, message_id in keyed if isinstance(message_id, int)]
+        try:
+            stored = self._lookup(table, ids)
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"⚠️ 변경 감지 캐시 조회 실패, 전체 저장: {e}")
+            return rows
+
+        changed = [row for row, message_id in keyed
+                   if message_id not in stored or stored[message_id] != row_digest(row)]
+        with self._lock:
+            self.rows_checked += len(rows)
+            self.rows_skipped += len(rows) - len(changed)
+        return changed
+
+    def remember(self, table: str, rows: Iterable[Dict[str, Any]]) -> None:
+        """저장이 끝난 rows 의 digest 를 기록합니다."""
+        values = [(table, row[self.key], row_digest(row)) for row in rows
+                  if isinstance(row.get(self.key), int)]
+        if not values:
+            return
+        try:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT INTO row_digests (tbl, id, digest) VALUES (?, ?, ?) "
+                    "ON CONFLICT (tbl, id) DO UPDATE SET digest = excluded.digest", values)
+                self._conn.commit()
+        except sqlite3.Error as e:
+            # 기록에 실패해도 다음 실행에서 다시 저장될 뿐이므로 경고만 남김
+            self.errors += 1
+            logger.warning(f"⚠️ 변경 감지 캐시 기록 실패: {e}")
+
+    def prune(self, before_id: int) -> int:
+        """before_id 보다 오래된 메시지의 digest 를 지우고 지운 개수를 반환합니다."""
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM row_digests WHERE id < ?", (before_id,)).rowcount
+            self._conn.commit()
+        if deleted:
+            logger.info(f"🧹 변경 감지 캐시 정리: 오래된 digest {deleted}개 삭제")
+        return deleted
+
+    def clear(self, table: Optional[str] = None) -> None:
+        with self._lock:
+            if table:
+                self._conn.execute("DELETE FROM row_digests WHERE tbl = ?", (table,))
+            else:
+                self._conn.execute("DELETE FROM row_digests")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'rows_checked': self.rows_checked,
+            'rows_skipped': self.rows_skipped,
+            'skip_ratio': self.rows_skipped / self.rows_checked if self.rows_checked else 0.0,
+            'errors': self.errors,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _lookup(self, table: str, ids: List[int]) -> Dict[int, int]:
+        stored: Dict[int, int] = {}
+        with self._lock:
+            for i in range(0, len(ids), _QUERY_CHUNK):
+                chunk = ids[i:i + _QUERY_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                stored.update(self._conn.execute(
+                    f"SELECT id, digest FROM row_digests WHERE tbl = ? AND id IN ({placeholders})",
+                    [table, *chunk]).fetchall())
+        return stored
+
+
+_shared_cache: Optional[RowDigestCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def shared_row_digests() -> Optional[RowDigestCache]:
+    """프로세스 공용 변경 감지 캐시 (ROW_DIGEST_CACHE_PATH 가 비어 있으면 None)"""
+    global _shared_cache
+    if not ROW_DIGEST_CACHE_PATH:
+        return None
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            try:
+                _shared_cache = RowDigestCache(ROW_DIGEST_CACHE_PATH)
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ 변경 감지 캐시를 열 수 없습니다 ({ROW_DIGEST_CACHE_PATH}): {e}")
+                return None
+        return _shared_cache
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+로컬 staging 저장소 + 백그라운드 flusher
+수집한 row 를 먼저 로컬 SQLite(WAL)에 기록하고, 별도 스레드가 Supabase 로 옮기는 모듈
+
+- 수집기는 로컬 디스크에 기록되는 즉시 다음 작업으로 넘어가므로, 수집 시간이 DB 응답 시간에
+  묶이지 않고 Supabase 장애 때도 Discord 에서 받은 데이터를 잃지 않습니다.
+- flusher 는 오래된 row 부터 큰 묶음으로 꺼내 SupabaseBatchWriter 로 UPSERT 하고,
+  저장이 확인된 row 만 staging 에서 지웁니다. 실패하면 지수 backoff 로 계속 재시도합니다.
+- 같은 메시지가 flush 전에 다시 기록되면 최신 row 하나만 남습니다.
+- 프로세스가 죽어도 staging 파일에 남은 row 는 다음 실행의 flusher 가 이어서 보냅니다.
+
+STAGING_DB_PATH 를 지정하면 사용합니다. 서버리스처럼 디스크가 인스턴스와 함께 사라지는
+환경에서는 의미가 없으므로 기본값은 사용 안 함입니다.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from supabase_writer import AdaptiveBatchSizer, SupabaseBatchWriter, _percentile, shared_sizer
+
+logger = logging.getLogger(__name__)
+
+# staging SQLite 파일 경로 (비어 있으면 staging 없이 바로 UPSERT)
+STAGING_DB_PATH = os.getenv('STAGING_DB_PATH', '')
+# flusher 가 한 번에 꺼내서 보낼 최대 row 수
+STAGING_FLUSH_ROWS = int(os.getenv('STAGING_FLUSH_ROWS', 5000))
+# 새 row 가 없을 때 staging 을 다시 확인하는 간격 (초)
+STAGING_FLUSH_INTERVAL = float(os.getenv('STAGING_FLUSH_INTERVAL', 1.0))
+# 연속 실패 시 최대 재시도 간격 (초)
+STAGING_MAX_BACKOFF = float(os.getenv('STAGING_MAX_BACKOFF', 300))
+# 단발성 실행(main)이 끝나기 전에 staging 을 비우며 기다릴 최대 시간 (초)
+STAGING_DRAIN_TIMEOUT = float(os.getenv('STAGING_DRAIN_TIMEOUT', 60))
+
+# SQLite 한 쿼리의 최대 변수 수(구버전 999)보다 작게
+_QUERY_CHUNK = 500
+
+
+class StagingStore:
+    """
+    staging row 저장소 (스레드 공용)
+
+    row 는 (테이블, id) 당 하나만 남고, 다시 기록하면 새 순번(seq)을 받습니다.
+    그래서 flush 중에 같은 메시지가 새로 기록되어도 ack 는 보낸 버전만 지웁니다.
+    """
+
+    def __init__(self, path: str, key: str = 'id'):
+        """
+        Args:
+            path: SQLite 파일 경로
+            key: row 의 기본 키 컬럼
+        """
+        self.path = path
+        self.key = key
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # commit 이 끝나면 전원이 나가도 남아 있어야 하므로 FULL
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS staged_rows ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " tbl TEXT NOT NULL, id INTEGER, payload TEXT NOT NULL, staged_at REAL NOT NULL,"
+            " UNIQUE (tbl, id))"
+        )
+        self._conn.commit()
+
+    def stage(self, table: str, rows: Iterable[Dict[str, Any]]) -> int:
+        """rows 를 기록하고 (commit 까지) 기록한 개수를 반환합니다."""
+        now = time.time()
+        values = [(table, row.get(self.key), json.dumps(row, ensure_ascii=False, default=str), now)
+                  for row in rows]
+        with self._lock:
+            # REPLACE 는 기존 row 를 지우고 새 seq 로 넣으므로 flush 중인 이전 버전과 구분됨
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO staged_rows (tbl, id, payload, staged_at) VALUES (?, ?, ?, ?)", values)
+            self._conn.commit()
+        return len(values)
+
+    def peek(self, limit: int) -> List[Tuple[int, str, Dict[str, Any]]]:
+        """가장 오래된 row 부터 최대 limit 개를 (seq, 테이블, row) 로 반환합니다 (지우지 않음)."""
+        with self._lock:
+            records = self._conn.execute(
+                "SELECT seq, tbl, payload FROM staged_rows ORDER BY seq LIMIT ?", (limit,)).fetchall()
+        return [(seq, table, json.loads(payload)) for seq, table, payload in records]
+
+    def ack(self, seqs: List[int]) -> None:
+        """저장이 확인된 row 를 지웁니다."""
+        with self._lock:
+            for i in range(0, len(seqs), _QUERY_CHUNK):
+                chunk = seqs[i:i + _QUERY_CHUNK]
+                self._conn.execute(f"DELETE FROM staged_rows WHERE seq IN ({','.join('?' * len(chunk))})", chunk)
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending, oldest = self._conn.execute("SELECT COUNT(*), MIN(staged_at) FROM staged_rows").fetchone()
+        return {
+            'pending_rows': pending,
+            'oldest_age_seconds': time.time() - oldest if oldest else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class StagingFlusher:
+    """
+    staging → Supabase 백그라운드 flusher
+
+    사용 예:
+        flusher = StagingFlusher(store, client)
+        flusher.start()
+        ...
+        flusher.notify()            # 새 row 기록 후 (바로 flush 시작)
+        flusher.drain(timeout=60)   # 종료 전 남은 row 보내기
+    """
+
+    def __init__(self, store: StagingStore, client: Any, flush_rows: int = STAGING_FLUSH_ROWS,
+                 interval: float = STAGING_FLUSH_INTERVAL, max_backoff: float = STAGING_MAX_BACKOFF):
+        """
+        Args:
+            store: staging 저장소
+            client: Supabase client
+            flush_rows: 한 번에 꺼내서 보낼 최대 row 수
+            interval: 새 row 가 없을 때 다시 확인하는 간격 (초)
+            max_backoff: 연속 실패 시 최대 재시도 간격 (초)
+        """
+        self.store = store
+        self.client = client
+        self.flush_rows = max(1, flush_rows)
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+        self.rows_flushed = 0
+        self.flushes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_error: Optional[str] = None
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='staging-flusher', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    def flush_once(self) -> int:
+        """
+        staging 에서 최대 flush_rows 개를 꺼내 저장하고 지웁니다.
+
+        Returns:
+            저장한 row 수
+
+        Raises:
+            UPSERT 실패 예외 (staging 의 row 는 그대로 남음)
+        """
+        with self._flush_lock:
+            records = self.store.peek(self.flush_rows)
+            if not records:
+                return 0
+            by_table: Dict[str, List[Tuple[int, Dict[str, Any]]]] = {}
+            for seq, table, row in records:
+                by_table.setdefault(table, []).append((seq, row))
+            for table, items in by_table.items():
+                with SupabaseBatchWriter(self.client, table=table) as writer:
+                    writer.write_all(row for _, row in items)
+                self.store.ack([seq for seq, _ in items])
+            self.rows_flushed += len(records)
+            self.flushes += 1
+            return len(records)
+
+    def drain(self, timeout: float = STAGING_DRAIN_TIMEOUT) -> bool:
+        """
+        staging 이 빌 때까지 (또는 timeout 까지) 보냅니다.
+
+        Returns:
+            모두 보냈으면 True (실패하거나 시간이 다 되면 False, 남은 row 는 다음 실행에서 보냄)
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                if self.flush_once() == 0:
+                    return True
+            except Exception as e:
+                self._record_failure(e)
+                return False
+        return self.store.stats()['pending_rows'] == 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.store.stats(),
+            'rows_flushed': self.rows_flushed,
+            'flushes': self.flushes,
+            'failures': self.failures,
+            'consecutive_failures': self.consecutive_failures,
+            'last_error': self.last_error,
+        }
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                # 꽉 찬 묶음이면 더 남아 있을 수 있으므로 바로 이어서 보냄
+                while self.flush_once() == self.flush_rows and not self._stop.is_set():
+                    pass
+                self.consecutive_failures = 0
+            except Exception as e:
+                self._record_failure(e)
+                delay = min(self.max_backoff, self.interval * (2 ** self.consecutive_failures))
+                logger.warning(f"⚠️ staging flush 실패 ({self.consecutive_failures}회 연속), "
+                               f"{delay:.1f}초 후 재시도: {e}")
+                # backoff 중에는 새 row 알림(notify)으로 깨지 않아야 장애 중인 DB 를 계속 두드리지 않음
+                self._stop.wait(delay)
+                continue
+            self._wake.wait(timeout=self.interval)
+            self._wake.clear()
+
+    def _record_failure(self, error: Exception) -> None:
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_error = str(error)
+
+
+class StagingWriter:
+    """
+    SupabaseBatchWriter 와 같은 인터페이스로 staging 에 기록하는 writer
+
+    submit 한 배치는 로컬에 commit 되면 완료된 future 가 되므로, 수집기의 체크포인트/backfill
+    커서는 "staging 에 안전하게 기록됨" 을 기준으로 진행합니다. 실제 UPSERT 는 flusher 가 합니다.
+    """
+
+    def __init__(self, store: StagingStore, flusher: StagingFlusher, table: str = 'discord_messages',
+                 sizer: Optional[AdaptiveBatchSizer] = None):
+        self.store = store
+        self.flusher = flusher
+        self.table = table
+        self.sizer = sizer or shared_sizer(table)
+        self.max_in_flight = 1
+        self._lock = threading.Lock()
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+
+        self.batches_sent = 0
+        self.rows_sent = 0
+        self.retries = 0
+        self.latencies: List[float] = []
+
+    def submit(self, batch: List[Dict[str, Any]]) -> Future:
+        if self._started_at is None:
+            self._started_at = time.perf_counter()
+        start = time.perf_counter()
+        future: Future = Future()
+        try:
+            staged = self.store.stage(self.table, batch)
+        except sqlite3.Error as e:
+            logger.error(f"  ❌ staging 기록 실패: {e}")
+            raise
+        with self._lock:
+            self.batches_sent += 1
+            self.rows_sent += staged
+            self.latencies.append(time.perf_counter() - start)
+        self.flusher.notify()
+        future.set_result(None)
+        return future
+
+    def write_all(self, rows: Iterable[Dict[str, Any]], batch_size: Optional[int] = None) -> int:
+        if batch_size:
+            rows = list(rows)
+            batches = (rows[i:i + batch_size] for i in range(0, len(rows), batch_size))
+        else:
+            batches = self.sizer.batches(rows)
+        for batch in batches:
+            self.submit(batch)
+        self.wait()
+        return self.rows_sent
+
+    def wait(self) -> None:
+        self._finished_at = time.perf_counter()
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> 'StagingWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def summary(self) -> Dict[str, Any]:
+        end = self._finished_at or time.perf_counter()
+        elapsed = end - self._started_at if self._started_at else 0.0
+        latencies = sorted(self.latencies)
+        return {
+            'batches': self.batches_sent,
+            'rows': self.rows_sent,
+            'rows_skipped': 0,
+            'skip_ratio': 0.0,
+            'retries': 0,
+            'max_in_flight': self.max_in_flight,
+            'batch_bytes_budget': self.sizer.budget,
+            'elapsed_seconds': elapsed,
+            'rows_per_second': self.rows_sent / elapsed if elapsed else 0.0,
+            'latency_avg': sum(latencies) / len(latencies) if latencies else 0.0,
+            'latency_p50': _percentile(latencies, 0.50),
+            'latency_p95': _percentile(latencies, 0.95),
+            'latency_max': latencies[-1] if latencies else 0.0,
+            'staged': True,
+            'staging': self.flusher.stats(),
+        }
+
+    def log_summary(self) -> None:
+        s = self.summary()
+        staging = s['staging']
+        logger.info(
+            f"  📥 staging 기록: {s['rows']}개 / {s['batches']}배치, {s['rows_per_second']:.0f} rows/s "
+            f"(대기 중 {staging['pending_rows']}개, Supabase 로 보낸 row {staging['rows_flushed']}개, "
+            f"flush 실패 {staging['failures']}회)"
+        )
+
+
+_shared_staging: Optional[Tuple[StagingStore, StagingFlusher]] = None
+_shared_staging_lock = threading.Lock()
+
+
+def shared_staging(client: Any) -> Optional[Tuple[StagingStore, StagingFlusher]]:
+    """
+    프로세스 공용 staging 저장소와 (시작된) flusher. STAGING_DB_PATH 가 비어 있으면 None
+
+    flusher 는 처음 호출한 client 로 Supabase 에 보냅니다.
+    """
+    global _shared_staging
+    if not STAGING_DB_PATH:
+        return None
+    with _shared_staging_lock:
+        if _shared_staging is None:
+            store = StagingStore(STAGING_DB_PATH)
+            flusher = StagingFlusher(store, client)
+            flusher.start()
+            pending = store.stats()['pending_rows']
+            if pending:
+                logger.info(f"📥 이전 실행에서 남은 staging row {pending}개를 이어서 보냅니다")
+            _shared_staging = (store, flusher)
+        return _shared_staging
+
+
+def open_writer(client: Any, table: str = 'discord_messages', **writer_options):
+    """
+    수집기용 writer: STAGING_DB_PATH 가 있으면 StagingWriter, 없으면 SupabaseBatchWriter
+    """
+    staging = shared_staging(client)
+    if staging is None:
+        return SupabaseBatchWriter(client, table=table, **writer_options)
+    store, flusher = staging
+    return StagingWriter(store, flusher, table=table, sizer=writer_options.get('sizer'))
+
+
+def drain_staging(client: Any, timeout: float = STAGING_DRAIN_TIMEOUT) -> bool:
+    """
+    단발성 실행이 끝나기 전에 staging 을 비웁니다 (staging 을 쓰지 않으면 바로 True).
+    """
+    staging = shared_staging(client)
+    if staging is None:
+        return True
+    store, flusher = staging
+    if flusher.drain(timeout):
+        logger.info("✅ staging 의 row 를 모두 Supabase 에 저장했습니다")
+        return True
+    logger.warning(f"⚠️ staging 에 {store.stats()['pending_rows']}개 row 가 남았습니다 (다음 실행에서 이어서 저장)")
+    return False
@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+Supabase 배치 UPSERT writer
+여러 배치를 동시에 전송(bounded in-flight)하고, 실패한 배치는 재시도하는 모듈
+배치 크기는 row 수가 아니라 payload bytes 예산으로 정하고, 응답 시간과 오류에 따라
+AIMD(additive increase / multiplicative decrease) 방식으로 예산을 조절합니다.
+
+discord_messages 는 id 기준 UPSERT 이므로 같은 배치를 여러 번 보내도 결과가 같습니다.
+그래서 네트워크 오류나 일시적인 서버 오류가 난 배치는 그대로 다시 보내면 됩니다.
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from row_digests import RowDigestCache, shared_row_digests
+
+logger = logging.getLogger(__name__)
+
+# 동시에 전송 중일 수 있는 최대 배치 수
+DEFAULT_MAX_IN_FLIGHT = int(os.getenv('SUPABASE_UPSERT_CONCURRENCY', 4))
+# 배치당 최대 재시도 횟수
+DEFAULT_MAX_RETRIES = int(os.getenv('SUPABASE_UPSERT_RETRIES', 3))
+
+# 배치 payload 예산 (bytes)
+DEFAULT_BATCH_BYTES = int(os.getenv('SUPABASE_BATCH_BYTES', 256 * 1024))
+MIN_BATCH_BYTES = int(os.getenv('SUPABASE_BATCH_MIN_BYTES', 16 * 1024))
+MAX_BATCH_BYTES = int(os.getenv('SUPABASE_BATCH_MAX_BYTES', 2 * 1024 * 1024))
+# 예산과 상관없이 한 배치에 넣을 최대 row 수
+MAX_BATCH_ROWS = int(os.getenv('SUPABASE_BATCH_MAX_ROWS', 1000))
+# 이보다 느린 응답은 과부하 신호로 보고 예산을 줄입니다 (초)
+TARGET_BATCH_LATENCY = float(os.getenv('SUPABASE_BATCH_TARGET_LATENCY', 2.0))
+
+# 재시도해도 결과가 바뀌지 않는 PostgreSQL/PostgREST 오류 코드 접두사
+# (22: data exception, 23: integrity constraint violation, 42: syntax/권한, PGRST1: 잘못된 요청)
+_NON_RETRYABLE_CODE_PREFIXES = ('22', '23', '42', 'PGRST1')
+
+
+def is_retryable(exc: Exception) -> bool:
+    """UPSERT 실패가 재시도로 해결될 수 있는 종류인지 판단"""
+    code = getattr(exc, 'code', None)
+    if isinstance(code, str) and code.startswith(_NON_RETRYABLE_CODE_PREFIXES):
+        return False
+    return True
+
+
+def estimate_row_bytes(row: Dict[str, Any]) -> int:
+    """
+    row 하나의 JSON payload 크기 추정치 (bytes)
+
+    요청 본문을 실제로 직렬화하지 않고 문자열 길이로 대략 계산합니다.
+    attachments/embeds 처럼 큰 JSON 문자열 컬럼이 크기 대부분을 차지합니다.
+    """
+    size = 2
+    for key, value in row.items():
+        size += len(key) + 4
+        if isinstance(value, str):
+            size += len(value) + 2
+        else:
+            size += 20
+    return size
+
+
+class AdaptiveBatchSizer:
+    """
+    AIMD 배치 크기 조절기
+
+    - 성공했고 응답이 target_latency 이내: 예산 += increase_bytes (천천히 증가)
+    - 실패했거나 응답이 target_latency 초과: 예산 *= decrease_factor (급격히 감소)
+
+    예산은 min_bytes ~ max_bytes 범위로 제한됩니다. 같은 프로세스의 여러 수집 작업이
+    학습한 예산을 이어서 쓰도록 `shared_sizer()` 로 테이블별 인스턴스를 공유합니다.
+    """
+
+    def __init__(self, initial_bytes: int = DEFAULT_BATCH_BYTES, min_bytes: int = MIN_BATCH_BYTES,
+                 max_bytes: int = MAX_BATCH_BYTES, increase_bytes: int = 32 * 1024,
+                 decrease_factor: float = 0.5, target_latency: float = TARGET_BATCH_LATENCY,
+                 max_rows: int = MAX_BATCH_ROWS):
+        """
+        Args:
+            initial_bytes: 시작 예산
+            min_bytes: 최소 예산
+            max_bytes: 최대 예산 (요청 크기 제한보다 충분히 작게)
+            increase_bytes: 성공 시 증가량
+            decrease_factor: 실패/지연 시 곱할 값
+            target_latency: 이 시간을 넘는 응답은 지연으로 간주 (초)
+            max_rows: 배치당 최대 row 수
+        """
+        self.min_bytes = min_bytes
+        self.max_bytes = max_bytes
+        self.increase_bytes = increase_bytes
+        self.decrease_factor = decrease_factor
+        self.target_latency = target_latency
+        self.max_rows = max_rows
+        self._budget = float(min(max(initial_bytes, min_bytes), max_bytes))
+        self._lock = threading.Lock()
+        self.increases = 0
+        self.decreases = 0
+
+    @property
+    def budget(self) -> int:
+        return int(self._budget)
+
+    def on_success(self, latency: float) -> None:
+        with self._lock:
+            if latency > self.target_latency:
+                self._decrease()
+            else:
+                self._budget = min(self.max_bytes, self._budget + self.increase_bytes)
+                self.increases += 1
+
+    def on_failure(self) -> None:
+        with self._lock:
+            self._decrease()
+
+    def _decrease(self) -> None:
+        self._budget = max(self.min_bytes, self._budget * self.decrease_factor)
+        self.decreases += 1
+
+    def batches(self, rows: Iterable[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+        """
+        rows 를 현재 예산에 맞는 배치로 묶어 yield 합니다.
+        예산은 배치를 만들 때마다 다시 읽으므로 전송 중에 학습한 값이 바로 반영됩니다.
+        예산보다 큰 row 하나는 단독 배치가 됩니다.
+        """
+        batch: List[Dict[str, Any]] = []
+        batch_bytes = 0
+        budget = self.budget
+        for row in rows:
+            row_bytes = estimate_row_bytes(row)
+            if batch and (batch_bytes + row_bytes > budget or len(batch) >= self.max_rows):
+                yield batch
+                batch = []
+                batch_bytes = 0
+                budget = self.budget
+            batch.append(row)
+            batch_bytes += row_bytes
+        if batch:
+            yield batch
+
+
+_shared_sizers: Dict[str, AdaptiveBatchSizer] = {}
+_shared_sizers_lock = threading.Lock()
+
+
+def shared_sizer(table: str = 'discord_messages') -> AdaptiveBatchSizer:
+    """테이블별로 프로세스 안에서 공유되는 AdaptiveBatchSizer"""
+    with _shared_sizers_lock:
+        if table not in _shared_sizers:
+            _shared_sizers[table] = AdaptiveBatchSizer()
+        return _shared_sizers[table]
+
+
+class SupabaseBatchWriter:
+    """
+    discord_messages 테이블 동시 배치 UPSERT writer
+
+    Supabase client 하나(= PostgREST httpx 커넥션 풀 하나)를 모든 워커 스레드가 공유하고,
+    최대 `max_in_flight` 개 배치만 동시에 전송합니다. 그 이상 submit 하면 자리가 날 때까지
+    호출자가 기다리므로 자연스럽게 backpressure 가 걸립니다.
+
+    배치 응답 시간과 실패는 sizer 에 전달되어 다음 배치 크기에 반영됩니다.
+    재시도할 배치가 줄어든 예산보다 크면 예산에 맞게 쪼개서 다시 보냅니다.
+
+    변경 감지 캐시(digests)가 있으면 마지막 저장 이후 바뀌지 않은 row 는 보내지 않습니다.
+
+    사용 예:
+        with SupabaseBatchWriter(client) as writer:
+            for batch in writer.sizer.batches(rows):
+                writer.submit(batch)
+        print(writer.summary())
+    """
+
+    def __init__(self, client: Any, table: str = 'discord_messages', on_conflict: str = 'id',
+                 max_in_flight: int = DEFAULT_MAX_IN_FLIGHT, max_retries: int = DEFAULT_MAX_RETRIES,
+                 retry_backoff: float = 0.5, sizer: Optional[AdaptiveBatchSizer] = None,
+                 digests: Optional[RowDigestCache] = None):
+        """
+        Args:
+            client: Supabase client
+            table: 대상 테이블
+            on_conflict: UPSERT 충돌 기준 컬럼
+            max_in_flight: 동시에 전송할 최대 배치 수
+            max_retries: 배치당 최대 재시도 횟수
+            retry_backoff: 첫 재시도 대기 시간 (초), 재시도마다 2배
+            sizer: 배치 크기 조절기 (기본: 테이블별 공유 인스턴스)
+            digests: 변경 감지 캐시 (기본: ROW_DIGEST_CACHE_PATH 설정 시 프로세스 공용 캐시)
+        """
+        self.client = client
+        self.table = table
+        self.on_conflict = on_conflict
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.sizer = sizer or shared_sizer(table)
+        self.digests = digests if digests is not None else shared_row_digests()
+
+        # postgrest client 는 처음 접근할 때 만들어지므로 워커 스레드보다 먼저 초기화
+        getattr(client, 'postgrest', None)
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix='upsert')
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._lock = threading.Lock()
+        self._futures: List[Future] = []
+        self._error: Optional[Exception] = None
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+
+        self.batches_sent = 0
+        self.rows_sent = 0
+        self.rows_submitted = 0
+        self.rows_skipped = 0
+        self.retries = 0
+        self.latencies: List[float] = []
+
+    # ------------------------------------------------------------------
+    # public API
+    # ------------------------------------------------------------------
+
+    def submit(self, batch: List[Dict[str, Any]]) -> Future:
+        """
+        배치 하나를 전송 대기열에 넣습니다. 전송 중인 배치가 max_in_flight 개면 기다립니다.
+        변경 감지 캐시가 있으면 바뀐 row 만 보내고, 모두 그대로면 보내지 않고 완료된 future 를 반환합니다.
+
+        Raises:
+            앞서 실패한 배치가 있으면 그 예외
+        """
+        self._raise_if_failed()
+        if self._started_at is None:
+            self._started_at = time.perf_counter()
+        submitted = len(batch)
+        if self.digests is not None:
+            batch = self.digests.changed(self.table, batch)
+        with self._lock:
+            self.rows_submitted += submitted
+            self.rows_skipped += submitted - len(batch)
+        if not batch:
+            future: Future = Future()
+            future.set_result(None)
+            return future
+        self._slots.acquire()
+        with self._lock:
+            batch_no = len(self._futures) + 1
+            future = self._executor.submit(self._send, batch, batch_no)
+            self._futures.append(future)
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def write_all(self, rows: Iterable[Dict[str, Any]], batch_size: Optional[int] = None) -> int:
+        """
+        rows 를 배치로 나눠서 전송하고 모두 끝날 때까지 기다립니다.
+
+        Args:
+            rows: 저장할 row
+            batch_size: 고정 row 수 배치 (None 이면 sizer 의 bytes 예산으로 결정)
+
+        Returns:
+            저장된 row 수
+        """
+        if batch_size:
+            rows = list(rows)
+            batches = (rows[i:i + batch_size] for i in range(0, len(rows), batch_size))
+        else:
+            batches = self.sizer.batches(rows)
+        for batch in batches:
+            self.submit(batch)
+        self.wait()
+        return self.rows_sent
+
+    def wait(self) -> None:
+        """
+        지금까지 submit 한 배치가 모두 끝날 때까지 기다립니다.
+
+        Raises:
+            실패한 배치가 있으면 첫 번째 예외
+        """
+        with self._lock:
+            futures = list(self._futures)
+        for future in futures:
+            try:
+                future.result()
+            except Exception:
+                pass
+        self._finished_at = time.perf_counter()
+        self._raise_if_failed()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> 'SupabaseBatchWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None:
+                self.wait()
+        finally:
+            self.close()
+
+    def summary(self) -> Dict[str, Any]:
+        """배치 수, row 수, 재시도 수, 지연시간 분포, 처리량"""
+        end = self._finished_at or time.perf_counter()
+        elapsed = end - self._started_at if self._started_at else 0.0
+        latencies = sorted(self.latencies)
+        return {
+            'batches': self.batches_sent,
+            'rows': self.rows_sent,
+            'rows_skipped': self.rows_skipped,
+            'skip_ratio': self.rows_skipped / self.rows_submitted if self.rows_submitted else 0.0,
+            'retries': self.retries,
+            'max_in_flight': self.max_in_flight,
+            'batch_bytes_budget': self.sizer.budget,
+            'elapsed_seconds': elapsed,
+            'rows_per_second': self.rows_sent / elapsed if elapsed else 0.0,
+            'latency_avg': sum(latencies) / len(latencies) if latencies else 0.0,
+            'latency_p50': _percentile(latencies, 0.50),
+            'latency_p95': _percentile(latencies, 0.95),
+            'latency_max': latencies[-1] if latencies else 0.0,
+        }
+
+    def log_summary(self) -> None:
+        s = self.summary()
+        logger.info(
+            f"  📈 UPSERT 처리량: {s['rows']}개 / {s['batches']}배치, {s['rows_per_second']:.0f} rows/s "
+            f"(동시 {s['max_in_flight']}, 재시도 {s['retries']}회, 배치 예산 {s['batch_bytes_budget'] // 1024}KB, "
+            f"지연 p50 {s['latency_p50']:.2f}초 / p95 {s['latency_p95']:.2f}초 / max {s['latency_max']:.2f}초)"
+        )
+        if self.digests is not None:
+            logger.info(f"  ♻️ 변경 없는 row 건너뜀: {s['rows_skipped']}개 / {self.rows_submitted}개 "
+                        f"({s['skip_ratio']:.1%})")
+
+    # ------------------------------------------------------------------
+    # 내부 구현
+    # ------------------------------------------------------------------
+
+    def _send(self, batch: List[Dict[str, Any]], batch_no: int) -> None:
+        pending = [batch]
+        attempt = 0
+        while pending:
+            if self._error is not None:
+                # 다른 배치가 이미 실패했으면 더 보내지 않음 (이 배치의 future 도 실패로 남김)
+                raise RuntimeError(f"배치 {batch_no} 전송 취소: 앞선 배치 실패 ({self._error})")
+            part = pending[0]
+            batch_start = time.perf_counter()
+            try:
+                self.client.table(self.table).upsert(part, on_conflict=self.on_conflict).execute()
+            except Exception as e:
+                self.sizer.on_failure()
+                if attempt >= self.max_retries or not is_retryable(e):
+                    logger.error(f"  ❌ 배치 {batch_no} 저장 실패 ({attempt + 1}회 시도): {e}")
+                    with self._lock:
+                        if self._error is None:
+                            self._error = e
+                    raise
+                delay = self.retry_backoff * (2 ** attempt) * (0.5 + random.random())
+                attempt += 1
+                with self._lock:
+                    self.retries += 1
+                # 요청 크기 제한 등으로 실패했을 수 있으므로 줄어든 예산에 맞게 쪼개서 재시도
+                if len(part) > 1 and sum(estimate_row_bytes(row) for row in part) > self.sizer.budget:
+                    pending[0:1] = list(self.sizer.batches(part))
+                logger.warning(f"  ⚠️ 배치 {batch_no} 저장 실패, {delay:.2f}초 후 재시도 "
+                               f"({attempt}/{self.max_retries}, 예산 {self.sizer.budget // 1024}KB): {e}")
+                time.sleep(delay)
+                continue
+
+            latency = time.perf_counter() - batch_start
+            self.sizer.on_success(latency)
+            pending.pop(0)
+            if self.digests is not None:
+                # 실제로 저장된 뒤에만 기록해야 실패한 row 를 다음에 건너뛰지 않음
+                self.digests.remember(self.table, part)
+            with self._lock:
+                self.batches_sent += 1
+                self.rows_sent += len(part)
+                self.latencies.append(latency)
+            logger.info(f"  📦 배치 {batch_no} 저장 완료: {len(part)}개 메시지 (배치 소요시간: {latency:.2f}초)")
+
+    def _raise_if_failed(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def upsert_rows(client: Any, rows: Iterable[Dict[str, Any]], batch_size: Optional[int] = None,
+                table: str = 'discord_messages', **writer_options) -> Dict[str, Any]:
+    """
+    rows 를 동시 배치 UPSERT 로 저장하는 간편 함수 (STAGING_DB_PATH 설정 시 staging 에 기록)
+
+    Args:
+        client: Supabase client
+        rows: 저장할 row
+        batch_size: 고정 row 수 배치 (None 이면 bytes 예산 기반 adaptive 배치)
+        table: 대상 테이블
+
+    Returns:
+        writer.summary() 결과
+    """
+    # staging_store 가 이 모듈을 import 하므로 순환 import 를 피해 여기서 import
+    from staging_store import open_writer
+
+    with open_writer(client, table=table, **writer_options) as writer:
+        writer.write_all(rows, batch_size)
+    return writer.summary()
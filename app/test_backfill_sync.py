@@ -0,0 +1,56 @@
+"""
+DiscordAPICollector / DiscordDirectCollector 의 동기 backfill() 이 backfill_async 로 제대로 넘어가는지 확인
+(두 수집기는 저장소 루트와 api/ 에 있으므로 경로를 직접 추가)
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'api'))
+
+import discord_api_direct  # noqa: E402
+import discord_collector_direct  # noqa: E402
+
+FAKE_SUPABASE_KEY = 'eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.test'
+
+
+class StubEngine:
+    instances = []
+
+    def __init__(self, client, writer, format_messages, store, **options):
+        self.options = options
+        self.run_args = None
+        StubEngine.instances.append(self)
+
+    async def run(self, channel_id, **kwargs):
+        self.run_args = (channel_id, kwargs)
+        return {'status': 'completed', 'channel_id': channel_id, 'messages_saved': 0}
+
+
+@pytest.fixture(autouse=True)
+def no_local_state(monkeypatch):
+    monkeypatch.setenv('STAGING_DB_PATH', '')
+    monkeypatch.setenv('ROW_DIGEST_CACHE_PATH', '')
+    StubEngine.instances.clear()
+
+
+@pytest.mark.parametrize('module, cls', [
+    (discord_api_direct, 'DiscordAPICollector'),
+    (discord_collector_direct, 'DiscordDirectCollector'),
+])
+def test_backfill_runs_engine_with_metadata(monkeypatch, module, cls):
+    monkeypatch.setattr(module, 'BackfillEngine', StubEngine)
+    monkeypatch.setattr(module, 'default_backfill_store', lambda client: object())
+    collector = getattr(module, cls)('Bot test', 'http://127.0.0.1:9', FAKE_SUPABASE_KEY)
+
+    result = collector.backfill('123', max_seconds=5, concurrency=2, shards=4)
+
+    assert result['status'] == 'completed'
+    assert 'timestamp' in result
+    engine, = StubEngine.instances
+    assert engine.options == {'concurrency': 2, 'shards': 4, 'metadata': collector.metadata}
+    assert engine.run_args == ('123', {'since': None, 'restart': False, 'max_seconds': 5})
@@ -0,0 +1,88 @@
+"""checkpoints / backfill 상태 저장소 테스트"""
+
+import json
+import multiprocessing
+import threading
+
+from backfill import LocalBackfillStore
+from checkpoints import LocalCheckpointStore, SupabaseCheckpointStore
+
+
+def _advance_many(path, channel_id, upto):
+    # 수집기마다 저장소를 새로 만드는 실제 사용 방식과 같게 매번 새 인스턴스
+    for message_id in range(1, upto + 1):
+        LocalCheckpointStore(path).advance(channel_id, message_id)
+
+
+def test_advance_only_moves_forward(tmp_path):
+    store = LocalCheckpointStore(str(tmp_path / 'cp.json'))
+    assert store.get('1') is None
+    assert store.advance('1', 100) == 100
+    assert store.advance('1', 50) == 100
+    assert store.get('1') == 100
+
+
+def test_concurrent_instances_do_not_lose_channels(tmp_path):
+    path = str(tmp_path / 'cp.json')
+    threads = [threading.Thread(target=_advance_many, args=(path, str(channel), 299)) for channel in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    store = LocalCheckpointStore(path)
+    assert {channel: store.get(str(channel)) for channel in range(4)} == {0: 299, 1: 299, 2: 299, 3: 299}
+
+
+def test_concurrent_processes_do_not_lose_channels(tmp_path):
+    path = str(tmp_path / 'cp.json')
+    processes = [multiprocessing.Process(target=_advance_many, args=(path, str(channel), 100)) for channel in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    assert {channel: entry['last_message_id'] for channel, entry in data.items()} == \
+        {'0': '100', '1': '100', '2': '100'}
+
+
+def test_backfill_store_concurrent_channels(tmp_path):
+    path = str(tmp_path / 'backfill.json')
+
+    def save_many(channel_id):
+        for i in range(50):
+            LocalBackfillStore(path).save(channel_id, {'round': i})
+
+    threads = [threading.Thread(target=save_many, args=(str(channel),)) for channel in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    store = LocalBackfillStore(path)
+    assert [store.load(str(channel)) for channel in range(4)] == [{'round': 49}] * 4
+    store.clear('0')
+    assert store.load('0') is None and store.load('1') == {'round': 49}
+
+
+class _RpcClient:
+    """advance_collect_checkpoint 의 GREATEST 동작만 흉내 내는 client"""
+
+    def __init__(self):
+        self.rows = {}
+        self.calls = []
+
+    def rpc(self, name, params):
+        self.calls.append((name, params))
+        channel, message = params['p_channel_id'], params['p_message_id']
+        self.rows[channel] = max(self.rows.get(channel, 0), message)
+        result = type('Result', (), {'data': self.rows[channel]})
+        return type('Query', (), {'execute': lambda _self: result})()
+
+
+def test_supabase_advance_is_single_conditional_write():
+    client = _RpcClient()
+    store = SupabaseCheckpointStore(client)
+    assert store.advance('7', 300) == 300
+    assert store.advance('7', 200) == 300
+    assert client.calls == [('advance_collect_checkpoint', {'p_channel_id': 7, 'p_message_id': 300}),
+                            ('advance_collect_checkpoint', {'p_channel_id': 7, 'p_message_id': 200})]
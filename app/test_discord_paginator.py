@@ -0,0 +1,86 @@
+"""MessagePaginator 범위 / 커서 테스트"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from discord_paginator import BACKWARD, FORWARD, MessagePaginator
+from discord_snowflake import datetime_to_snowflake
+
+
+class FakeChannel:
+    """Discord GET /channels/{id}/messages 처럼 after/before/limit 을 해석하는 메시지 목록"""
+
+    def __init__(self, ids):
+        self.ids = sorted(ids)
+        self.requests = []
+
+    def fetch(self, params):
+        self.requests.append(dict(params))
+        limit = params['limit']
+        if 'after' in params:
+            after = int(params['after'])
+            ids = [i for i in self.ids if i > after][:limit]
+        else:
+            before = int(params['before']) if 'before' in params else float('inf')
+            ids = [i for i in self.ids if i < before][-limit:]
+        # Discord 는 최신 메시지부터 돌려줌
+        return [{'id': str(i)} for i in reversed(ids)]
+
+
+def _collect(paginator, channel):
+    return sorted(int(msg['id']) for page in paginator.pages(channel.fetch) for msg in page)
+
+
+@pytest.mark.parametrize('direction', [FORWARD, BACKWARD])
+@pytest.mark.parametrize('after_id, before_id', [(None, None), (105, None), (None, 250), (105, 250), (0, 101)])
+def test_pages_cover_exact_exclusive_range(direction, after_id, before_id):
+    channel = FakeChannel(range(100, 300))
+    paginator = MessagePaginator(after_id=after_id, before_id=before_id, direction=direction, limit=7)
+    expected = [i for i in channel.ids if i > (after_id or 0) and (before_id is None or i < before_id)]
+    assert _collect(paginator, channel) == expected
+    assert paginator.done
+    assert paginator.messages_yielded == len(expected)
+
+
+def test_forward_stops_at_before_without_extra_request():
+    channel = FakeChannel(range(1, 41))
+    paginator = MessagePaginator(after_id=0, before_id=21, direction=FORWARD, limit=10)
+    assert _collect(paginator, channel) == list(range(1, 21))
+    assert [r['after'] for r in channel.requests] == ['0', '10']
+
+
+def test_backward_stops_at_after_without_extra_request():
+    channel = FakeChannel(range(1, 41))
+    paginator = MessagePaginator(after_id=20, direction=BACKWARD, limit=10)
+    assert _collect(paginator, channel) == list(range(21, 41))
+    assert channel.requests == [{'limit': 10}, {'limit': 10, 'before': '31'}]
+
+
+def test_empty_or_inverted_range_fetches_nothing():
+    channel = FakeChannel(range(1, 10))
+    assert MessagePaginator(after_id=5, before_id=6).done
+    assert _collect(MessagePaginator(after_id=8, before_id=3), channel) == []
+    assert channel.requests == []
+
+
+def test_short_page_ends_pagination():
+    channel = FakeChannel(range(1, 6))
+    paginator = MessagePaginator(limit=100)
+    assert _collect(paginator, channel) == [1, 2, 3, 4, 5]
+    assert paginator.pages_fetched == 1
+
+
+def test_limit_is_clamped_and_direction_validated():
+    assert MessagePaginator(limit=500).limit == 100
+    assert MessagePaginator(limit=0).limit == 1
+    with pytest.raises(ValueError):
+        MessagePaginator(direction='around')
+
+
+def test_for_window_converts_hours_once_and_after_id_wins():
+    now = datetime(2025, 1, 2, tzinfo=timezone.utc)
+    paginator = MessagePaginator.for_window(hours=6, now=now)
+    assert paginator.after_id == datetime_to_snowflake(now - timedelta(hours=6))
+    assert MessagePaginator.for_window(hours=6, after_id=123, now=now).after_id == 123
+    assert MessagePaginator.for_window(now=now).after_id == 0
@@ -0,0 +1,99 @@
+"""RateLimitBuckets / DiscordClient 429 처리 테스트"""
+
+import httpx
+import pytest
+
+import discord_rest
+from discord_rest import DiscordClient, RateLimitBuckets, route_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_route_key_keeps_major_parameter_only():
+    assert route_key('get', '/channels/123/messages/456') == ('GET /channels/123/messages/{id}', '123')
+    assert route_key('GET', '/guilds/7/members/8') == ('GET /guilds/7/members/{id}', '7')
+    assert route_key('GET', '/users/9') == ('GET /users/{id}', '')
+
+
+def test_bucket_blocks_until_reset_after_remaining_is_used():
+    clock = Clock()
+    buckets = RateLimitBuckets(global_rate=0, clock=clock)
+    route, major = route_key('GET', '/channels/1/messages')
+    assert buckets.reserve(route, major) == 0.0
+    buckets.update(route, major, {'x-ratelimit-bucket': 'abc', 'x-ratelimit-limit': '5',
+                                  'x-ratelimit-remaining': '2', 'x-ratelimit-reset-after': '1.5'})
+    assert buckets.reserve(route, major) == 0.0
+    assert buckets.reserve(route, major) == 0.0
+    assert buckets.reserve(route, major) == pytest.approx(1.5)
+    # 다른 major parameter 는 다른 bucket
+    assert buckets.reserve(*route_key('GET', '/channels/2/messages')) == 0.0
+    clock.now += 1.5
+    assert buckets.reserve(route, major) == 0.0
+
+
+def test_global_rate_is_a_token_bucket():
+    clock = Clock()
+    buckets = RateLimitBuckets(global_rate=2, clock=clock)
+    route, major = route_key('GET', '/channels/1')
+    assert [buckets.reserve(route, major) for _ in range(3)] == [0.0, 0.0, pytest.approx(0.5)]
+    clock.now += 0.5
+    assert buckets.reserve(route, major) == 0.0
+
+
+def test_rate_limited_route_and_global():
+    clock = Clock()
+    buckets = RateLimitBuckets(global_rate=0, clock=clock)
+    route, major = route_key('GET', '/channels/1/messages')
+    buckets.on_rate_limited(route, major, 2.0, is_global=False)
+    assert buckets.reserve(route, major) == pytest.approx(2.0)
+    assert buckets.reserve(*route_key('GET', '/guilds/1')) == 0.0
+    buckets.on_rate_limited(route, major, 3.0, is_global=True)
+    assert buckets.reserve(*route_key('GET', '/guilds/1')) == pytest.approx(3.0)
+    assert buckets.summary()['rate_limited'] == 2
+
+
+def test_client_waits_out_429_and_retries(monkeypatch):
+    clock = Clock()
+
+    def sleep(seconds):
+        clock.now += seconds
+
+    monkeypatch.setattr(discord_rest.time, 'sleep', sleep)
+    responses = iter([
+        httpx.Response(429, json={'retry_after': 0.25, 'global': False}),
+        httpx.Response(200, json=[{'id': '1'}], headers={'x-ratelimit-remaining': '4',
+                                                         'x-ratelimit-reset-after': '1'}),
+    ])
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return next(responses)
+
+    buckets = RateLimitBuckets(global_rate=0, clock=clock)
+    with DiscordClient('Bot test', base_url='http://discord.test', buckets=buckets,
+                       transport=httpx.MockTransport(handler)) as client:
+        assert client.get_messages('1', {'limit': 1}) == [{'id': '1'}]
+    assert len(requests) == 2
+    assert requests[0].headers['authorization'] == 'Bot test'
+    assert buckets.summary()['rate_limited'] == 1
+    assert buckets.waits == 1 and buckets.wait_seconds == pytest.approx(0.25)
+
+
+def test_client_gives_up_after_max_retries(monkeypatch):
+    monkeypatch.setattr(discord_rest.time, 'sleep', lambda seconds: None)
+
+    def handler(request):
+        return httpx.Response(503, json={})
+
+    with DiscordClient('Bot test', base_url='http://discord.test', max_retries=2,
+                       buckets=RateLimitBuckets(global_rate=0), transport=httpx.MockTransport(handler)) as client:
+        with pytest.raises(httpx.HTTPStatusError):
+            client.get_channel('1')
+        assert client.requests_sent == 3
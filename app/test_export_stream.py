@@ -0,0 +1,118 @@
+"""export_stream 스트리밍 파서 테스트"""
+
+import io
+import json
+
+import pytest
+
+from export_stream import (ExportStream, build_channel_columns, build_message_row, iter_export_messages,
+                           partition_file_path, read_export_rows)
+
+MESSAGES = [
+    {
+        'id': str(1000 + i),
+        'type': 'Default',
+        'timestamp': f'2025-01-01T00:00:{i:02d}+00:00',
+        'isPinned': i == 3,
+        'content': f'메시지 {i} "quoted" ]}}, 😀',
+        'author': {'id': '42', 'name': 'tester', 'discriminator': '0001', 'avatarUrl': 'https://a/b.png'},
+        'attachments': [{'url': f'https://cdn/{i}.png'}] if i % 2 else [],
+        'embeds': [],
+        'reactions': [{'emoji': {'name': '👍'}, 'count': i}] if i % 3 == 0 else [],
+        'mentions': [],
+        **({'reference': {'messageId': str(1000 + i - 1)}} if i % 4 == 1 else {}),
+    }
+    for i in range(12)
+]
+EXPORT = {
+    'guild': {'id': '7', 'name': '서버'},
+    'channel': {'id': '9', 'name': 'general'},
+    'dateRange': {'after': None, 'before': None},
+    'messages': MESSAGES,
+    'messageCount': len(MESSAGES),
+}
+
+
+def _stream(data, chunk_size=64, indent=2):
+    return ExportStream(io.StringIO(json.dumps(data, ensure_ascii=False, indent=indent)), chunk_size)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 7, 64, 1 << 16])
+@pytest.mark.parametrize('indent', [None, 2])
+def test_chunk_boundaries_do_not_change_result(chunk_size, indent):
+    stream = _stream(EXPORT, chunk_size, indent)
+    assert stream.guild == EXPORT['guild']
+    assert stream.channel == EXPORT['channel']
+    assert 'messageCount' not in stream.header
+    assert list(stream) == MESSAGES
+    assert stream.messages_read == len(MESSAGES)
+    assert stream.header['messageCount'] == len(MESSAGES)
+    assert stream.header['dateRange'] == EXPORT['dateRange']
+
+
+def test_numbers_split_across_chunks_are_not_truncated():
+    data = {'channel': {'id': '9'}, 'messages': [{'id': '1', 'n': 123456789}, {'id': '2', 'n': 1.5e10}]}
+    for chunk_size in range(1, 20):
+        assert [m['n'] for m in _stream(data, chunk_size, None)] == [123456789, 1.5e10]
+
+
+def test_empty_and_missing_messages():
+    assert list(_stream({'channel': {'id': '9'}, 'messages': [], 'messageCount': 0})) == []
+    stream = _stream({'channel': {'id': '9'}})
+    assert list(stream) == []
+    assert stream.header == {'channel': {'id': '9'}}
+
+
+def test_iterating_twice_is_an_error():
+    stream = _stream(EXPORT)
+    list(stream)
+    with pytest.raises(RuntimeError):
+        list(stream)
+
+
+@pytest.mark.parametrize('text', [
+    '[]',
+    '{"channel": {}, "messages": [{"id": "1"} {"id": "2"}]}',
+    '{"channel" {}}',
+    '{"channel": {}, "messages": [], "messageCount": 0 "x": 1}',
+])
+def test_malformed_export_raises_value_error(text):
+    with pytest.raises(ValueError):
+        list(ExportStream(io.StringIO(text), 4))
+
+
+def test_truncated_export_raises():
+    text = json.dumps(EXPORT)[:-40]
+    with pytest.raises(ValueError):
+        list(ExportStream(io.StringIO(text), 16))
+
+
+def test_file_path_source_and_rows(tmp_path):
+    path = tmp_path / 'export.json'
+    path.write_text(json.dumps(EXPORT, ensure_ascii=False), encoding='utf-8')
+    assert list(iter_export_messages(str(path), chunk_size=5)) == MESSAGES
+
+    rows = read_export_rows(str(path))
+    assert [row['id'] for row in rows] == [int(m['id']) for m in MESSAGES]
+    assert rows[1]['reference_message_id'] == 1000
+    assert rows[0]['reference_message_id'] is None
+    assert rows[3]['is_pinned'] is True
+
+
+def test_build_message_row():
+    columns = build_channel_columns(EXPORT['channel'], EXPORT['guild'])
+    assert columns == {'channel_id': 9, 'channel_name': 'general', 'server_id': 7, 'server_name': '서버'}
+    row = build_message_row(MESSAGES[3], columns)
+    assert json.loads(row['attachments']) == [{'url': 'https://cdn/3.png'}]
+    assert json.loads(row['reactions']) == [{'emoji': {'name': '👍'}, 'count': 3}]
+    assert row['embeds'] == '[]' and row['mentions'] == '[]'
+    assert (row['author_id'], row['author_name'], row['channel_id']) == (42, 'tester', 9)
+
+
+def test_build_channel_columns_without_guild():
+    assert build_channel_columns({'id': '9', 'name': 'dm'}, {})['server_id'] is None
+
+
+def test_partition_file_path():
+    assert partition_file_path('out/ch.json', 0) == 'out/ch.json'
+    assert partition_file_path('out/ch.json', 2) == 'out/ch [part 3].json'
@@ -0,0 +1,125 @@
+"""JobStore / JobQueue 테스트"""
+
+import threading
+import time
+
+import pytest
+
+from job_queue import JobQueue, JobStore, QueueFullError, new_job_id
+
+
+@pytest.fixture
+def store():
+    store = JobStore(':memory:')
+    yield store
+    store.close()
+
+
+def test_job_ids_are_unique_within_a_second():
+    ids = {new_job_id('task') for _ in range(1000)}
+    assert len(ids) == 1000
+    assert all(job_id.startswith('task_') for job_id in ids)
+
+
+def test_store_update_get_list(store):
+    store.create('a', 'task', {'status': 'queued', 'channel_id': '1'})
+    store.create('b', 'task', {'status': 'queued', 'channel_id': '2'})
+    assert store.update('a', status='completed', messages_count=3) == \
+        {'status': 'completed', 'channel_id': '1', 'messages_count': 3}
+    assert store.update('missing', status='failed') is None
+    assert store.get('a')['messages_count'] == 3
+    assert [job['task_id'] for job in store.list(status='queued')] == ['b']
+    assert {job['task_id'] for job in store.list()} == {'a', 'b'}
+
+
+def test_store_marks_leftover_jobs_interrupted(tmp_path):
+    path = str(tmp_path / 'jobs.sqlite')
+    first = JobStore(path)
+    first.create('running', 'task', {'status': 'queued'})
+    first.update('running', status='running')
+    first.create('done', 'task', {'status': 'queued'})
+    first.update('done', status='completed')
+    first.close()
+
+    second = JobStore(path)
+    assert second.get('running')['status'] == 'interrupted'
+    assert second.get('done')['status'] == 'completed'
+    second.close()
+
+
+def test_evict_removes_only_finished_records(store):
+    for i in range(5):
+        store.create(f'done{i}', 'task', {'status': 'queued'})
+        store.update(f'done{i}', status='completed')
+    store.create('active', 'task', {'status': 'running'})
+    assert store.evict(retention_seconds=0, max_records=2) == 3
+    assert {job['task_id'] for job in store.list()} == {'done3', 'done4', 'active'}
+
+
+def test_queue_runs_jobs_and_records_results(store):
+    jobs = JobQueue(store, workers=2)
+    task_id, future = jobs.submit('task', lambda job_id: {'messages_count': 5, 'seen': job_id}, {'channel_id': '1'})
+    record = future.result(timeout=5)
+    jobs.shutdown()
+    assert record['status'] == 'completed'
+    assert record['seen'] == task_id and record['channel_id'] == '1' and record['messages_count'] == 5
+    assert store.get(task_id) == record
+
+
+def test_run_can_override_status(store):
+    jobs = JobQueue(store, workers=1)
+    _, future = jobs.submit('task', lambda job_id: {'status': 'partial'})
+    assert future.result(timeout=5)['status'] == 'partial'
+    jobs.shutdown()
+
+
+def test_failed_job_records_error(store):
+    def run(job_id):
+        raise ValueError('boom')
+
+    jobs = JobQueue(store, workers=1)
+    task_id, future = jobs.submit('task', run)
+    with pytest.raises(ValueError):
+        future.result(timeout=5)
+    jobs.shutdown()
+    assert store.get(task_id)['status'] == 'failed'
+    assert store.get(task_id)['error'] == 'boom'
+
+
+def test_queue_limits_running_and_queued_jobs(store):
+    release = threading.Event()
+    started = threading.Semaphore(0)
+
+    def run(job_id):
+        started.release()
+        release.wait(5)
+
+    jobs = JobQueue(store, workers=2, max_queued=2)
+    futures = [jobs.submit('task', run)[1] for _ in range(2)]
+    assert started.acquire(timeout=5) and started.acquire(timeout=5)
+    futures += [jobs.submit('task', run)[1] for _ in range(2)]
+    assert jobs.stats() == {'workers': 2, 'running': 2, 'queued': 2, 'max_queued': 2}
+    with pytest.raises(QueueFullError):
+        jobs.submit('task', run)
+
+    release.set()
+    for future in futures:
+        future.result(timeout=5)
+    jobs.shutdown()
+    assert jobs.stats()['running'] == 0 and jobs.stats()['queued'] == 0
+
+
+def test_shutdown_interrupts_queued_jobs(store):
+    release = threading.Event()
+    jobs = JobQueue(store, workers=1)
+    first_id, first = jobs.submit('task', lambda job_id: release.wait(5) and None)
+    waiting_id, waiting = jobs.submit('task', lambda job_id: None)
+    while store.get(first_id)['status'] != 'running':
+        time.sleep(0.01)
+    threading.Timer(0.05, release.set).start()
+    jobs.shutdown()
+    assert store.get(first_id)['status'] == 'completed'
+    assert store.get(waiting_id)['status'] == 'interrupted'
+    assert waiting.cancelled()
+    with pytest.raises(RuntimeError):
+        jobs.submit('task', lambda job_id: None)
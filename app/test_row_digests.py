@@ -0,0 +1,43 @@
+"""RowDigestCache 테스트"""
+
+from row_digests import RowDigestCache, row_digest
+
+
+def _row(message_id, content='hello', reactions=()):
+    return {'id': message_id, 'content': content, 'reactions': list(reactions)}
+
+
+def test_only_new_or_changed_rows_pass():
+    cache = RowDigestCache(':memory:', retention_days=0)
+    rows = [_row(1), _row(2), _row(3)]
+    assert cache.changed('t', rows) == rows
+    cache.remember('t', rows)
+
+    edited = [_row(1), _row(2, content='edited'), _row(3, reactions=[{'count': 1}]), _row(4)]
+    assert [row['id'] for row in cache.changed('t', edited)] == [2, 3, 4]
+    # 테이블별로 따로 기억
+    assert cache.changed('other', rows) == rows
+    assert cache.stats()['rows_skipped'] == 1
+
+
+def test_digest_ignores_key_order():
+    assert row_digest({'a': 1, 'b': [1, 2]}) == row_digest({'b': [1, 2], 'a': 1})
+    assert row_digest({'a': 1}) != row_digest({'a': 2})
+
+
+def test_prune_and_clear():
+    cache = RowDigestCache(':memory:', retention_days=0)
+    cache.remember('t', [_row(10), _row(20)])
+    cache.remember('u', [_row(30)])
+    assert cache.prune(15) == 1
+    assert [row['id'] for row in cache.changed('t', [_row(10), _row(20)])] == [10]
+    cache.clear('u')
+    assert cache.changed('u', [_row(30)]) == [_row(30)]
+
+
+def test_unreadable_cache_passes_rows_through():
+    cache = RowDigestCache(':memory:', retention_days=0)
+    cache.remember('t', [_row(1)])
+    cache.close()
+    assert cache.changed('t', [_row(1)]) == [_row(1)]
+    assert cache.stats()['errors'] == 1
@@ -0,0 +1,76 @@
+"""staging 저장소 / flusher 테스트"""
+
+from postgrest.exceptions import APIError
+
+from staging_store import StagingFlusher, StagingStore, StagingWriter
+
+
+class FakeClient:
+    """upsert 한 row 를 테이블별로 모으는 client (broken 이면 권한 오류로 실패)"""
+
+    def __init__(self, broken=False):
+        self.broken = broken
+        self.saved = {}
+
+    def table(self, name):
+        client = self
+
+        class Query:
+            def upsert(self, rows, on_conflict, **options):
+                self.rows = rows
+                return self
+
+            def execute(self):
+                if client.broken:
+                    raise APIError({'code': '42501', 'message': 'permission denied'})
+                client.saved.setdefault(name, {}).update((row['id'], row) for row in self.rows)
+
+        return Query()
+
+
+def _rows(ids, content='hello'):
+    return [{'id': i, 'content': content} for i in ids]
+
+
+def test_rows_survive_failed_flush_and_replay_after_restart(tmp_path):
+    path = str(tmp_path / 'staging.sqlite')
+    store = StagingStore(path)
+    flusher = StagingFlusher(store, FakeClient(broken=True))
+    writer = StagingWriter(store, flusher)
+    assert writer.write_all(_rows(range(10)), batch_size=4) == 10
+    assert flusher.drain(timeout=5) is False
+    assert flusher.stats()['pending_rows'] == 10 and flusher.failures == 1
+    store.close()
+
+    # 다음 실행: 남은 row 를 새 client 로 이어서 보냄
+    client = FakeClient()
+    store = StagingStore(path)
+    flusher = StagingFlusher(store, client, flush_rows=3)
+    assert flusher.drain(timeout=5) is True
+    assert sorted(client.saved['discord_messages']) == list(range(10))
+    assert store.stats()['pending_rows'] == 0
+    assert flusher.flushes == 4
+    store.close()
+
+
+def test_restaged_row_keeps_only_latest_version(tmp_path):
+    store = StagingStore(str(tmp_path / 'staging.sqlite'))
+    store.stage('discord_messages', _rows([1, 2]))
+    (first_seq, _, _), _ = store.peek(10)
+    store.stage('discord_messages', _rows([1], content='edited'))
+    # 보낸 뒤 다시 기록된 새 버전은 이전 seq 의 ack 로 지워지지 않음
+    store.ack([first_seq])
+    assert [(table, row) for _, table, row in store.peek(10)] == \
+        [('discord_messages', {'id': 2, 'content': 'hello'}), ('discord_messages', {'id': 1, 'content': 'edited'})]
+    store.close()
+
+
+def test_flush_groups_rows_by_table(tmp_path):
+    store = StagingStore(str(tmp_path / 'staging.sqlite'))
+    store.stage('discord_messages', _rows([1, 2]))
+    store.stage('other', _rows([1]))
+    client = FakeClient()
+    assert StagingFlusher(store, client).flush_once() == 3
+    assert {table: sorted(rows) for table, rows in client.saved.items()} == \
+        {'discord_messages': [1, 2], 'other': [1]}
+    store.close()
@@ -0,0 +1,150 @@
+"""SupabaseBatchWriter / AdaptiveBatchSizer 테스트"""
+
+import json
+import threading
+
+import pytest
+from postgrest.exceptions import APIError
+
+from supabase_writer import AdaptiveBatchSizer, SupabaseBatchWriter, estimate_row_bytes, is_retryable
+
+
+def _rows(count, content_size=100):
+    return [{'id': i, 'content': 'x' * content_size, 'attachments': '[]'} for i in range(count)]
+
+
+class FakeClient:
+    """client.table(t).upsert(rows, ...).execute() 를 기록하는 client (처음 failures 번은 실패)"""
+
+    def __init__(self, failures=0, error=None):
+        self.failures = failures
+        self.error = error or ConnectionError('connection reset')
+        self.calls = []
+        self.saved = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def table(self, name):
+        client = self
+
+        class Query:
+            def upsert(self, rows, on_conflict, **options):
+                self.rows = rows
+                return self
+
+            def execute(self):
+                with client._lock:
+                    client.calls.append((name, len(self.rows)))
+                    client.in_flight += 1
+                    client.max_in_flight = max(client.max_in_flight, client.in_flight)
+                    fail = client.failures > 0
+                    if fail:
+                        client.failures -= 1
+                try:
+                    if fail:
+                        raise client.error
+                    with client._lock:
+                        client.saved.update((row['id'], row) for row in self.rows)
+                finally:
+                    with client._lock:
+                        client.in_flight -= 1
+
+        return Query()
+
+
+def _writer(client, **options):
+    options.setdefault('sizer', AdaptiveBatchSizer(initial_bytes=4096, min_bytes=1024, max_bytes=16384))
+    return SupabaseBatchWriter(client, retry_backoff=0.0, **options)
+
+
+def test_sizer_additive_increase_multiplicative_decrease():
+    sizer = AdaptiveBatchSizer(initial_bytes=10_000, min_bytes=2_000, max_bytes=20_000,
+                               increase_bytes=1_000, decrease_factor=0.5, target_latency=1.0)
+    sizer.on_success(0.1)
+    assert sizer.budget == 11_000
+    sizer.on_success(5.0)
+    assert sizer.budget == 5_500
+    sizer.on_failure()
+    sizer.on_failure()
+    assert sizer.budget == 2_000
+    for _ in range(100):
+        sizer.on_success(0.1)
+    assert sizer.budget == 20_000
+    assert (sizer.increases, sizer.decreases) == (101, 3)
+
+
+def test_batches_respect_byte_budget_and_row_cap():
+    rows = _rows(100)
+    sizer = AdaptiveBatchSizer(initial_bytes=2048, min_bytes=1024, max_rows=1000)
+    batches = list(sizer.batches(rows))
+    assert [row for batch in batches for row in batch] == rows
+    assert all(sum(estimate_row_bytes(r) for r in batch) <= 2048 for batch in batches)
+    assert len(batches) > 1
+
+    capped = list(AdaptiveBatchSizer(initial_bytes=1 << 20, max_rows=30).batches(rows))
+    assert [len(batch) for batch in capped] == [30, 30, 30, 10]
+
+
+def test_oversized_row_is_its_own_batch():
+    rows = [{'id': 1, 'content': 'a'}, {'id': 2, 'content': 'x' * 5000}, {'id': 3, 'content': 'b'}]
+    batches = list(AdaptiveBatchSizer(initial_bytes=1024, min_bytes=1024).batches(rows))
+    assert [[row['id'] for row in batch] for batch in batches] == [[1], [2], [3]]
+
+
+def test_estimate_row_bytes_counts_jsonb_strings():
+    plain = {'id': 1, 'attachments': '[]'}
+    with_attachment = {'id': 1, 'attachments': json.dumps([{'url': 'https://cdn.example/' + 'a' * 200}])}
+    assert estimate_row_bytes(with_attachment) - estimate_row_bytes(plain) > 200
+
+
+def test_write_all_saves_every_row_within_in_flight_limit():
+    client = FakeClient()
+    with _writer(client, max_in_flight=3) as writer:
+        assert writer.write_all(_rows(200)) == 200
+    assert sorted(client.saved) == list(range(200))
+    assert client.max_in_flight <= 3
+    summary = writer.summary()
+    assert summary['rows'] == 200 and summary['batches'] == len(client.calls) and summary['retries'] == 0
+
+
+def test_retryable_failures_are_retried_and_shrink_budget():
+    client = FakeClient(failures=2)
+    sizer = AdaptiveBatchSizer(initial_bytes=16384, min_bytes=1024, max_bytes=16384, increase_bytes=0)
+    with _writer(client, max_in_flight=1, max_retries=3, sizer=sizer) as writer:
+        writer.write_all(_rows(50))
+    assert sorted(client.saved) == list(range(50))
+    assert writer.retries == 2
+    assert sizer.budget == 4096
+    # 줄어든 예산(4KB)보다 큰 배치는 쪼개서 재시도
+    sizes = [rows for _, rows in client.calls]
+    assert sizes[:2] == [50, 50]
+    assert len(sizes) == 4 and sum(sizes[2:]) == 50
+
+
+def test_gives_up_after_max_retries():
+    client = FakeClient(failures=10)
+    writer = _writer(client, max_in_flight=1, max_retries=2)
+    with pytest.raises(ConnectionError):
+        writer.write_all(_rows(5), batch_size=5)
+    writer.close()
+    assert len(client.calls) == 3
+    assert writer.rows_sent == 0
+
+
+def test_non_retryable_error_fails_immediately():
+    client = FakeClient(failures=10, error=APIError({'code': '23502', 'message': 'null value'}))
+    writer = _writer(client, max_in_flight=1, max_retries=5)
+    with pytest.raises(APIError):
+        writer.write_all(_rows(5), batch_size=5)
+    writer.close()
+    assert len(client.calls) == 1
+
+
+@pytest.mark.parametrize('code, retryable', [
+    ('22P02', False), ('23505', False), ('42501', False), ('PGRST116', False),
+    ('40001', True), ('57014', True), ('PGRST301', True), (None, True),
+])
+def test_is_retryable(code, retryable):
+    assert is_retryable(APIError({'code': code, 'message': 'x'})) is retryable
+
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+DiscordChatExporter 실행 방식 벤치마크: 채널마다 프로세스 1개 vs 채널 전체를 프로세스 1개로
+
+- per_process: 기존 collect_and_save 처럼 채널마다 `export --channel X` 를 따로 실행
+- batched: export_channels 처럼 `export --channel X Y Z ... --parallel N --output dir/%c.json` 한 번 실행
+두 방식 모두 수집기의 명령어 생성 함수를 그대로 사용하고, 내보낸 메시지 수가 같은지 확인합니다.
+
+실제 CLI 로 측정하려면 토큰과 채널을 지정합니다 (Discord API 를 실제로 호출):
+    python benchmarks/bench_cli_batch.py --token $DISCORD_TOKEN --channels 111,222,333 --hours 6
+
+CLI 를 실행할 수 없는 환경(예: 다른 플랫폼용 바이너리)에서는 --simulate 로 CLI 와 같은 인자를 받는
+대체 스크립트를 만들어 측정합니다. 시작 비용과 채널당 내보내기 시간은 실측값을 넣어야 의미가 있습니다:
+    python benchmarks/bench_cli_batch.py --simulate --channels 20 --startup 0.8 --channel-seconds 0.3
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'app'))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+from discord_to_supabase import DiscordToSupabaseCollector  # noqa: E402
+from export_stream import ExportStream  # noqa: E402
+
+# --simulate 에서 쓰는 대체 CLI (export 명령의 --channel/--output/--parallel 만 해석)
+FAKE_CLI = '''#!{python}
+import sys, time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, {bench_dir!r})
+from synthetic_export import write_export
+
+args = sys.argv[2:]
+channels, output, parallel, i = [], None, 1, 0
+while i < len(args):
+    if args[i] in ('--channel', '-c'):
+        i += 1
+        while i < len(args) and not args[i].startswith('-'):
+            channels.append(args[i])
+            i += 1
+        continue
+    if args[i] in ('--output', '-o'):
+        output = args[i + 1]
+    if args[i] == '--parallel':
+        parallel = int(args[i + 1])
+    i += 2 if args[i].startswith('-') else 1
+
+time.sleep({startup})  # 런타임 시작 + 토큰 확인 + 서버 정보 조회
+
+
+def export(channel_id):
+    time.sleep({channel_seconds})  # 채널 메시지 요청
+    write_export(output.replace('%c', channel_id), {messages})
+
+
+with ThreadPoolExecutor(max(1, parallel)) as pool:
+    list(pool.map(export, channels))
+'''
+
+
+def _count_messages(path: str) -> int:
+    with ExportStream(path) as stream:
+        return sum(1 for _ in stream)
+
+
+def _collector(cli: str, token: str) -> DiscordToSupabaseCollector:
+    # Supabase 연결 없이 명령어 생성 / 내보내기 함수만 사용
+    collector = object.__new__(DiscordToSupabaseCollector)
+    collector.discord_token = token
+    collector.discord_exporter_path = cli
+    return collector
+
+
+def run_per_process(collector: DiscordToSupabaseCollector, channels: List[str], hours: float,
+                    workdir: str) -> Dict[str, int]:
+    counts = {}
+    for channel_id in channels:
+        cmd, output_file = collector._build_export_command(channel_id, hours)
+        cmd[cmd.index('--output') + 1] = os.path.join(workdir, output_file)
+        subprocess.run(cmd, capture_output=True, text=True, check=True)
+        counts[channel_id] = _count_messages(os.path.join(workdir, output_file))
+    return counts
+
+
+def run_batched(collector: DiscordToSupabaseCollector, channels: List[str], hours: float,
+                parallel: int, workdir: str) -> Dict[str, int]:
+    after = (datetime.now() - timedelta(hours=hours)).isoformat()
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        files = collector.export_channels(channels, after=after, parallel=parallel)
+        return {cid: _count_messages(path) for cid, path in files.items()}
+    finally:
+        os.chdir(cwd)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DiscordChatExporter 채널별 실행 vs 일괄 실행 벤치마크")
+    parser.add_argument('--cli', default=str(ROOT / 'app' / 'bin' / 'DiscordChatExporter.Cli'), help="CLI 경로")
+    parser.add_argument('--token', default=os.getenv('DISCORD_TOKEN', ''), help="Discord 토큰 (실제 CLI 사용 시)")
+    parser.add_argument('--channels', default='8', help="쉼표로 구분한 채널 ID (--simulate 에서는 채널 수)")
+    parser.add_argument('--hours', type=float, default=1, help="내보낼 시간 범위")
+    parser.add_argument('--parallel', type=int, default=4, help="일괄 실행 시 --parallel")
+    parser.add_argument('--simulate', action='store_true', help="대체 CLI 스크립트로 측정")
+    parser.add_argument('--startup', type=float, default=0.8, help="(--simulate) 프로세스 시작 비용 (초)")
+    parser.add_argument('--channel-seconds', type=float, default=0.3, help="(--simulate) 채널당 내보내기 시간 (초)")
+    parser.add_argument('--messages', type=int, default=2000, help="(--simulate) 채널당 메시지 수")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_cli_batch_')
+    try:
+        cli = args.cli
+        if args.simulate:
+            channels = [str(1159487918512017488 + i) for i in range(int(args.channels))]
+            cli = os.path.join(workdir, 'fake_cli')
+            with open(cli, 'w') as f:
+                f.write(FAKE_CLI.format(python=sys.executable, bench_dir=str(ROOT / 'benchmarks'),
+                                        startup=args.startup, channel_seconds=args.channel_seconds,
+                                        messages=args.messages))
+            os.chmod(cli, 0o755)
+        else:
+            channels = [c.strip() for c in args.channels.split(',') if c.strip()]
+            if not args.token:
+                parser.error("실제 CLI 측정에는 --token (또는 DISCORD_TOKEN) 이 필요합니다")
+
+        collector = _collector(cli, args.token)
+        print(f"CLI: {'대체 스크립트 (시작 ' + str(args.startup) + '초, 채널당 ' + str(args.channel_seconds) + '초)' if args.simulate else cli}")
+        print(f"채널 {len(channels)}개, --parallel {args.parallel}")
+        print(f"{'mode':<12} {'processes':>9} {'messages':>10} {'sec':>8} {'sec/channel':>12}")
+
+        results = {}
+        for mode in ('per_process', 'batched'):
+            start = time.perf_counter()
+            if mode == 'per_process':
+                counts = run_per_process(collector, channels, args.hours, workdir)
+                processes = len(channels)
+            else:
+                counts = run_batched(collector, channels, args.hours, args.parallel, workdir)
+                processes = 1
+            elapsed = time.perf_counter() - start
+            results[mode] = {'processes': processes, 'messages': sum(counts.values()), 'seconds': elapsed,
+                             'counts': counts}
+            print(f"{mode:<12} {processes:>9} {sum(counts.values()):>10,} {elapsed:>8.2f} "
+                  f"{elapsed / len(channels):>12.3f}")
+
+        per, batched = results['per_process'], results['batched']
+        same = per['counts'] == batched['counts']
+        print(f"결과 일치: {'✅' if same else '❌'}")
+        print(f"채널당 절약: {(per['seconds'] - batched['seconds']) / len(channels):.3f}초 "
+              f"({per['seconds'] / batched['seconds']:.1f}x)")
+        print(json.dumps({mode: {k: v for k, v in r.items() if k != 'counts'} for mode, r in results.items()}))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+메시지 페이지 이동 벤치마크: 메시지마다 timestamp 파싱 vs snowflake 정수 비교
+
+메모리 안의 가짜 채널(GET /channels/{id}/messages 의 before/after/limit 동작을 흉내)에서
+- legacy: 기존 수집기처럼 before= 로 뒤로 이동하며 메시지마다 datetime.fromisoformat 으로 범위 판정
+- paginator: MessagePaginator 로 after= 로 앞으로 이동하며 ID 정수 비교로 범위 판정
+을 실행해 결과가 같은지 확인하고 처리량을 비교합니다 (네트워크 시간 제외, CPU 비용만 측정).
+
+사용법:
+    python benchmarks/bench_paginate.py --messages 200000 --hours 24
+"""
+
+import argparse
+import bisect
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'app'))
+
+from discord_paginator import MessagePaginator  # noqa: E402
+from discord_snowflake import datetime_to_snowflake  # noqa: E402
+
+
+class FakeChannel:
+    """before/after/limit 를 지원하는 메모리 채널 (응답은 Discord 처럼 최신 메시지부터)"""
+
+    def __init__(self, count: int, now: datetime):
+        start = now - timedelta(seconds=count * 2)
+        self.messages = []
+        for i in range(count):
+            ts = start + timedelta(seconds=i * 2)
+            self.messages.append({
+                'id': str(datetime_to_snowflake(ts) | (i & 0xFFF)),
+                'timestamp': ts.isoformat(),
+                'content': f'message {i}',
+            })
+        self.ids = [int(m['id']) for m in self.messages]
+        self.requests = 0
+
+    def fetch(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        self.requests += 1
+        limit = int(params.get('limit', 50))
+        if 'after' in params:
+            lo = bisect.bisect_right(self.ids, int(params['after']))
+            page = self.messages[lo:lo + limit]
+        else:
+            hi = bisect.bisect_left(self.ids, int(params['before'])) if 'before' in params else len(self.ids)
+            page = self.messages[max(0, hi - limit):hi]
+        return page[::-1]
+
+
+def legacy_collect(channel: FakeChannel, hours: float, now: datetime) -> List[Dict[str, Any]]:
+    """변경 전 fetch_channel_messages 와 같은 방식"""
+    after_time = now - timedelta(hours=hours)
+    all_messages = []
+    last_message_id = None
+    while True:
+        params = {'limit': 100}
+        if last_message_id:
+            params['before'] = last_message_id
+        messages = channel.fetch(params)
+        if not messages:
+            break
+        for msg in messages:
+            msg_time = datetime.fromisoformat(msg['timestamp'].replace('Z', '+00:00'))
+            if msg_time < after_time:
+                return all_messages
+            all_messages.append(msg)
+        if len(messages) < 100:
+            break
+        last_message_id = messages[-1]['id']
+    return all_messages
+
+
+def paginator_collect(channel: FakeChannel, hours: float, now: datetime) -> List[Dict[str, Any]]:
+    paginator = MessagePaginator.for_window(hours=hours, now=now)
+    all_messages = []
+    for page in paginator.pages(channel.fetch):
+        all_messages.extend(page)
+    return all_messages
+
+
+def _measure(name: str, func, channel: FakeChannel, hours: float, now: datetime, repeat: int):
+    best = None
+    result: List[Dict[str, Any]] = []
+    for _ in range(repeat):
+        channel.requests = 0
+        start = time.perf_counter()
+        result = func(channel, hours, now)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{name:<10} {len(result):>10,} {channel.requests:>9,} {best:>8.3f} {len(result) / best:>12,.0f}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="메시지 페이지 이동 벤치마크")
+    parser.add_argument('--messages', type=int, default=200_000, help="가짜 채널 메시지 수")
+    parser.add_argument('--hours', type=float, default=24, help="수집 시간 범위")
+    parser.add_argument('--repeat', type=int, default=3, help="반복 횟수 (최솟값 사용)")
+    args = parser.parse_args()
+
+    now = datetime.now(timezone.utc)
+    channel = FakeChannel(args.messages, now)
+
+    print(f"{'mode':<10} {'messages':>10} {'requests':>9} {'sec':>8} {'msg/s':>12}")
+    legacy = _measure('legacy', legacy_collect, channel, args.hours, now, args.repeat)
+    paged = _measure('paginator', paginator_collect, channel, args.hours, now, args.repeat)
+
+    same = sorted(m['id'] for m in legacy) == sorted(m['id'] for m in paged)
+    print(f"결과 일치: {'✅' if same else '❌'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+parse_discord_json 벤치마크: json.load 전체 로드 vs 스트리밍 파서
+
+각 방식은 별도 프로세스에서 실행해 peak RSS 를 독립적으로 측정합니다.
+
+사용법:
+    python benchmarks/bench_parse_export.py --messages 1000000
+    python benchmarks/bench_parse_export.py --export /path/to/existing.json
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'app'))
+
+MODES = ('json_load', 'stream_list', 'stream_iter')
+
+
+def _legacy_parse(json_file: str) -> list:
+    """변경 전 parse_discord_json 과 같은 방식 (json.load 후 row 리스트 생성)"""
+    with open(json_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    messages = []
+    channel_info = data.get('channel', {})
+    guild_info = data.get('guild', {})
+    for msg in data.get('messages', []):
+        messages.append({
+            'id': int(msg['id']),
+            'channel_id': int(channel_info.get('id', 0)),
+            'channel_name': channel_info.get('name', ''),
+            'server_id': int(guild_info.get('id', 0)) if guild_info.get('id') else None,
+            'server_name': guild_info.get('name', ''),
+            'author_id': int(msg['author']['id']),
+            'author_name': msg['author']['name'],
+            'author_discriminator': msg['author'].get('discriminator', ''),
+            'author_avatar': msg['author'].get('avatarUrl', ''),
+            'content': msg.get('content', ''),
+            'timestamp': msg['timestamp'],
+            'message_type': msg.get('type', 'Default'),
+            'is_pinned': msg.get('isPinned', False),
+            'reference_message_id': int(msg['reference']['messageId']) if msg.get('reference', {}).get('messageId') else None,
+            'attachments': json.dumps(msg.get('attachments', [])),
+            'embeds': json.dumps(msg.get('embeds', [])),
+            'reactions': json.dumps(msg.get('reactions', [])),
+            'mentions': json.dumps(msg.get('mentions', []))
+        })
+    return messages
+
+
+def _run_mode(mode: str, json_file: str) -> dict:
+    from export_stream import ExportStream, build_channel_columns, build_message_row
+
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if mode == 'json_load':
+        count = len(_legacy_parse(json_file))
+    else:
+        with ExportStream(json_file) as stream:
+            columns = build_channel_columns(stream.channel, stream.guild)
+            rows = (build_message_row(msg, columns) for msg in stream)
+            if mode == 'stream_list':
+                count = len(list(rows))
+            else:
+                count = sum(1 for _ in rows)
+    elapsed = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 의 ru_maxrss 단위는 KB
+    return {
+        'mode': mode,
+        'messages': count,
+        'seconds': elapsed,
+        'messages_per_sec': count / elapsed if elapsed else 0.0,
+        'peak_rss_mb': peak_rss / 1024,
+        'rss_growth_mb': (peak_rss - baseline_rss) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Discord export 파싱 벤치마크")
+    parser.add_argument('--messages', type=int, default=1_000_000, help="합성 export 메시지 수")
+    parser.add_argument('--export', help="기존 export 파일 사용 (지정 시 합성 생략)")
+    parser.add_argument('--modes', default=','.join(MODES), help=f"실행할 방식 ({','.join(MODES)})")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(_run_mode(args.child, args.export)))
+        return
+
+    tmp_dir = None
+    export_file = args.export
+    if not export_file:
+        from synthetic_export import write_export
+        tmp_dir = tempfile.mkdtemp(prefix='bench_parse_')
+        export_file = os.path.join(tmp_dir, 'synthetic.json')
+        gen_start = time.perf_counter()
+        size = write_export(export_file, args.messages)
+        print(f"📝 합성 export 생성: {args.messages:,}개 메시지, {size / 1024 / 1024:.1f} MB "
+              f"({time.perf_counter() - gen_start:.1f}초)")
+
+    size_mb = os.path.getsize(export_file) / 1024 / 1024
+    print(f"{'mode':<12} {'messages':>10} {'sec':>8} {'msg/s':>10} {'peak RSS MB':>12} {'RSS +MB':>9}")
+    try:
+        for mode in args.modes.split(','):
+            out = subprocess.run(
+                [sys.executable, __file__, '--child', mode, '--export', export_file],
+                capture_output=True, text=True, check=True
+            )
+            r = json.loads(out.stdout)
+            print(f"{r['mode']:<12} {r['messages']:>10,} {r['seconds']:>8.2f} {r['messages_per_sec']:>10,.0f} "
+                  f"{r['peak_rss_mb']:>12.1f} {r['rss_growth_mb']:>9.1f}")
+        print(f"(export 크기: {size_mb:.1f} MB)")
+    finally:
+        if tmp_dir:
+            os.remove(export_file)
+            os.rmdir(tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
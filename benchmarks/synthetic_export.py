@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+합성 DiscordChatExporter export 생성기
+sample_data/ 의 실제 export 메시지를 템플릿으로 사용해 원하는 크기의 JSON export 를 만듭니다.
+
+사용법:
+    python benchmarks/synthetic_export.py --messages 1000000 --output /tmp/synthetic.json
+"""
+
+import argparse
+import copy
+import glob
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'app'))
+
+from export_stream import ExportStream  # noqa: E402
+from discord_snowflake import datetime_to_snowflake  # noqa: E402
+
+SAMPLE_DIR = ROOT / 'sample_data'
+
+
+def load_templates() -> Dict[str, Any]:
+    """
+    sample_data/ 에서 guild/channel 정보와 메시지 템플릿을 읽어옵니다.
+
+    test_messages.json 은 내보내기 도중 잘린 파일이라 json.load 로는 읽히지 않으므로
+    스트리밍 파서로 잘리기 전까지의 메시지만 사용합니다.
+    """
+    header: Dict[str, Any] = {}
+    messages: List[Dict[str, Any]] = []
+    files = [SAMPLE_DIR / 'test_messages.json'] + sorted(Path(p) for p in glob.glob(str(SAMPLE_DIR / 'messages_*.json')))
+    for path in files:
+        stream = ExportStream(str(path))
+        if not header:
+            header = {'guild': stream.guild, 'channel': stream.channel}
+        try:
+            for msg in stream:
+                messages.append(msg)
+        except ValueError:
+            pass
+        finally:
+            stream.close()
+    return {'header': header, 'messages': messages}
+
+
+def write_export(output: str, count: int, indent: int = 2, start: datetime = None) -> int:
+    """
+    `count` 개 메시지를 가진 합성 export 를 파일로 씁니다 (메모리에 모으지 않음).
+
+    Args:
+        output: 출력 파일 경로
+        count: 메시지 수
+        indent: JSON 들여쓰기 (DiscordChatExporter 기본 출력은 2)
+        start: 첫 메시지 시각 (기본: 현재 - count 초)
+
+    Returns:
+        작성된 파일 크기 (bytes)
+    """
+    templates = load_templates()
+    header = templates['header']
+    samples = templates['messages']
+    start = start or (datetime.now(timezone.utc) - timedelta(seconds=count))
+
+    with open(output, 'w', encoding='utf-8') as f:
+        f.write('{\n')
+        f.write(f'  "guild": {json.dumps(header["guild"])},\n')
+        f.write(f'  "channel": {json.dumps(header["channel"])},\n')
+        f.write(f'  "dateRange": {{"after": "{start.isoformat()}", "before": null}},\n')
+        f.write(f'  "exportedAt": "{datetime.now(timezone.utc).isoformat()}",\n')
+        f.write('  "messages": [\n')
+        prev_id = None
+        for i in range(count):
+            msg = copy.copy(samples[i % len(samples)])
+            ts = start + timedelta(seconds=i)
+            msg_id = datetime_to_snowflake(ts) | (i & 0x3FFFFF)
+            msg['id'] = str(msg_id)
+            msg['timestamp'] = ts.isoformat()
+            if msg.get('reference') and prev_id:
+                msg['reference'] = dict(msg['reference'], messageId=str(prev_id))
+            prev_id = msg_id
+            if i:
+                f.write(',\n')
+            f.write(json.dumps(msg, indent=indent, ensure_ascii=False))
+        f.write('\n  ],\n')
+        f.write(f'  "messageCount": {count}\n')
+        f.write('}\n')
+    return os.path.getsize(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="합성 DiscordChatExporter export 생성")
+    parser.add_argument('--messages', type=int, default=1_000_000, help="메시지 수 (기본값: 1,000,000)")
+    parser.add_argument('--output', required=True, help="출력 파일 경로")
+    parser.add_argument('--indent', type=int, default=2, help="JSON 들여쓰기 (0이면 한 줄)")
+    args = parser.parse_args()
+
+    size = write_export(args.output, args.messages, indent=args.indent or None)
+    print(f"✅ {args.messages:,}개 메시지 export 생성: {args.output} ({size / 1024 / 1024:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,18 +4,32 @@ Discord Direct API Collector (Railway/Free hosting 호환)
 Discord API를 직접 사용해서 메시지를 수집하는 모듈
 """
 
+import asyncio
 import os
-import requests
+import sys
 import json
-from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Any
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional
 from supabase import create_client, Client
+import httpx
 import logging
+from pathlib import Path
+
+# app/ 공용 모듈 (supabase_writer 등)
+sys.path.append(str(Path(__file__).resolve().parent / 'app'))
+from supabase_writer import upsert_rows
+from checkpoints import default_checkpoint_store
+from discord_paginator import MessagePaginator
+from discord_rest import AsyncDiscordClient, shared_client
+from guild_collector import GuildCollector
+from backfill import BackfillEngine, default_backfill_store, summarize_state
+from metadata_cache import shared_metadata_cache
+from staging_store import open_writer
 
 logger = logging.getLogger(__name__)
 
 class DiscordAPICollector:
-    def __init__(self, discord_token: str, supabase_url: str, supabase_key: str):
+    def __init__(self, discord_token: str, supabase_url: str, supabase_key: str, checkpoint_store=None):
         """
         Initialize the Discord API collector
         
@@ -23,9 +37,15 @@ class DiscordAPICollector:
             discord_token: Discord bot token (Bot prefix will be added automatically)
             supabase_url: Supabase project URL
             supabase_key: Supabase API key
+            checkpoint_store: 증분 수집 체크포인트 저장소 (기본: CHECKPOINT_BACKEND 설정)
         """
         self.discord_token = discord_token
         self.supabase: Client = create_client(supabase_url, supabase_key)
+        self.checkpoints = checkpoint_store or default_checkpoint_store(self.supabase)
+        # 프로세스 공용 Discord REST 클라이언트 (커넥션 풀 + rate-limit bucket)
+        self.discord = shared_client(discord_token)
+        # 채널/서버 정보 캐시 (TTL + LRU, 만료 전 백그라운드 갱신)
+        self.metadata = shared_metadata_cache()
         
         # Discord token 형식 확인 및 설정 (User token 지원)
         if discord_token.startswith('Bot '):
@@ -40,78 +60,56 @@ class DiscordAPICollector:
                 'Content-Type': 'application/json'
             }
         
-    def fetch_channel_messages(self, channel_id: str, hours: int = 1, limit: int = 100) -> List[Dict[str, Any]]:
+    def fetch_channel_messages(self, channel_id: str, hours: int = 1, limit: int = 100,
+                               after_id: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Discord REST API를 사용해서 채널 메시지 가져오기
         
+        시간 범위는 snowflake 로 한 번만 변환하고 after= 로 오래된 쪽부터 앞으로 페이지 이동합니다.
+        
         Args:
             channel_id: Discord channel ID
             hours: Number of hours to go back
             limit: Maximum number of messages per request (Discord limit: 100)
+            after_id: 이 메시지 ID 이후만 가져오기 (지정 시 hours 무시)
             
         Returns:
             List of message dictionaries
         """
-        logger.info(f"Fetching messages from channel {channel_id} for last {hours} hours")
         
-        # 시간 계산
-        after_time = datetime.now(timezone.utc) - timedelta(hours=hours)
+        if after_id:
+            logger.info(f"Fetching messages from channel {channel_id} after message {after_id}")
+        else:
+            logger.info(f"Fetching messages from channel {channel_id} for last {hours} hours")
         
-        url = f"https://discord.com/api/v10/channels/{channel_id}/messages"
+        paginator = MessagePaginator.for_window(hours=hours, after_id=after_id, limit=limit)
         all_messages = []
-        last_message_id = None
-        
-        while True:
-            params = {'limit': limit}
-            if last_message_id:
-                params['before'] = last_message_id
-                
-            try:
-                response = requests.get(url, headers=self.headers, params=params)
-                response.raise_for_status()
-                messages = response.json()
-                
-                if not messages:
-                    break
-                    
-                # 시간 필터링
-                filtered_messages = []
-                for msg in messages:
-                    msg_time = datetime.fromisoformat(msg['timestamp'].replace('Z', '+00:00'))
-                    if msg_time < after_time:
-                        # 더 이상 오래된 메시지는 가져오지 않음
-                        return all_messages
-                    filtered_messages.append(msg)
-                
-                all_messages.extend(filtered_messages)
-                
-                # 다음 페이지를 위한 설정
-                if len(messages) < limit:
-                    break
-                last_message_id = messages[-1]['id']
-                
-                logger.info(f"Fetched {len(filtered_messages)} messages in this batch")
-                
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Failed to fetch messages: {e}")
-                if hasattr(e, 'response') and e.response:
-                    logger.error(f"Response: {e.response.text}")
-                raise
-        
-        logger.info(f"Total fetched: {len(all_messages)} messages")
+        for page in paginator.pages(lambda params: self._get_messages_page(channel_id, params)):
+            all_messages.extend(page)
+            logger.info(f"Fetched {len(page)} messages in this batch")
+        
+        logger.info(f"Total fetched: {len(all_messages)} messages ({paginator.pages_fetched} pages)")
         return all_messages
     
+    def _get_messages_page(self, channel_id: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        메시지 한 페이지 요청
+        """
+        try:
+            return self.discord.get_messages(channel_id, params)
+        except httpx.HTTPError as e:
+            logger.error(f"Failed to fetch messages: {e}")
+            if isinstance(e, httpx.HTTPStatusError):
+                logger.error(f"Response: {e.response.text}")
+            raise
+    
     def get_channel_info(self, channel_id: str) -> Dict[str, Any]:
         """
         채널 정보 가져오기
         """
-        url = f"https://discord.com/api/v10/channels/{channel_id}"
-        
         try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            return self.metadata.get(f"channel:{channel_id}", lambda: self.discord.get_channel(channel_id))
+        except httpx.HTTPError as e:
             logger.error(f"Failed to fetch channel info: {e}")
             return {}
     
@@ -122,13 +120,9 @@ class DiscordAPICollector:
         if not guild_id:
             return {}
             
-        url = f"https://discord.com/api/v10/guilds/{guild_id}"
-        
         try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            return self.metadata.get(f"guild:{guild_id}", lambda: self.discord.get_guild(guild_id))
+        except httpx.HTTPError as e:
             logger.error(f"Failed to fetch guild info: {e}")
             return {}
     
@@ -176,36 +170,34 @@ class DiscordAPICollector:
         logger.info(f"Saving {len(messages)} messages to Supabase")
         
         try:
-            # 배치로 나누어 저장
-            batch_size = 50
-            total_saved = 0
-            
-            for i in range(0, len(messages), batch_size):
-                batch = messages[i:i + batch_size]
-                result = self.supabase.table('discord_messages').upsert(
-                    batch,
-                    on_conflict='id'
-                ).execute()
-                total_saved += len(batch)
-                logger.info(f"Saved batch {i//batch_size + 1}: {len(batch)} messages")
-            
-            logger.info(f"Successfully saved {total_saved} messages")
+            # payload 크기 기준 adaptive 배치로 나누어 저장 (여러 배치를 동시에 전송, 실패한 배치는 재시도)
+            summary = upsert_rows(self.supabase, messages)
+            total_saved = summary['rows']
+            
+            logger.info(f"Successfully saved {total_saved} messages "
+                        f"({summary['rows_per_second']:.0f} rows/s, p95 batch latency {summary['latency_p95']:.2f}s, "
+                        f"{summary['rows_skipped']} unchanged skipped)")
             return total_saved
             
         except Exception as e:
             logger.error(f"Failed to save messages: {e}")
             raise
     
-    def collect_and_save(self, channel_id: str, hours: int = 1) -> Dict[str, Any]:
+    def collect_and_save(self, channel_id: str, hours: int = 1, incremental: bool = False) -> Dict[str, Any]:
         """
         전체 워크플로우: 메시지 가져오기 -> 변환 -> 저장
+        
+        incremental=True 면 채널 체크포인트(마지막 저장 메시지) 이후만 가져오고,
+        저장이 끝나면 체크포인트를 갱신합니다. 체크포인트가 없으면 hours 범위로 수집합니다.
         """
         start_time = datetime.now(timezone.utc)
         logger.info(f"Starting collection for channel {channel_id}, last {hours} hours")
         
         try:
+            after_id = self.checkpoints.get(channel_id) if incremental else None
+            
             # 1. 메시지 가져오기
-            messages = self.fetch_channel_messages(channel_id, hours)
+            messages = self.fetch_channel_messages(channel_id, hours, after_id=after_id)
             
             # 2. 채널 정보 가져오기
             channel_info = self.get_channel_info(channel_id)
@@ -220,6 +212,11 @@ class DiscordAPICollector:
             # 5. Supabase에 저장
             saved_count = self.save_to_supabase(formatted_messages)
             
+            # 6. 체크포인트 갱신 (저장이 끝난 뒤에만)
+            last_message_id = max((msg['id'] for msg in formatted_messages), default=after_id)
+            if incremental and last_message_id:
+                self.checkpoints.advance(channel_id, last_message_id)
+            
             end_time = datetime.now(timezone.utc)
             execution_time = end_time - start_time
             
@@ -231,6 +228,9 @@ class DiscordAPICollector:
                 'hours': hours,
                 'messages_fetched': len(messages),
                 'messages_saved': saved_count,
+                'incremental': incremental,
+                'resumed_after': str(after_id) if after_id else None,
+                'last_message_id': str(last_message_id) if last_message_id else None,
                 'execution_time': str(execution_time),
                 'timestamp': start_time.isoformat()
             }
@@ -240,4 +240,92 @@ class DiscordAPICollector:
             
         except Exception as e:
             logger.error(f"Collection failed: {e}")
-            raise 
\ No newline at end of file
+            raise 
+    
+    async def collect_guild_async(self, guild_id: Optional[str] = None, channel_ids: Optional[List[str]] = None,
+                                  hours: int = 1, incremental: bool = False,
+                                  concurrency: Optional[int] = None) -> Dict[str, Any]:
+        """
+        서버 전체(또는 여러 채널)를 동시에 수집해서 저장
+        
+        서버/채널 정보는 한 번만 가져오고, 채널들은 하나의 rate-limit 예산과 UPSERT writer 를 공유합니다.
+        
+        Args:
+            guild_id: Discord guild ID (지정 시 서버의 텍스트 채널 전체)
+            channel_ids: 수집할 채널 ID 목록 (guild_id 와 함께 주면 그 중 일부만)
+            hours: Number of hours to go back
+            incremental: 채널별 체크포인트 이후만 수집
+            concurrency: 동시에 수집할 채널 수
+            
+        Returns:
+            Per-channel counts/timings plus totals
+        """
+        logger.info(f"Starting guild collection: guild={guild_id}, channels={channel_ids}, last {hours} hours")
+        writer = open_writer(self.supabase)
+        try:
+            async with AsyncDiscordClient(self.discord_token) as client:
+                collector = GuildCollector(client, writer, self.format_messages_for_supabase,
+                                           checkpoints=self.checkpoints, concurrency=concurrency,
+                                           metadata=self.metadata)
+                result = await collector.collect(guild_id=guild_id, channel_ids=channel_ids,
+                                                 hours=hours, incremental=incremental)
+        finally:
+            await asyncio.to_thread(writer.close)
+        
+        result['timestamp'] = datetime.now(timezone.utc).isoformat()
+        return result
+    
+    def collect_guild(self, guild_id: Optional[str] = None, channel_ids: Optional[List[str]] = None,
+                      hours: int = 1, incremental: bool = False, concurrency: Optional[int] = None) -> Dict[str, Any]:
+        """
+        collect_guild_async 의 동기 버전 (이벤트 루프 밖에서 호출)
+        """
+        return asyncio.run(self.collect_guild_async(guild_id=guild_id, channel_ids=channel_ids, hours=hours,
+                                                    incremental=incremental, concurrency=concurrency))
+    
+    async def backfill_async(self, channel_id: str, since: Optional[datetime] = None, restart: bool = False,
+                             max_seconds: Optional[float] = None, concurrency: Optional[int] = None,
+                             shards: Optional[int] = None) -> Dict[str, Any]:
+        """
+        채널 전체 기록 backfill (snowflake 범위를 나눠 동시에 가져오고, 범위별 진행 상태를 저장)
+        
+        중간에 멈추거나 실패해도 다시 호출하면 저장된 지점부터 이어서 진행합니다.
+        
+        Args:
+            channel_id: Discord channel ID
+            since: 이 시각 이후만 (기본: 채널 생성 시점부터)
+            restart: 저장된 진행 상태를 버리고 처음부터
+            max_seconds: 실행 시간 제한 (넘으면 진행 상태를 저장하고 반환)
+            concurrency: 동시에 가져올 범위 수
+            shards: 새 계획을 만들 때 나눌 범위 수
+        """
+        logger.info(f"Starting backfill for channel {channel_id}")
+        writer = open_writer(self.supabase)
+        try:
+            async with AsyncDiscordClient(self.discord_token) as client:
+                engine = BackfillEngine(client, writer, self.format_messages_for_supabase,
+                                        default_backfill_store(self.supabase),
+                                        concurrency=concurrency, shards=shards, metadata=self.metadata)
+                result = await engine.run(channel_id, since=since, restart=restart, max_seconds=max_seconds)
+        finally:
+            await asyncio.to_thread(writer.close)
+        
+        result['timestamp'] = datetime.now(timezone.utc).isoformat()
+        return result
+    
+    def backfill_status(self, channel_id: str) -> Dict[str, Any]:
+        """
+        저장된 backfill 진행 상태 요약
+        """
+        result = summarize_state(default_backfill_store(self.supabase).load(channel_id))
+        result['channel_id'] = channel_id
+        return result
+    
+    def backfill(self, channel_id: str, since: Optional[datetime] = None, restart: bool = False,
+                 max_seconds: Optional[float] = None, concurrency: Optional[int] = None,
+                 shards: Optional[int] = None) -> Dict[str, Any]:
+        """
+        backfill_async 의 동기 버전 (이벤트 루프 밖에서 호출)
+        """
+        return asyncio.run(self.backfill_async(channel_id, since=since, restart=restart, max_seconds=max_seconds,
+                                               concurrency=concurrency, shards=shards))
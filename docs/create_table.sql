@@ -42,4 +42,39 @@ COMMENT ON COLUMN discord_messages.timestamp IS '메시지 작성 시간';
 COMMENT ON COLUMN discord_messages.attachments IS '첨부파일 정보 (JSON)';
 COMMENT ON COLUMN discord_messages.embeds IS '임베드 정보 (JSON)';
 COMMENT ON COLUMN discord_messages.reactions IS '반응(이모지) 정보 (JSON)';
-COMMENT ON COLUMN discord_messages.mentions IS '멘션 정보 (JSON)'; 
\ No newline at end of file
+COMMENT ON COLUMN discord_messages.mentions IS '멘션 정보 (JSON)'; 
+-- 채널별 수집 체크포인트 (CHECKPOINT_BACKEND=supabase 일 때 사용)
+CREATE TABLE IF NOT EXISTS discord_collect_checkpoints (
+    channel_id BIGINT PRIMARY KEY,  -- Discord 채널 ID
+    last_message_id BIGINT NOT NULL,  -- 마지막으로 저장한 메시지 ID (snowflake)
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+ALTER TABLE discord_collect_checkpoints DISABLE ROW LEVEL SECURITY;
+
+COMMENT ON TABLE discord_collect_checkpoints IS '채널별 증분 수집 체크포인트';
+
+-- 체크포인트를 한 번의 쓰기로 앞당김 (동시에 수집해도 더 작은 값으로 되돌리지 않음)
+CREATE OR REPLACE FUNCTION advance_collect_checkpoint(p_channel_id BIGINT, p_message_id BIGINT)
+RETURNS BIGINT
+LANGUAGE sql
+AS $$
+    INSERT INTO discord_collect_checkpoints (channel_id, last_message_id, updated_at)
+    VALUES (p_channel_id, p_message_id, NOW())
+    ON CONFLICT (channel_id) DO UPDATE
+        SET last_message_id = GREATEST(discord_collect_checkpoints.last_message_id, EXCLUDED.last_message_id),
+            updated_at = CASE WHEN EXCLUDED.last_message_id > discord_collect_checkpoints.last_message_id
+                              THEN EXCLUDED.updated_at ELSE discord_collect_checkpoints.updated_at END
+    RETURNING last_message_id;
+$$;
+
+-- 채널 전체 기록 backfill 진행 상태 (CHECKPOINT_BACKEND=supabase 일 때 사용)
+CREATE TABLE IF NOT EXISTS discord_backfill_state (
+    channel_id BIGINT PRIMARY KEY,  -- Discord 채널 ID
+    state JSONB NOT NULL,  -- snowflake 범위별 shard 와 저장 완료 커서
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+ALTER TABLE discord_backfill_state DISABLE ROW LEVEL SECURITY;
+
+COMMENT ON TABLE discord_backfill_state IS '채널별 backfill shard 진행 상태';